@@ -1,21 +1,43 @@
-import json
 import os
-from typing import List, Optional
 
 import google.generativeai as genai
-from pydantic import BaseModel, ValidationError
+from pydantic import ValidationError
 from dotenv import load_dotenv
 
+from ai_clients.parsing import REMEDY_SCHEMA_JSON, parse_remedy
+from utils.allergens import filter_ingredients
+from utils.tracing import traced
+
 load_dotenv()
 
 # Configure the Gemini API
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
 # Specify the model to use
-model = genai.GenerativeModel('gemini-1.5-flash')
+_model = None
+
+
+def get_model():
+    """Returns this process' Gemini model, creating it on first use."""
+    global _model
+    if _model is None:
+        _model = genai.GenerativeModel('gemini-1.5-flash')
+    return _model
+
+
+def reset_model():
+    """Drops the Gemini model inherited from a parent process; the next call creates a new one."""
+    global _model
+    _model = None
+
+
+# HTTP connections must not be shared with a forked worker
+os.register_at_fork(after_in_child=reset_model)
+
 COST_PER_1000_INPUT_TOKENS = 0.075 / 1000
 COST_PER_1000_OUTPUT_TOKENS = 0.30 / 1000
 
+@traced("llm.gemini")
 def generate_remedy_instructions(symptom: str, available_ingredients: list,allergies : list, temperature: float = 0.5, max_output_tokens: int = 500):
     """
     Calls Gemini API to generate kitchen remedy instructions based on the given symptom and available ingredients.
@@ -31,12 +53,8 @@ def generate_remedy_instructions(symptom: str, available_ingredients: list,aller
         RemedyInstruction: AI-generated remedy instructions in structured format.
     """
 
-    # Define the structured response format using Pydantic
-    class RemedyInstruction(BaseModel):
-        remedy_name: str
-        steps: Optional[List[str]] = None  # make it optional
-
-    filtered_ingredients = [ingredient for ingredient in available_ingredients if ingredient not in (allergies or [])]
+    model = get_model()
+    filtered_ingredients = filter_ingredients(available_ingredients, allergies)
     remedy_data_str = ""
     response = ""
 
@@ -59,7 +77,7 @@ def generate_remedy_instructions(symptom: str, available_ingredients: list,aller
                 Pay special attention to spices and any ingredient that can be an irritant. Always explicitly include a caution message as the **LAST step** for any ingredient that can cause throat or lung irritation.
                  Format your response as a JSON dictionary with the following structure:
                  for example:
-                        {json.dumps(RemedyInstruction.model_json_schema(), indent=2)}
+                        {REMEDY_SCHEMA_JSON}
                 If no remedy is possible with the available ingredients, return the string "No remedy possible with available ingredients." and nothing else.
                 Ensure the response is valid JSON, unless no remedy is possible."""
     if filtered_ingredients:
@@ -142,27 +160,10 @@ def generate_remedy_instructions(symptom: str, available_ingredients: list,aller
 
     try:
 
-            remedy_data_str = response.text.strip()
-            remedy_data_str = remedy_data_str.replace("```json", "").replace("```", "").strip()
-
-            try:
-                json_data = json.loads(remedy_data_str)
-                # Extract the remedy data from the 'properties' dictionary
-                remedy_info = {}
-                if "properties" in json_data:
-                    remedy_info["remedy_name"] = json_data["properties"]["remedy_name"]["title"]
-                    remedy_info["steps"] = json_data["steps"]
-                else:
-                    print("properties key not found")
-                print("json:::",json_data)
-                remedy_data = RemedyInstruction.model_validate(remedy_info)
-                print(f"Remedy Name: {remedy_data.remedy_name}")
-                print(f"Remedy_Steps::", remedy_data.steps)
-                return remedy_data
-            except json.JSONDecodeError as json_err:
-                print(f"JSON Decode Error: {json_err}")
-                print(f"Recieved String: {remedy_data_str}")
-                return None
+            remedy_data = parse_remedy(remedy_data_str)
+            print(f"Remedy Name: {remedy_data.remedy_name}")
+            print(f"Remedy_Steps::", remedy_data.steps)
+            return remedy_data
     except ValidationError as e:
             print(f"Error parsing remedy instructions: {e}")
             return None
@@ -1,37 +1,46 @@
-import json
 import os
-import re
-from typing import List, Optional
 
 import groq
 from dotenv import load_dotenv
-from pydantic import BaseModel, ValidationError
+
+from ai_clients.parsing import REMEDY_SCHEMA_JSON, parse_remedy
+from utils.allergens import filter_ingredients
+from utils.tracing import traced
 
 load_dotenv()
 
 # Configure the Groq API
-client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
+_client = None
+
+
+def get_client():
+    """Returns this process' Groq client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _client
 
 
-# Define the structured response format using Pydantic
-class RemedyInstruction(BaseModel):
-    remedy_name: str
-    steps: Optional[List[str]] = None  # List of strings
+def reset_client():
+    """Drops the Groq client inherited from a parent process; the next call creates a new one."""
+    global _client
+    _client = None
 
 
+# HTTP connections must not be shared with a forked worker
+os.register_at_fork(after_in_child=reset_client)
 
+
+@traced("llm.groq")
 def generate_remedy_instructions(symptom: str, available_ingredients: list, allergies: list = None):
     """
     Calls Groq API to generate kitchen remedy instructions based on the given symptom and available ingredients.
     """
-    filtered_ingredients = available_ingredients[:]
+    client = get_client()
+    filtered_ingredients = filter_ingredients(available_ingredients, allergies)
     COST_PER_1000_INPUT_TOKENS = 0.59 / 1000  # $0.59 per million input tokens
     COST_PER_1000_OUTPUT_TOKENS = 0.79 / 1000  # $0.79 per million output tokens
     remedy_data_str = ""
-    if allergies:
-        for allergy in allergies:
-            if allergy in filtered_ingredients:
-                filtered_ingredients.remove(allergy)
     if filtered_ingredients:
       try:
         chat_input = [
@@ -54,7 +63,7 @@ def generate_remedy_instructions(symptom: str, available_ingredients: list, alle
 
                 Pay special attention to spices and any ingredient that can be an irritant. Always explicitly include a caution message as the **LAST step** for any ingredient that can cause throat or lung irritation.
                  Format your response as a JSON dictionary with the following structure:
-                        {json.dumps(RemedyInstruction.model_json_schema(), indent=2)}
+                        {REMEDY_SCHEMA_JSON}
                 If no remedy is possible with the available ingredients, return the string "No remedy possible with available ingredients." and nothing else.
                 Ensure the response is valid JSON, unless no remedy is possible.
                                                """
@@ -143,10 +152,12 @@ def generate_remedy_instructions(symptom: str, available_ingredients: list, alle
         # ✅ Parse and validate response
        # return clean_and_parse_response(remedy_data_str)
     print(remedy_data_str)
-    remedy_data_str = re.sub(r'```json|```', '', remedy_data_str).strip()
-    # Extract token usage from response
-
-    return RemedyInstruction.model_validate_json(remedy_data_str)
+    try:
+        return parse_remedy(remedy_data_str)
+    except ValueError as e:
+        # Includes TruncatedRemedyError and pydantic's ValidationError
+        print(f"Error parsing remedy instructions: {e}")
+        return None
 
 
 
@@ -1,22 +1,38 @@
-import json
 import os
-from sys import prefix
-from typing import List, Optional
-from pydantic import BaseModel, ValidationError
-from typing import List
 import openai
-from dill.source import indent
 from dotenv import load_dotenv
-from pydantic import BaseModel, ValidationError
+from pydantic import ValidationError
+
+from ai_clients.parsing import REMEDY_SCHEMA_JSON, parse_remedy
+from utils.allergens import filter_ingredients
+from utils.tracing import traced
 
 load_dotenv()
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-print(client)
+_client = None
+
+
+def get_client():
+    """Returns this process' OpenAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def reset_client():
+    """Drops the OpenAI client inherited from a parent process; the next call creates a new one."""
+    global _client
+    _client = None
+
+
+# HTTP connections must not be shared with a forked worker
+os.register_at_fork(after_in_child=reset_client)
 
 # Specify the model to use
 model = "gpt-4o-mini"
 
 
+@traced("llm.openai")
 def generate_remedy_instructions(symptom: str, available_ingredients: list, allergies: list = None):
     """
     Calls OpenAI API to generate kitchen remedy instructions based on the given symptom and available ingredients.
@@ -29,24 +45,15 @@ def generate_remedy_instructions(symptom: str, available_ingredients: list, alle
         RemedyInstruction: AI-generated remedy instructions in structured format.
     """
 
-    # Define the structured response format using Pydantic
-    class RemedyInstruction(BaseModel):
-            remedy_name: str
-            steps:Optional[List[str]] = None #make it optional
-
-
+    client = get_client()
     # Example pricing (adjust based on actual rate for "gpt-4o-mini")
     COST_PER_1000_INPUT_TOKENS = 0.15 / 1000  # $0.15 per million input tokens
     COST_PER_1000_OUTPUT_TOKENS = 0.60 / 1000  # $0.60 per million output tokens
 
-    filtered_ingredients = available_ingredients[:]  # Create a copy
+    filtered_ingredients = filter_ingredients(available_ingredients, allergies)
     print("ai",allergies)
     remedy_data_str = ""
     response = ""
-    if allergies:
-        for allergy in allergies:
-            if allergy in filtered_ingredients:
-                filtered_ingredients.remove(allergy)
     if filtered_ingredients:
         try:
          response = client.beta.chat.completions.parse(
@@ -70,7 +77,7 @@ def generate_remedy_instructions(symptom: str, available_ingredients: list, alle
             
                 Pay special attention to spices and any ingredient that can be an irritant. Always explicitly include a caution message as the **LAST step** for any ingredient that can cause throat or lung irritation.
                 Format your response as a JSON dictionary with the following structure:
-                {json.dumps(RemedyInstruction.model_json_schema(), indent=2)}
+                {REMEDY_SCHEMA_JSON}
                 If no remedy is possible with the available ingredients, return the string "No remedy possible with available ingredients." and nothing else.
                 Ensure the response is valid JSON, unless no remedy is possible.
                                            """},
@@ -163,7 +170,7 @@ def generate_remedy_instructions(symptom: str, available_ingredients: list, alle
 
     try:
          print("sdvgsd",remedy_data_str)
-         remedy_data = RemedyInstruction.model_validate_json(remedy_data_str)
+         remedy_data = parse_remedy(remedy_data_str)
          #print("remedydata:::::",remedy_data)
          print(f"Remedy Name: {remedy_data.remedy_name}")
          print(f"Remedy_Steps::",remedy_data.steps)
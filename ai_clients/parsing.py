@@ -0,0 +1,136 @@
+"""
+Shared parsing of the remedy JSON returned by the AI providers.
+
+The RemedyInstruction model and its JSON schema (embedded in the prompts)
+are built once at import time instead of on every request. parse_remedy
+turns raw model output into a RemedyInstruction: it strips markdown code
+fences and surrounding chatter, decodes with orjson when it is installed,
+repairs output cut off by the token limit, and unwraps the schema-shaped
+answer Gemini sometimes returns. Output cut off inside the remedy name or
+the steps is rejected with TruncatedRemedyError rather than repaired into
+a remedy with a half-written or missing step.
+"""
+import json
+import re
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from utils.json_codec import loads
+from utils.tracing import traced
+
+
+class RemedyInstruction(BaseModel):
+    """Structured remedy returned by every provider."""
+    remedy_name: str
+    steps: Optional[List[str]] = None  # make it optional
+
+
+REMEDY_SCHEMA_JSON = json.dumps(RemedyInstruction.model_json_schema(), indent=2)
+
+_OPENING_FENCE = re.compile(r"^```[a-zA-Z]*\s*")
+_CLOSING_FENCE = re.compile(r"\s*```\s*$")
+_DANGLING_KEY = re.compile(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$')
+_TRAILING_COMMA = re.compile(r",\s*$")
+
+
+class TruncatedRemedyError(ValueError):
+    """The output was cut off inside a value, so the remedy is incomplete."""
+
+
+def strip_fences(text: str) -> str:
+    """
+        Removes markdown code fences and any text before the JSON object.
+    """
+    text = _CLOSING_FENCE.sub("", _OPENING_FENCE.sub("", text.strip()))
+    start = text.find("{")
+    return text[start:] if start > 0 else text
+
+
+def repair_truncated_json(text: str) -> str:
+    """
+        Closes a JSON document cut off mid-way: terminates an open string,
+        drops a dangling key or comma, and closes open arrays and objects.
+        Complete documents are returned unchanged.
+    """
+    return _repair(text)[0]
+
+
+def _repair(text: str) -> Tuple[str, bool]:
+    """
+        repair_truncated_json, plus whether the cut was inside a value (an
+        open string other than a dangling key, or an open array), whose
+        repaired content is incomplete.
+    """
+    closers = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            closers.append("}")
+        elif char == "[":
+            closers.append("]")
+        elif char in "}]" and closers:
+            closers.pop()
+
+    repaired = text.rstrip()
+    cut_in_value = in_string or "]" in closers
+    if in_string:
+        if escaped:
+            repaired = repaired[:-1]
+        repaired += '"'
+    if closers and closers[-1] == "}":
+        # A string right after "{" or "," inside an object is a key without a value
+        repaired, dangling = _DANGLING_KEY.subn(r"\1", repaired)
+        cut_in_value = cut_in_value and not dangling
+    repaired = _TRAILING_COMMA.sub("", repaired)
+    return repaired + "".join(reversed(closers)), cut_in_value
+
+
+def _unwrap_schema_shape(data: dict) -> dict:
+    # Gemini sometimes echoes the schema: {"properties": {"remedy_name": {"title": ...}}, "steps": [...]}
+    properties = data.get("properties")
+    if "remedy_name" in data or not isinstance(properties, dict):
+        return data
+    remedy_name = properties.get("remedy_name")
+    if isinstance(remedy_name, dict):
+        remedy_name = remedy_name.get("title")
+    return {"remedy_name": remedy_name, "steps": data.get("steps", properties.get("steps"))}
+
+
+@traced("parse")
+def parse_remedy(text: str) -> RemedyInstruction:
+    """
+        Parses the raw output of a provider into a RemedyInstruction.
+
+        Args:
+            text (str): The model output.
+
+        Returns:
+            RemedyInstruction: The validated remedy.
+
+        Raises:
+            TruncatedRemedyError: If the output was cut off inside the
+            remedy name or the steps.
+            ValueError: If the output is not a remedy, even after repair
+            (pydantic's ValidationError is a ValueError).
+    """
+    text = strip_fences(text)
+    try:
+        data = loads(text)
+    except ValueError:
+        repaired, cut_in_value = _repair(text)
+        if cut_in_value:
+            raise TruncatedRemedyError("Remedy output was cut off.")
+        data = loads(repaired)
+    if not isinstance(data, dict):
+        raise ValueError("Remedy output is not a JSON object.")
+    return RemedyInstruction.model_validate(_unwrap_schema_shape(data))
@@ -0,0 +1,58 @@
+"""
+Benchmark of the per-request cost of parsing and validating a remedy.
+
+Compares the previous approach (a RemedyInstruction model defined inside
+the request function, its JSON schema dumped for the prompt, then
+re.sub + model_validate_json) with the shared module-level model and
+ai_clients.parsing.parse_remedy.
+
+Usage:
+    python -m benchmarks.bench_parsing --iterations 2000
+"""
+import argparse
+import json
+import re
+import timeit
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from ai_clients.parsing import REMEDY_SCHEMA_JSON, parse_remedy
+
+SAMPLE = """```json
+{"remedy_name": "Honey Lemon Warm Drink",
+ "steps": ["Warm a cup of water.", "Stir in a teaspoon of honey.",
+           "Add the juice of half a lemon.", "Sip slowly.",
+           "Caution: do not give honey to children under 1 year old."]}
+```"""
+
+
+def per_request_model():
+    """The previous flow: build the model and schema, then parse."""
+    class RemedyInstruction(BaseModel):
+        remedy_name: str
+        steps: Optional[List[str]] = None
+
+    json.dumps(RemedyInstruction.model_json_schema(), indent=2)
+    return RemedyInstruction.model_validate_json(re.sub(r'```json|```', '', SAMPLE).strip())
+
+
+def shared_parser():
+    """The current flow: reuse the prebuilt schema and model."""
+    len(REMEDY_SCHEMA_JSON)
+    return parse_remedy(SAMPLE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    assert per_request_model().model_dump() == shared_parser().model_dump()
+    for name, fn in (("per-request model", per_request_model), ("shared parser", shared_parser)):
+        seconds = min(timeit.repeat(fn, number=args.iterations, repeat=3))
+        print(f"{name:>18}: {seconds / args.iterations * 1e6:9.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark of the size and lookup cost of the in-memory remedy index.
+
+Builds utils.bitset_index.RemedyIndex from a synthetic catalog (2 to 6
+ingredients per remedy, drawn with Zipf-like frequencies) and times exact
+and subset lookups for a 15-ingredient pantry.
+
+Usage:
+    python -m benchmarks.bench_remedy_index --remedies 1000000
+"""
+import argparse
+import random
+import time
+import timeit
+
+from utils.bitset_index import RemedyIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--remedies", type=int, default=1_000_000)
+    parser.add_argument("--symptoms", type=int, default=200)
+    parser.add_argument("--ingredients", type=int, default=400)
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    population = range(1, args.ingredients + 1)
+    weights = [1 / rank for rank in population]
+    remedies = [(catalog_id, f"symptom {rng.randrange(args.symptoms)}",
+                 sorted(set(rng.choices(population, weights, k=rng.randint(2, 6)))))
+                for catalog_id in range(1, args.remedies + 1)]
+
+    index = RemedyIndex()
+    start = time.perf_counter()
+    index.update([(i, f"ingredient {i}") for i in population], remedies, args.remedies)
+    print(f"load: {time.perf_counter() - start:.1f} s for {len(index)} remedies, "
+          f"{index.memory_bytes() / 1e6:.1f} MB of masks and ids")
+
+    pantry = [f"ingredient {i}" for i in rng.sample(range(1, 41), 15)]
+    for name in ("exact", "can_make", "best"):
+        lookup = getattr(index, name)
+        seconds = min(timeit.repeat(lambda: lookup("symptom 5", pantry),
+                                    number=args.iterations, repeat=3))
+        print(f"{name:>9}: {seconds / args.iterations * 1e6:7.1f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
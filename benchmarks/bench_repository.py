@@ -0,0 +1,91 @@
+"""
+Benchmark of the per-query cost of the repository's hot statements.
+
+Runs the catalog lookup and the remedy context query of database.repository
+three ways on one connection:
+
+- dict:     RealDictCursor and the plain statement (the previous code path)
+- tuple:    tuple cursor and the plain statement
+- prepared: tuple cursor and a server-side prepared statement
+
+and reports wall time and client CPU time per query. Wall time includes
+the server's parse and plan work that PREPARE saves; CPU time is the row
+building saved by tuple rows.
+
+Usage:
+    python -m benchmarks.bench_repository --iterations 2000
+
+Requires DATABASE_URL pointing at an initialized database; the lookups are
+read-only and use the first catalog remedy and kid found, if any.
+"""
+import argparse
+import time
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from database import repository
+from database.database import DATABASE_URL
+from database.prepared import run
+
+
+class _BenchConnection(psycopg2.extensions.connection):
+    """A plain connection that can carry the ``prepared`` set of database.prepared."""
+
+
+def _measure(iterations, fn):
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(iterations):
+        fn()
+    return ((time.perf_counter() - wall) / iterations * 1e6,
+            (time.process_time() - cpu) / iterations * 1e6)
+
+
+def _variants(conn, query, params):
+    def with_dicts():
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query.sql, params)
+            cursor.fetchall()
+
+    def with_tuples():
+        with conn.cursor() as cursor:
+            cursor.execute(query.sql, params)
+            cursor.fetchall()
+
+    def with_prepared():
+        with conn.cursor() as cursor:
+            run(cursor, query, params)
+            cursor.fetchall()
+
+    return {"dict": with_dicts, "tuple": with_tuples, "prepared": with_prepared}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(DATABASE_URL, connection_factory=_BenchConnection)
+    conn.autocommit = True
+    conn.prepared = set()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT symptom, ingredient_key FROM remedy_catalog LIMIT 1")
+        catalog = cursor.fetchone() or ("Sore Throat", "honey,lemon")
+        cursor.execute("SELECT id, parent_id FROM kids_profile LIMIT 1")
+        kid = cursor.fetchone() or (0, 0)
+
+    cases = [
+        (repository.CATALOG_REMEDY, catalog),
+        (repository.REMEDY_CONTEXT, (kid[1], kid[0], kid[1])),
+    ]
+    print(f"{'query':<16} {'variant':<10} {'wall us':>10} {'cpu us':>10}")
+    for query, params in cases:
+        for variant, fn in _variants(conn, query, params).items():
+            fn()  # warm up, and PREPARE once for the prepared variant
+            wall, cpu = _measure(args.iterations, fn)
+            print(f"{query.name:<16} {variant:<10} {wall:>10.1f} {cpu:>10.1f}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
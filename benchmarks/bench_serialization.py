@@ -0,0 +1,97 @@
+"""
+Benchmark of the response and JSON column serialization cost per request.
+
+Serves representative payloads of get_kids, get_ingredients and the
+remedy routes end to end through FastAPI's TestClient, from two handlers
+each: the previous one (no response model, JSONResponse) and the current
+one (the route's response model, ORJSONResponse), so response model
+validation, jsonable_encoder and rendering are all included. No database
+is involved. Also encodes remedy steps and ingredients with psycopg2's
+Json and the FastJson adapter used for inserts.
+
+Usage:
+    python -m benchmarks.bench_serialization --iterations 2000
+
+DATABASE_URL must be set (importing database.database requires it), but no
+connection is opened.
+"""
+import argparse
+import timeit
+
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.testclient import TestClient
+from psycopg2.extras import Json
+
+from database.database import FastJson
+from database.models import IngredientOut, KidProfileOut
+from utils.pagination import MAX_PAGE_SIZE
+
+KIDS_PAGE = [
+    {"id": i, "name": f"Kid {i}", "age": 4 + i % 10, "height": 101.5, "weight": 17.2,
+     "allergies": "peanut, milk", "symptom": "Sore Throat"}
+    for i in range(MAX_PAGE_SIZE)
+]
+INGREDIENTS_PAGE = [
+    {"ingredients_name": f"ingredient {i}", "is_available": i % 3 != 0}
+    for i in range(MAX_PAGE_SIZE)
+]
+REMEDY = {
+    "kid_id": 42,
+    "symptom": "Sore Throat",
+    "ingredients": ["honey", "lemon", "ginger", "water"],
+    "remedy_name": "Honey Lemon Ginger Drink",
+    "steps": ["Warm a cup of water.", "Stir in a teaspoon of honey.",
+              "Add the juice of half a lemon and a slice of ginger.", "Sip slowly.",
+              "Caution: do not give honey to children under 1 year old."],
+}
+# name -> (payload, response model of the current route, or None)
+ROUTES = {
+    "get_kids": (KIDS_PAGE, List[KidProfileOut]),
+    "get_ingredients": (INGREDIENTS_PAGE, List[IngredientOut]),
+    "remedy": (REMEDY, None),
+}
+
+
+def make_app() -> FastAPI:
+    """Serves every payload at /old/<name> and /new/<name>."""
+    app = FastAPI()
+    for name, (payload, model) in ROUTES.items():
+        def handler(payload=payload):
+            return payload
+        app.add_api_route(f"/old/{name}", handler, response_class=JSONResponse)
+        app.add_api_route(f"/new/{name}", handler, response_class=ORJSONResponse,
+                          response_model=model, response_model_exclude_unset=model is not None)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    def per_call(fn):
+        return min(timeit.repeat(fn, number=args.iterations, repeat=3)) / args.iterations * 1e6
+
+    client = TestClient(make_app())
+    print("Request end to end (us/request)")
+    for name in ROUTES:
+        assert client.get(f"/old/{name}").json() == client.get(f"/new/{name}").json()
+        baseline = per_call(lambda: client.get(f"/old/{name}"))
+        fast = per_call(lambda: client.get(f"/new/{name}"))
+        print(f"  {name:>16}: previous {baseline:8.1f}  current {fast:8.1f}"
+              f"  ({baseline / fast:.1f}x)")
+
+    print("JSON column encoding (us/insert)")
+    baseline = per_call(lambda: (Json(REMEDY["steps"]).dumps(REMEDY["steps"]),
+                                 Json(REMEDY["ingredients"]).dumps(REMEDY["ingredients"])))
+    fast = per_call(lambda: (FastJson(REMEDY["steps"]).dumps(REMEDY["steps"]),
+                             FastJson(REMEDY["ingredients"]).dumps(REMEDY["ingredients"])))
+    print(f"  {'remedy insert':>16}: Json {baseline:8.1f}  FastJson {fast:8.1f}"
+          f"  ({baseline / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark of throughput scaling with the number of worker processes on a
+CPU-bound path: the bcrypt password check done by every login.
+
+Each worker count runs the same fixed number of verify_password calls
+split across that many forked processes, the way gunicorn.conf.py forks
+its workers from a preloaded master. Near-linear scaling is expected up
+to the number of CPU cores; a single uvicorn process stays at the
+1-worker figure however many requests are in flight.
+
+Usage:
+    python -m benchmarks.bench_workers --logins 64 --max-workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+from auth import hash_password, verify_password
+
+PASSWORD = "correct horse battery staple"
+
+
+def _login(hashed: str) -> bool:
+    return verify_password(PASSWORD, hashed)
+
+
+def measure(workers: int, logins: int, hashed: str) -> float:
+    """Returns the number of logins per second reached by ``workers`` processes."""
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        pool.map(_login, [hashed] * workers)  # warm up the workers
+        start = time.perf_counter()
+        assert all(pool.map(_login, [hashed] * logins, chunksize=1))
+        return logins / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    hashed = hash_password(PASSWORD)
+    workers = 1
+    baseline = None
+    print(f"{'workers':>8} {'logins/s':>10} {'speedup':>8} {'efficiency':>11}")
+    while workers <= args.max_workers:
+        throughput = measure(workers, args.logins, hashed)
+        baseline = baseline or throughput
+        speedup = throughput / baseline
+        print(f"{workers:>8} {throughput:>10.1f} {speedup:>7.2f}x {speedup / workers:>10.0%}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
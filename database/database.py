@@ -6,11 +6,23 @@ for users, kids' profiles, and ingredients if they do not already exist.
 """
 
 import os
+import threading
+import time
 
 import psycopg2
+import psycopg2.extensions
 from dotenv import load_dotenv
 from fastapi import HTTPException
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extras import (Json, RealDictCursor, execute_values,
+                             register_default_json, register_default_jsonb)
+
+from database.query_log import is_explainable, query_log
+from utils import json_codec
+from utils.tracing import span
+from utils.allergens import parse_allergies
+from utils.remedy_keys import VOCAB_KEY_SQL, content_hash, ingredient_key
+from utils.shopping import parse_shopping_list
 
 load_dotenv()
 
@@ -19,10 +31,208 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL not found in .env file")
 
+# Upper bound of any single statement, so one pathological query cannot hold
+# a connection indefinitely; 0 disables it
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+# Set by a pre-fork server master once it has run init_db, so workers skip it
+DB_READY_ENV = "HOMECURE_DB_READY"
+INIT_DB_LOCK_ID = 7_310_001
+
+
+class FastJson(Json):
+    """
+        Adapter for JSON and JSONB parameters that encodes with the shared
+        JSON codec (orjson when installed) instead of json.dumps.
+    """
+
+    def dumps(self, obj):
+        return json_codec.dumps(obj)
+
+
+# Decode JSON and JSONB columns with the same codec on every connection
+register_default_json(globally=True, loads=json_codec.loads)
+register_default_jsonb(globally=True, loads=json_codec.loads)
+
+
+class _TracedExecute:
+    """
+        Cursor mixin recording every statement as a "db" tracing span and
+        timing it for the slow-query log (database.query_log).
+    """
+
+    def execute(self, query, vars=None):
+        statement = _statement_text(query)
+        with span("db", statement=statement[:200]):
+            start = time.perf_counter()
+            succeeded = False
+            try:
+                result = super().execute(query, vars)
+                succeeded = True
+                return result
+            finally:
+                # A failed statement aborts the transaction, so it cannot be explained
+                explain = self._explain if succeeded and self.name is None \
+                    and is_explainable(statement) else None
+                query_log.record(statement[:1000], time.perf_counter() - start, explain)
+
+    def executemany(self, query, vars_list):
+        statement = _statement_text(query)
+        with span("db", statement=statement[:200]):
+            start = time.perf_counter()
+            try:
+                return super().executemany(query, vars_list)
+            finally:
+                query_log.record(statement[:1000], time.perf_counter() - start)
+
+    def _explain(self):
+        """
+            Runs the last statement again under EXPLAIN (ANALYZE, BUFFERS).
+            Never raises: the statement itself already succeeded.
+        """
+        conn = self.connection
+        # Without an open transaction there is no savepoint to undo the second run
+        in_transaction = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        if conn.autocommit or conn.get_transaction_status() != in_transaction:
+            return None
+        query = self.query
+        try:
+            cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+        except psycopg2.Error as e:
+            return f"EXPLAIN failed: {e}"
+        try:
+            # Rolling back to the savepoint undoes any effect of the second run
+            # and keeps a failing EXPLAIN from aborting the caller's transaction
+            cursor.execute("SAVEPOINT explain_capture")
+        except psycopg2.Error as e:
+            cursor.close()
+            return f"EXPLAIN failed: {e}"
+        try:
+            cursor.execute(b"EXPLAIN (ANALYZE, BUFFERS) " + query)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except psycopg2.Error as e:
+            plan = f"EXPLAIN failed: {e}"
+        try:
+            cursor.execute("ROLLBACK TO SAVEPOINT explain_capture")
+            cursor.execute("RELEASE SAVEPOINT explain_capture")
+        except psycopg2.Error as e:
+            plan = f"EXPLAIN failed: {e}"
+        finally:
+            cursor.close()
+        return plan
+
+
+class TracedCursor(_TracedExecute, RealDictCursor):
+    """Default cursor: rows are dicts keyed by column name."""
+
+
+class TracedTupleCursor(_TracedExecute, psycopg2.extensions.cursor):
+    """
+        Cursor returning plain tuples, for hot paths that read rows by
+        position (see database.repository).
+    """
+
+
+def _statement_text(query) -> str:
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    return " ".join(str(query).split())
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """
+        Connection handed out by get_db_connection. close() returns it to the
+        pool of the current process instead of closing it.
+    """
+
+    def close(self):
+        _pool.release(self)
+
+    def discard(self):
+        """Closes the underlying database connection."""
+        super().close()
+
+
+class ConnectionPool:
+    """
+        Per-process pool of idle connections.
+
+        Connections are opened on demand and up to max_idle of them are kept
+        for reuse. A forked child must not use, or close, the sockets it
+        inherited from its parent, so reset_after_fork() abandons them and the
+        child opens its own.
+
+        Args:
+            dsn (str): The database URL.
+            max_idle (int): Maximum number of idle connections kept.
+    """
+
+    def __init__(self, dsn: str, max_idle: int):
+        self.dsn = dsn
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._inherited = []
+
+    def acquire(self):
+        """Returns an idle connection, or a new one if none is left."""
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if not conn.closed:
+                    return conn
+        with span("db.connect"):
+            conn = psycopg2.connect(self.dsn, connection_factory=PooledConnection,
+                                    cursor_factory=TracedCursor,
+                                    options=f"-c statement_timeout={STATEMENT_TIMEOUT_MS}")
+        conn.owner_pid = os.getpid()
+        # Names of the server-side prepared statements of this session (database.prepared)
+        conn.prepared = set()
+        return conn
+
+    def release(self, conn):
+        """Rolls back anything left uncommitted and keeps the connection for reuse."""
+        if conn.closed:
+            return
+        if conn.owner_pid != os.getpid():
+            # Opened by the parent process: never touch its socket
+            self._inherited.append(conn)
+            return
+        try:
+            if conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            conn.discard()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.discard()
+
+    def close_all(self):
+        """Closes every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.discard()
+
+    def reset_after_fork(self):
+        """Forgets the connections inherited from the parent process."""
+        # Keep references: garbage collecting them would terminate the parent's sessions
+        self._inherited.extend(self._idle)
+        self._idle = []
+        self._lock = threading.Lock()
+
+
+_pool = ConnectionPool(DATABASE_URL, int(os.getenv("DB_POOL_SIZE", "10")))
+os.register_at_fork(after_in_child=_pool.reset_after_fork)
+
 
 def get_db_connection():
     """
-        Establishes and returns a connection to the PostgreSQL database.
+        Returns a pooled connection to the PostgreSQL database. Calling
+        close() on it returns it to the pool.
 
         Returns:
             psycopg2.connection: A connection object to interact with the database.
@@ -31,13 +241,17 @@ def get_db_connection():
             HTTPException: If the connection to the database fails.
     """
     try:
-        conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-        return conn
+        return _pool.acquire()
     except Exception as exc:
         # Reraise the original exception with more context
         raise HTTPException(status_code=500, detail="Database connection failed") from exc
 
 
+def close_pool():
+    """Closes the idle connections of this process, e.g. in a server master before forking."""
+    _pool.close_all()
+
+
 def init_db():
     """
         Initializes the database by creating necessary tables if they do not exist.
@@ -46,13 +260,33 @@ def init_db():
         - users: Stores user credentials.
         - kids_profile: Stores child health-related data linked to a parent user.
         - ingredients: Stores ingredients and their availability linked to a user.
+        - remedy_catalog: Stores each distinct remedy once, addressed by content hash.
+        - remedy_history: Stores which catalog remedy was served to which kid, and when.
+        - remedy_shopping_list / shopping_list_items: Stores suggested shopping lists.
+        - remedy_jobs: Stores queued remedy generations and their results.
+        - symptom_vocab / ingredient_vocab: Canonical names with integer ids,
+          referenced from kids_profile, ingredients and remedy_catalog.
+
+        Pending one-off data migrations are applied and recorded in schema_migrations.
 
         This function retrieves a database connection, executes table creation queries,
         commits changes, and then closes the connection.
     """
     conn = get_db_connection()
     cursor = conn.cursor()
+    # Serialize concurrent initializations (several servers or workers
+    # starting at once); the lock is released when the transaction commits.
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (INIT_DB_LOCK_ID,))
+    # Migrations may legitimately run longer than a request's statement_timeout
+    cursor.execute("SET LOCAL statement_timeout = 0")
     print("Executing table creation query...")
+    # One-off data migrations, recorded so they run exactly once
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id SERIAL PRIMARY KEY,
@@ -72,6 +306,13 @@ def init_db():
     )
     """)
 
+    # The unique (parent_id, ingredient_name) index backs INSERT ... ON CONFLICT
+    run_migration(conn, "0005_collapse_duplicate_ingredients", collapse_duplicate_ingredients)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS ingredients_parent_name_key
+        ON ingredients (parent_id, ingredient_name)
+    """)
+
 
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS  kids_profile (
@@ -113,6 +354,320 @@ def init_db():
 
 
 
+    # One row per item to buy, parsed from the free-text list at write time
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS shopping_list_items (
+        id SERIAL PRIMARY KEY,
+        shopping_list_id INTEGER NOT NULL REFERENCES remedy_shopping_list(id) ON DELETE CASCADE,
+        kid_id INTEGER NOT NULL REFERENCES kids_profile(id),
+        parent_id INTEGER NOT NULL REFERENCES users(id),
+        symptom TEXT NOT NULL,
+        item_name TEXT NOT NULL,
+        UNIQUE (shopping_list_id, item_name)
+        );
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS shopping_list_items_parent_item_idx
+        ON shopping_list_items (parent_id, item_name)
+    """)
+    backfill_shopping_list_items(cursor)
+
+    # Keyset pagination indexes: list endpoints read WHERE parent_id = %s AND id > %s ORDER BY id
+    cursor.execute("CREATE INDEX IF NOT EXISTS kids_profile_parent_id_idx ON kids_profile (parent_id, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ingredients_parent_id_idx ON ingredients (parent_id, id)")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS remedy_shopping_list_parent_id_idx
+        ON remedy_shopping_list (parent_id, id)
+    """)
+
+    # Normalized allergies, kept in sync with the free-text column by the kids
+    # router; the GIN index serves "which kids are allergic to X" lookups.
+    cursor.execute("ALTER TABLE kids_profile ADD COLUMN IF NOT EXISTS allergy_terms TEXT[] NOT NULL DEFAULT '{}'")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS kids_profile_allergy_terms_idx
+        ON kids_profile USING GIN (allergy_terms)
+    """)
+
+    # Deduplicated, content-addressed remedies and the slim per-kid history
+    # referencing them. The legacy remedies table is no longer written to.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS remedy_catalog (
+            id SERIAL PRIMARY KEY,
+            content_hash TEXT NOT NULL UNIQUE,
+            symptom TEXT NOT NULL,
+            ingredient_key TEXT NOT NULL,
+            remedy_name TEXT NOT NULL,
+            steps JSONB NOT NULL,
+            ingredients JSONB NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS remedy_catalog_lookup_idx
+        ON remedy_catalog (symptom, ingredient_key)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS remedy_history (
+            id BIGSERIAL PRIMARY KEY,
+            kid_id INTEGER NOT NULL REFERENCES kids_profile(id),
+            parent_id INTEGER NOT NULL REFERENCES users(id),
+            catalog_id INTEGER NOT NULL REFERENCES remedy_catalog(id),
+            ts TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS remedy_history_kid_idx ON remedy_history (kid_id, ts)")
+
+    # Queued remedy generations (utils.remedy_jobs); workers claim them with
+    # FOR UPDATE SKIP LOCKED, so the partial indexes stay small
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS remedy_jobs (
+            id BIGSERIAL PRIMARY KEY,
+            parent_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            kid_id INTEGER NOT NULL REFERENCES kids_profile(id) ON DELETE CASCADE,
+            provider TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result JSONB,
+            error TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            started_at TIMESTAMPTZ,
+            finished_at TIMESTAMPTZ
+        );
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS remedy_jobs_queued_idx ON remedy_jobs (id) WHERE status = 'queued'")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS remedy_jobs_running_idx
+        ON remedy_jobs (started_at) WHERE status = 'running'
+    """)
+
+    # Canonical symptom and ingredient names with integer ids (database.vocab).
+    # Trigram indexes on the keys serve the fuzzy resolver used on write.
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for vocab in ("symptom_vocab", "ingredient_vocab"):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {vocab} (
+                id SERIAL PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                name TEXT NOT NULL
+            );
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {vocab}_key_trgm_idx ON {vocab} USING GIN (key gin_trgm_ops)")
+    cursor.execute("ALTER TABLE kids_profile ADD COLUMN IF NOT EXISTS symptom_id INTEGER REFERENCES symptom_vocab(id)")
+    cursor.execute("ALTER TABLE ingredients ADD COLUMN IF NOT EXISTS ingredient_id INTEGER REFERENCES ingredient_vocab(id)")
+    cursor.execute("ALTER TABLE remedy_catalog ADD COLUMN IF NOT EXISTS symptom_id INTEGER REFERENCES symptom_vocab(id)")
+    cursor.execute("ALTER TABLE remedy_catalog ADD COLUMN IF NOT EXISTS ingredient_ids INTEGER[]")
+    # Catalog rows still waiting for their ids, filled after every catalog insert
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS remedy_catalog_unresolved_idx
+        ON remedy_catalog (id) WHERE symptom_id IS NULL OR ingredient_ids IS NULL
+    """)
+
+    run_migration(conn, "0001_fold_remedies_into_catalog", fold_remedies_into_catalog)
+    run_migration(conn, "0002_backfill_allergy_terms", backfill_allergy_terms)
+    run_migration(conn, "0003_backfill_vocab_ids", backfill_vocab_ids)
+    # allergy_terms again, now that "es" and "ies" plurals are folded
+    run_migration(conn, "0004_refold_allergy_terms", backfill_allergy_terms)
+
     print("Table creation query executed.")
     conn.commit()
     conn.close()
+
+
+def backfill_shopping_list_items(cursor):
+    """
+        Parses shopping lists stored before shopping_list_items existed into
+        item rows. Lists that already have items are skipped, so this is
+        safe to run on every startup.
+
+        Args:
+            cursor: An open cursor; the caller commits.
+    """
+    cursor.execute("""
+        SELECT l.id, l.kid_id, l.parent_id, l.symptom, l.ingredients_to_buy
+        FROM remedy_shopping_list l
+        WHERE NOT EXISTS (SELECT 1 FROM shopping_list_items i WHERE i.shopping_list_id = l.id)
+    """)
+    rows = []
+    for row in cursor.fetchall():
+        to_buy = row["ingredients_to_buy"] or ""
+        if isinstance(to_buy, list):
+            to_buy = ", ".join(str(item) for item in to_buy)
+        rows.extend((row["id"], row["kid_id"], row["parent_id"], row["symptom"], item)
+                    for item in parse_shopping_list(to_buy))
+    if rows:
+        execute_values(cursor, """
+            INSERT INTO shopping_list_items (shopping_list_id, kid_id, parent_id, symptom, item_name)
+            VALUES %s
+            ON CONFLICT DO NOTHING
+        """, rows)
+        print(f"Backfilled {len(rows)} shopping list items.")
+
+
+def run_migration(conn, name, migrate):
+    """
+        Runs a one-off data migration unless it is already recorded in
+        schema_migrations. The migration runs in the caller's transaction,
+        so it is recorded only if it commits.
+
+        Args:
+            conn: An open connection; the caller commits.
+            name (str): Unique name of the migration.
+            migrate (callable): Called with the connection to apply the migration.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM schema_migrations WHERE name = %s", (name,))
+    if cursor.fetchone():
+        return
+    print(f"Applying migration {name}...")
+    migrate(conn)
+    cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+
+
+def collapse_duplicate_ingredients(conn):
+    """
+        Collapses duplicate pantry rows, keeping the newest, so the unique
+        (parent_id, ingredient_name) index can be created.
+    """
+    conn.cursor().execute("""
+        DELETE FROM ingredients a
+        USING ingredients b
+        WHERE a.parent_id = b.parent_id
+          AND a.ingredient_name = b.ingredient_name
+          AND a.id < b.id
+    """)
+
+
+def fold_remedies_into_catalog(conn, batch_size=1000):
+    """
+        Folds the legacy remedies table, which stored a full copy of the
+        remedy on every request, into remedy_catalog (one row per distinct
+        remedy) and remedy_history (one row per request). The legacy table
+        has no timestamps, so history rows get the migration time.
+    """
+    read_cursor = conn.cursor(name="fold_remedies")  # server-side, streamed in batches
+    read_cursor.itersize = batch_size
+    read_cursor.execute("""
+        SELECT kid_id, parent_id, symptom, remedy_name, steps, ingredients
+        FROM remedies ORDER BY id
+    """)
+    write_cursor = conn.cursor()
+    while True:
+        rows = read_cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        catalog_rows = {}
+        history_rows = []
+        for row in rows:
+            ingredients = row["ingredients"] or []
+            digest = content_hash(row["symptom"], ingredients, row["remedy_name"], row["steps"])
+            catalog_rows[digest] = (digest, row["symptom"], ingredient_key(ingredients),
+                                    row["remedy_name"], FastJson(row["steps"] or []), FastJson(ingredients))
+            history_rows.append((row["kid_id"], row["parent_id"], digest))
+        insert_catalog_rows(write_cursor, list(catalog_rows.values()))
+        execute_values(write_cursor, """
+            INSERT INTO remedy_history (kid_id, parent_id, catalog_id)
+            SELECT v.kid_id, v.parent_id, c.id
+            FROM (VALUES %s) AS v (kid_id, parent_id, content_hash)
+            JOIN remedy_catalog c ON c.content_hash = v.content_hash
+        """, history_rows)
+    read_cursor.close()
+
+
+def backfill_allergy_terms(conn):
+    """
+        Sets allergy_terms of every kid with allergies from their free-text
+        allergies, for kids created before the column existed or before a
+        change to the folding of the terms.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, allergies FROM kids_profile WHERE allergies IS NOT NULL")
+    rows = [(row["id"], list(parse_allergies(row["allergies"]))) for row in cursor.fetchall()]
+    if rows:
+        execute_values(cursor, """
+            UPDATE kids_profile k SET allergy_terms = v.terms
+            FROM (VALUES %s) AS v (id, terms)
+            WHERE k.id = v.id
+        """, rows, template="(%s, %s::text[])")
+
+
+def fill_vocab_ids(cursor, vocab: str, table: str, name_column: str, id_column: str):
+    """
+        Sets ``id_column`` of the rows of ``table`` that have a name but no
+        id yet, adding the missing names to the ``vocab`` table. Names are
+        matched exactly by vocabulary key; fuzzy matching is left to the
+        resolver used on write (database.vocab).
+
+        Args:
+            cursor: An open cursor; the caller commits.
+    """
+    key = VOCAB_KEY_SQL.format(f"t.{name_column}")
+    cursor.execute(f"""
+        INSERT INTO {vocab} (key, name)
+        SELECT DISTINCT ON ({key}) {key}, btrim(t.{name_column})
+        FROM {table} t
+        WHERE t.{id_column} IS NULL AND t.{name_column} IS NOT NULL AND {key} <> ''
+        ORDER BY {key}, t.{name_column}
+        ON CONFLICT (key) DO NOTHING
+    """)
+    cursor.execute(f"""
+        UPDATE {table} t SET {id_column} = v.id
+        FROM {vocab} v
+        WHERE t.{id_column} IS NULL AND v.key = {key}
+    """)
+
+
+def fill_catalog_ingredient_ids(cursor):
+    """
+        Sets ingredient_ids, the sorted ingredient vocabulary ids, of the
+        catalog remedies that have none yet.
+    """
+    key = VOCAB_KEY_SQL.format("e.name")
+    cursor.execute(f"""
+        INSERT INTO ingredient_vocab (key, name)
+        SELECT DISTINCT ON ({key}) {key}, btrim(e.name)
+        FROM remedy_catalog c, jsonb_array_elements_text(c.ingredients) AS e (name)
+        WHERE c.ingredient_ids IS NULL AND {key} <> ''
+        ORDER BY {key}, e.name
+        ON CONFLICT (key) DO NOTHING
+    """)
+    cursor.execute(f"""
+        UPDATE remedy_catalog c SET ingredient_ids = COALESCE((
+            SELECT array_agg(DISTINCT v.id ORDER BY v.id)
+            FROM jsonb_array_elements_text(c.ingredients) AS e (name)
+            JOIN ingredient_vocab v ON v.key = {key}
+        ), '{{}}')
+        WHERE c.ingredient_ids IS NULL
+    """)
+
+
+def backfill_vocab_ids(conn):
+    """
+        Builds the symptom and ingredient vocabularies from the names stored
+        before they existed and sets the id columns of kids_profile,
+        ingredients and remedy_catalog.
+    """
+    cursor = conn.cursor()
+    fill_vocab_ids(cursor, "symptom_vocab", "remedy_catalog", "symptom", "symptom_id")
+    fill_vocab_ids(cursor, "symptom_vocab", "kids_profile", "symptom_name", "symptom_id")
+    fill_vocab_ids(cursor, "ingredient_vocab", "ingredients", "ingredient_name", "ingredient_id")
+    fill_catalog_ingredient_ids(cursor)
+
+
+def insert_catalog_rows(cursor, rows):
+    """
+        Inserts remedies into remedy_catalog, skipping the ones already there,
+        and resolves the symptom and ingredient ids of the new ones.
+
+        Args:
+            cursor: An open cursor; the caller commits.
+            rows (list): (content_hash, symptom, ingredient_key, remedy_name,
+            steps, ingredients) tuples, steps and ingredients wrapped in FastJson.
+    """
+    if rows:
+        execute_values(cursor, """
+            INSERT INTO remedy_catalog (content_hash, symptom, ingredient_key, remedy_name, steps, ingredients)
+            VALUES %s
+            ON CONFLICT (content_hash) DO NOTHING
+        """, rows)
+        fill_vocab_ids(cursor, "symptom_vocab", "remedy_catalog", "symptom", "symptom_id")
+        fill_catalog_ingredient_ids(cursor)
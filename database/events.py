@@ -0,0 +1,181 @@
+"""
+Cross-process delivery of push events over Postgres LISTEN/NOTIFY.
+
+Remedy jobs may finish in any API worker or in a separate remedy_worker.py
+process, while the parent's WebSocket is open in one particular worker. So
+events are not handed to the local hub directly: publish() sends them as a
+NOTIFY on the EVENTS_CHANNEL inside the caller's transaction (they go out
+only if it commits), and every API worker runs an EventListener thread
+that receives them and passes them to its utils.event_hub.
+
+The payload is "<parent_id>:<event JSON>"; the JSON text is forwarded to
+the sockets as-is. NOTIFY payloads are limited to 8000 bytes, so a large
+event loses its result, its error is shortened and it is marked truncated;
+clients then fetch the job from GET /remedies/jobs/{job_id}. A NOTIFY that
+still fails is rolled back to a savepoint and logged, so it never rolls
+back the caller's transaction.
+
+The same listener carries household cache invalidations: writers call
+publish_invalidation() with the parent whose kids or pantry changed, and
+every process drops its cached contexts of that parent.
+"""
+import select
+import threading
+import time
+from typing import Optional
+
+import psycopg2
+import psycopg2.extensions
+
+from database import repository
+from database.database import DATABASE_URL
+from utils import json_codec
+from utils.event_hub import EventHub, event_hub
+from utils.household_cache import HouseholdContextCache, household_cache
+
+EVENTS_CHANNEL = "homecure_events"
+INVALIDATE_CHANNEL = "homecure_invalidate"
+MAX_PAYLOAD = 7900
+MAX_ERROR_LENGTH = 500
+
+
+def event_payload(parent_id: int, event: dict) -> str:
+    """Returns the NOTIFY payload of an event, truncated to fit MAX_PAYLOAD if needed."""
+    payload = f"{parent_id}:{json_codec.dumps(event)}"
+    if len(payload.encode("utf-8")) <= MAX_PAYLOAD:
+        return payload
+    event = {**event, "truncated": True}
+    if "result" in event:
+        event["result"] = None
+    if isinstance(event.get("error"), str) and len(event["error"]) > MAX_ERROR_LENGTH:
+        event["error"] = event["error"][:MAX_ERROR_LENGTH] + "..."
+    return f"{parent_id}:{json_codec.dumps(event)}"
+
+
+def publish(conn, parent_id: int, event: dict):
+    """
+        Queues an event for the parent's WebSocket connections in every
+        worker; it is sent when ``conn`` commits. An event that cannot be
+        sent is logged and dropped without affecting the transaction.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SAVEPOINT publish_event")
+        try:
+            repository.notify(conn, EVENTS_CHANNEL, event_payload(parent_id, event))
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT publish_event")
+            print(f"Dropped {event.get('type')} event for parent {parent_id}: {e}")
+        cursor.execute("RELEASE SAVEPOINT publish_event")
+    finally:
+        cursor.close()
+
+
+def publish_invalidation(conn, parent_id: int):
+    """
+        Queues the invalidation of a parent's cached household contexts in
+        every process; it is sent when ``conn`` commits.
+    """
+    repository.notify(conn, INVALIDATE_CHANNEL, str(parent_id))
+
+
+class EventListener:
+    """
+        Background thread LISTENing on the events channel with its own
+        connection, forwarding events to a hub and invalidations to a
+        household cache. It reconnects after connection errors, clearing
+        the cache since invalidations may have been missed meanwhile.
+
+        Args:
+            hub (EventHub): The hub of this worker.
+            cache (HouseholdContextCache): The household cache of this worker.
+            dsn (str): The database URL.
+            poll_timeout (float): How often the thread checks for stop(), in seconds.
+    """
+
+    def __init__(self, hub: EventHub, cache: HouseholdContextCache, dsn: str,
+                 poll_timeout: float = 1.0):
+        self.hub = hub
+        self.cache = cache
+        self.dsn = dsn
+        self.poll_timeout = poll_timeout
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.received = 0
+        self.invalidations = 0
+        self.reconnects = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="event-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_timeout * 2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except psycopg2.Error as e:
+                self.reconnects += 1
+                print(f"Event listener lost its connection: {e}")
+                self._stopped.wait(min(30, 2 ** min(self.reconnects, 5)))
+
+    def _listen(self):
+        conn = psycopg2.connect(self.dsn)
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {EVENTS_CHANNEL}")
+                cursor.execute(f"LISTEN {INVALIDATE_CHANNEL}")
+            if self.reconnects:
+                self.cache.clear()
+            while not self._stopped.is_set():
+                if select.select([conn], [], [], self.poll_timeout) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    if notify.channel == INVALIDATE_CHANNEL:
+                        self.invalidate(notify.payload)
+                    else:
+                        self.dispatch(notify.payload)
+        finally:
+            conn.close()
+
+    def dispatch(self, payload: str):
+        parent_id, _, text = payload.partition(":")
+        try:
+            parent_id = int(parent_id)
+        except ValueError:
+            print(f"Ignoring malformed event: {payload[:100]}")
+            return
+        self.received += 1
+        self.hub.publish(parent_id, text)
+
+    def invalidate(self, payload: str):
+        try:
+            parent_id = int(payload)
+        except ValueError:
+            print(f"Ignoring malformed invalidation: {payload[:100]}")
+            return
+        self.invalidations += 1
+        self.cache.invalidate(parent_id)
+
+    def stats(self) -> dict:
+        return {"running": self.running, "received": self.received,
+                "invalidations": self.invalidations, "reconnects": self.reconnects,
+                **self.hub.stats()}
+
+
+event_listener = EventListener(event_hub, household_cache, DATABASE_URL)
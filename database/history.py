@@ -0,0 +1,120 @@
+"""
+This module writes remedy history and shopping lists.
+
+Rows are handed to a write-behind queue so remedy responses return as soon
+as the remedy is known; the queue writes them in batches in the background
+and is started and drained by the application's lifespan hook.
+"""
+import os
+from datetime import datetime, timezone
+from typing import List
+
+from psycopg2.extras import execute_values
+
+from database.database import FastJson, get_db_connection, insert_catalog_rows
+from utils.remedy_keys import content_hash, ingredient_key
+from utils.shopping import parse_shopping_list
+from utils.tracing import traced
+from utils.write_behind import WriteBehindQueue
+
+history_writer = WriteBehindQueue(
+    get_db_connection,
+    flush_size=int(os.getenv("WRITE_BEHIND_FLUSH_SIZE", "200")),
+    flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.5")),
+    max_pending=int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000")),
+    put_timeout=float(os.getenv("WRITE_BEHIND_PUT_TIMEOUT", "0.05")),
+)
+
+
+def save_shopping_list(cursor, kid_id: int, parent_id: int, symptom: str, shopping_list: str):
+    """
+        Stores a shopping list suggested by an AI client together with its
+        parsed item rows. The caller commits.
+
+        Args:
+            cursor: An open cursor.
+            kid_id (int): The kid the list was suggested for.
+            parent_id (int): The kid's parent.
+            symptom (str): The symptom the list was suggested for.
+            shopping_list (str): The free-text list returned by the AI client.
+
+        Returns:
+            list: The normalized item names that were stored.
+    """
+    cursor.execute("""
+        INSERT INTO remedy_shopping_list (kid_id, parent_id, symptom, ingredients_to_buy)
+        VALUES (%s, %s, %s, %s)
+        RETURNING id
+    """, (kid_id, parent_id, symptom, FastJson(shopping_list)))
+    shopping_list_id = cursor.fetchone()["id"]
+
+    items = parse_shopping_list(shopping_list)
+    if items:
+        execute_values(cursor, """
+            INSERT INTO shopping_list_items (shopping_list_id, kid_id, parent_id, symptom, item_name)
+            VALUES %s
+            ON CONFLICT DO NOTHING
+        """, [(shopping_list_id, kid_id, parent_id, symptom, item) for item in items])
+    return items
+
+
+def _flush_remedy_history(cursor, rows: List[tuple]):
+    # New remedies are added to the catalog first (once per content hash),
+    # then every history row resolves its catalog id through the hash.
+    catalog_rows = {row[2]: row[4] for row in rows if row[4] is not None}
+    insert_catalog_rows(cursor, list(catalog_rows.values()))
+    execute_values(cursor, """
+        INSERT INTO remedy_history (kid_id, parent_id, catalog_id, ts)
+        SELECT v.kid_id, v.parent_id, c.id, v.ts
+        FROM (VALUES %s) AS v (kid_id, parent_id, content_hash, ts)
+        JOIN remedy_catalog c ON c.content_hash = v.content_hash
+    """, [row[:4] for row in rows])
+
+
+def _flush_shopping_lists(cursor, rows: List[tuple]):
+    # Each list needs its own id for the item rows, so lists are inserted
+    # one by one, but still in the batch's single transaction.
+    for row in rows:
+        save_shopping_list(cursor, *row)
+
+
+history_writer.register("remedy_history", _flush_remedy_history)
+history_writer.register("shopping_lists", _flush_shopping_lists)
+
+
+@traced("history")
+def record_remedy(kid_id: int, parent_id: int, symptom: str, remedy_name: str,
+                  steps: list, ingredients: list, catalog_hash: str = None):
+    """
+        Queues a remedy served to a kid for the remedy history.
+
+        Args:
+            kid_id (int): The kid the remedy was served to.
+            parent_id (int): The kid's parent.
+            symptom (str): The symptom the remedy is for.
+            remedy_name (str): The name of the remedy.
+            steps (list): The preparation steps.
+            ingredients (list): The pantry the remedy was generated for.
+            catalog_hash (str): The content hash of the remedy when it was
+            read from the catalog; new remedies are added to the catalog.
+    """
+    catalog_row = None
+    if catalog_hash is None:
+        catalog_hash = content_hash(symptom, ingredients, remedy_name, steps)
+        catalog_row = (catalog_hash, symptom, ingredient_key(ingredients), remedy_name,
+                       FastJson(steps or []), FastJson(list(ingredients)))
+    history_writer.submit("remedy_history", (
+        kid_id,
+        parent_id,
+        catalog_hash,
+        datetime.now(timezone.utc),
+        catalog_row,
+    ))
+
+
+@traced("history")
+def record_shopping_list(kid_id: int, parent_id: int, symptom: str, shopping_list: str):
+    """
+        Queues a shopping list suggested for a kid for insertion.
+    """
+    history_writer.submit("shopping_lists", (kid_id, parent_id, symptom, shopping_list))
@@ -3,7 +3,7 @@
 This module contains the Pydantic models used for handling user and kids profile data.
 It includes validation for user credentials, kids' health profiles, and ingredients availability.
 """
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 from pydantic import Field
 
@@ -55,4 +55,62 @@ class Ingredients(BaseModel):
     ingredient_name: str
     is_available :bool
 
+class RemedyJobRequest(BaseModel):
+    """
+        Model for queueing a remedy generation.
+        The provider is used only when neither a curated rule nor the
+        remedy catalog has a remedy for the kid.
+    """
+    kid_id: int
+    provider: Literal["openai", "gemini", "groq"] = "openai"
+
+class PantrySync(BaseModel):
+    """
+        Model for a full pantry sync.
+        This model carries the complete pantry state of the client; anything
+        stored for the parent but missing here is removed.
+    """
+    ingredients: List[Ingredients]
+
+# Response models of the list endpoints. Every field is optional because the
+# endpoints support field projection; unset fields are left out of the response.
+class KidProfileOut(BaseModel):
+    """
+        Model for a kids' profile in list responses.
+    """
+    id: Optional[int] = None
+    name: Optional[str] = None
+    age: Optional[int] = None
+    height: Optional[float] = None
+    weight: Optional[float] = None
+    allergies: Optional[str] = None
+    symptom: Optional[str] = None
 
+class KidSummary(BaseModel):
+    """
+        Model for a kid in lookups that only need to identify the kid.
+    """
+    id: int
+    name: str
+
+class IngredientOut(BaseModel):
+    """
+        Model for an ingredient in list responses.
+    """
+    ingredients_name: Optional[str] = None
+    is_available: Optional[bool] = None
+
+class ShoppingItemOut(BaseModel):
+    """
+        Model for an aggregated shopping list item.
+    """
+    item_name: Optional[str] = None
+    request_count: Optional[int] = None
+    kid_ids: Optional[List[int]] = None
+    symptoms: Optional[List[str]] = None
+
+class ShoppingListPage(BaseModel):
+    """
+        Model for a page of the aggregated shopping list.
+    """
+    shopping_list: List[ShoppingItemOut]
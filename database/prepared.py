@@ -0,0 +1,83 @@
+"""
+Server-side prepared statements.
+
+A PreparedQuery is a named statement with ``%s`` placeholders. The first
+time it runs on a connection it is sent as ``PREPARE name AS ...`` and the
+connection remembers the name; every later run is a short
+``EXECUTE name(...)``, so PostgreSQL skips parsing and, after a few
+executions, planning too. Prepared statements outlive transactions and
+live as long as the connection, which the pool keeps open.
+
+Set DB_PREPARED_STATEMENTS=0 behind a transaction-pooling proxy (such as
+PgBouncer in transaction mode), where the next statement may reach a
+different server connection.
+"""
+import os
+import re
+from typing import Sequence
+
+from database.query_log import register_prepared
+
+PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "1") != "0"
+
+_PLACEHOLDER = re.compile(r"%%|%s|%\(")
+_NAME = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+class PreparedQuery:
+    """
+        A named statement with positional ``%s`` placeholders.
+
+        Args:
+            name (str): Statement name, unique in the process.
+            sql (str): The statement, as it would be passed to cursor.execute.
+
+        Raises:
+            ValueError: If the name is not a plain identifier or the statement
+            uses named ``%(name)s`` placeholders.
+    """
+    __slots__ = ("name", "sql", "arity", "prepare_sql", "execute_sql")
+
+    def __init__(self, name: str, sql: str):
+        if not _NAME.match(name):
+            raise ValueError(f"Invalid statement name: {name!r}")
+        self.name = name
+        self.sql = sql
+        self.arity = 0
+
+        def number(match):
+            token = match.group(0)
+            if token == "%%":
+                return "%"
+            if token == "%(":
+                raise ValueError(f"Statement {name} must use positional %s placeholders")
+            self.arity += 1
+            return f"${self.arity}"
+
+        body = _PLACEHOLDER.sub(number, sql)
+        self.prepare_sql = f"PREPARE {name} AS {body}"
+        args = ", ".join(["%s"] * self.arity)
+        self.execute_sql = f"EXECUTE {name}({args})" if self.arity else f"EXECUTE {name}"
+        register_prepared(name, sql)
+
+    def __repr__(self):
+        return f"PreparedQuery({self.name!r})"
+
+
+def run(cursor, query: PreparedQuery, params: Sequence = ()):
+    """
+        Executes ``query`` on ``cursor``, preparing it first if its connection
+        has not seen it yet.
+
+        The connection tracks its prepared names in a ``prepared`` set; a
+        connection without one (or with DB_PREPARED_STATEMENTS=0) runs the
+        plain statement.
+    """
+    prepared = getattr(cursor.connection, "prepared", None)
+    if not PREPARED_STATEMENTS or prepared is None:
+        cursor.execute(query.sql, params)
+        return
+    if query.name not in prepared:
+        cursor.execute(query.prepare_sql)
+        prepared.add(query.name)
+    cursor.execute(query.execute_sql, params)
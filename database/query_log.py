@@ -0,0 +1,142 @@
+"""
+Per-statement timing and the slow-query log.
+
+Every statement run through a database.database cursor is timed here.
+Statements slower than DB_SLOW_QUERY_MS are logged with the route that ran
+them, and for a DB_EXPLAIN_SAMPLE_RATE fraction of the slow read-only
+statements the cursor also captures an EXPLAIN (ANALYZE, BUFFERS) plan.
+That includes the ``EXECUTE`` of prepared statements (database.prepared)
+registered as read-only with register_prepared.
+The most recent slow statements are kept in memory for /metrics/slow_queries.
+"""
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+_request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+# EXPLAIN ANALYZE runs the statement again, so only plain reads are explained
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|FOR\s+SHARE|FOR\s+KEY\s+SHARE)\b", re.IGNORECASE)
+_READS = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_EXECUTE = re.compile(r"^\s*EXECUTE\s+(\w+)", re.IGNORECASE)
+# Names of the prepared statements whose body is a plain read
+_read_only_prepared = set()
+
+
+def bind_request(scope: dict):
+    """
+        Tags the statements of the current request with its route. Returns a
+        token for reset_request().
+    """
+    return _request_scope.set(scope)
+
+
+def reset_request(token):
+    _request_scope.reset(token)
+
+
+def current_route() -> Optional[str]:
+    """Returns the route template of the current request, or its path before routing."""
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path")
+
+
+def register_prepared(name: str, statement: str):
+    """Records the name of a prepared statement, so its EXECUTE is explainable if the body is."""
+    if is_explainable(statement):
+        _read_only_prepared.add(name.lower())
+
+
+def is_explainable(statement: str) -> bool:
+    """Returns True for read-only statements that are safe to run again under EXPLAIN ANALYZE."""
+    execute = _EXECUTE.match(statement)
+    if execute:
+        return execute.group(1).lower() in _read_only_prepared
+    return bool(_READS.match(statement)) and not _WRITES.search(statement)
+
+
+class QueryLog:
+    """
+        Statement counters and a ring buffer of slow statements.
+
+        Args:
+            slow_threshold (float): Duration above which a statement is slow, in seconds.
+            explain_sample_rate (float): Fraction of slow reads whose plan is captured.
+            max_entries (int): Number of slow statements kept.
+    """
+
+    def __init__(self, slow_threshold: float = 0.2, explain_sample_rate: float = 0.1,
+                 max_entries: int = 200):
+        self.slow_threshold = slow_threshold
+        self.explain_sample_rate = explain_sample_rate
+        self._slow = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.slow_statements = 0
+        self.total_time = 0.0
+
+    @classmethod
+    def from_env(cls) -> "QueryLog":
+        """Builds the log from DB_SLOW_QUERY_MS and DB_EXPLAIN_SAMPLE_RATE."""
+        return cls(slow_threshold=float(os.getenv("DB_SLOW_QUERY_MS", "200")) / 1000,
+                   explain_sample_rate=float(os.getenv("DB_EXPLAIN_SAMPLE_RATE", "0.1")))
+
+    def record(self, statement: str, elapsed: float,
+               explain: Optional[Callable[[], Optional[str]]] = None) -> Optional[dict]:
+        """
+            Records one statement.
+
+            Args:
+                statement (str): The statement text.
+                elapsed (float): Its duration, in seconds.
+                explain (callable): Returns the statement's plan, or None if
+                it cannot be captured; called only for sampled slow statements.
+
+            Returns:
+                dict: The slow-query entry, or None if the statement was fast.
+        """
+        with self._lock:
+            self.statements += 1
+            self.total_time += elapsed
+            if elapsed < self.slow_threshold:
+                return None
+            self.slow_statements += 1
+
+        entry = {
+            "at": time.time(),
+            "route": current_route(),
+            "duration_ms": round(elapsed * 1000, 1),
+            "statement": statement,
+        }
+        if explain is not None and random.random() < self.explain_sample_rate:
+            plan = explain()
+            if plan is not None:
+                entry["plan"] = plan
+        self._slow.append(entry)
+        print(f"Slow query ({entry['duration_ms']} ms, route {entry['route']}): {statement}")
+        return entry
+
+    def slow_queries(self) -> List[dict]:
+        """Returns the recent slow statements, newest first."""
+        return list(reversed(self._slow))
+
+    def stats(self) -> dict:
+        """Returns statement counts and the average duration."""
+        return {
+            "statements": self.statements,
+            "slow_statements": self.slow_statements,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "explain_sample_rate": self.explain_sample_rate,
+            "avg_ms": round(self.total_time / self.statements * 1000, 3) if self.statements else 0.0,
+        }
+
+
+query_log = QueryLog.from_env()
@@ -0,0 +1,57 @@
+"""
+This module loads everything a remedy route needs to know about a kid
+(symptom, age, allergies and the parent's available pantry) in a single
+SQL statement.
+"""
+from typing import List, NamedTuple, Optional, Tuple
+
+from database import repository
+from database.database import get_db_connection
+from utils.allergens import filter_ingredients
+
+
+class RemedyContext(NamedTuple):
+    """
+        Immutable snapshot of the inputs of a remedy request.
+    """
+    kid_id: int
+    parent_id: int
+    symptom: Optional[str]
+    age: int
+    allergies: Tuple[str, ...]
+    pantry: Tuple[str, ...]
+
+    @property
+    def safe_pantry(self) -> List[str]:
+        """The pantry without the ingredients the kid is allergic to."""
+        return filter_ingredients(self.pantry, self.allergies)
+
+
+def load_remedy_context(kid_id: int, parent_id: int) -> Optional[RemedyContext]:
+    """
+        Fetches the symptom, age, allergies and available pantry for a kid
+        in one round trip.
+
+        Args:
+            kid_id (int): The kid the remedy is for.
+            parent_id (int): The authenticated parent; the kid must belong to them.
+
+        Returns:
+            RemedyContext: The remedy inputs, or None if the kid does not
+            belong to the parent.
+    """
+    conn = get_db_connection()
+    try:
+        row = repository.get_remedy_context(conn, kid_id, parent_id)
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return RemedyContext(
+        kid_id=kid_id,
+        parent_id=parent_id,
+        symptom=row.symptom_name,
+        age=row.age,
+        allergies=tuple(row.allergy_terms),
+        pantry=tuple(row.pantry),
+    )
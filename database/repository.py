@@ -0,0 +1,376 @@
+"""
+Queries of the hot request paths and of the remedy job queue.
+
+Every statement here is a fixed-shape PreparedQuery run as a server-side
+prepared statement (database.prepared), and rows are read from a tuple
+cursor into NamedTuples or plain values instead of building a dict per row.
+Functions take an open connection and leave committing to the caller, so
+a route can combine several of them in one transaction.
+
+The catalog scan of the remedy index streams through a server-side
+cursor instead, which cannot run a prepared statement. Statements whose
+shape depends on the request (field projection in the list endpoints,
+the partial kid update) are still built in their routers,
+schema setup lives in database.database and the batched history writes
+in database.history.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from database.database import TracedTupleCursor
+from database.prepared import PreparedQuery, run
+
+
+class UserRow(NamedTuple):
+    id: int
+    username: str
+    password: str
+
+
+class RemedyJobRow(NamedTuple):
+    id: int
+    parent_id: int
+    kid_id: int
+    provider: str
+
+
+class RemedyContextRow(NamedTuple):
+    symptom_name: Optional[str]
+    age: int
+    allergy_terms: List[str]
+    pantry: List[str]
+
+
+USER_BY_USERNAME = PreparedQuery("user_by_username", """
+    SELECT id, username, password FROM users WHERE username = %s
+""")
+INSERT_USER = PreparedQuery("insert_user", """
+    INSERT INTO users (username, password) VALUES (%s, %s)
+""")
+REMEDY_CONTEXT = PreparedQuery("remedy_context", """
+    WITH pantry AS (
+        SELECT COALESCE(array_agg(ingredient_name ORDER BY id), '{}') AS ingredients
+        FROM ingredients
+        WHERE parent_id = %s AND is_available = true
+    )
+    SELECT k.symptom_name, k.age, k.allergy_terms, pantry.ingredients
+    FROM kids_profile k
+    CROSS JOIN pantry
+    WHERE k.id = %s AND k.parent_id = %s
+""")
+CATALOG_REMEDY = PreparedQuery("catalog_remedy", """
+    SELECT content_hash, remedy_name, steps, symptom, ingredients
+    FROM remedy_catalog
+    WHERE symptom = %s AND ingredient_key = %s
+    LIMIT 1
+""")
+CATALOG_COLUMNS = ("content_hash", "remedy_name", "steps", "symptom", "ingredients")
+CATALOG_REMEDY_BY_ID = PreparedQuery("catalog_remedy_by_id", """
+    SELECT content_hash, remedy_name, steps, symptom, ingredients
+    FROM remedy_catalog
+    WHERE id = %s
+""")
+MAX_CATALOG_ID = PreparedQuery("max_catalog_id", """
+    SELECT COALESCE(max(id), 0) FROM remedy_catalog
+""")
+CATALOG_INGREDIENTS = PreparedQuery("catalog_ingredients", """
+    SELECT v.id, v.key
+    FROM (
+        SELECT i, count(*) AS uses
+        FROM remedy_catalog c, unnest(c.ingredient_ids) AS i
+        WHERE c.id > %s AND c.id <= %s
+        GROUP BY i
+    ) f
+    JOIN ingredient_vocab v ON v.id = f.i
+    ORDER BY f.uses DESC, v.id
+""")
+CATALOG_INDEX_ROWS_SQL = """
+    SELECT c.id, s.key, c.ingredient_ids
+    FROM remedy_catalog c
+    JOIN symptom_vocab s ON s.id = c.symptom_id
+    WHERE c.id > %s AND c.id <= %s AND c.ingredient_ids IS NOT NULL
+    ORDER BY c.id
+"""
+KID_OF_PARENT = PreparedQuery("kid_of_parent", """
+    SELECT 1 FROM kids_profile WHERE id = %s AND parent_id = %s
+""")
+UPDATE_KID_SYMPTOM = PreparedQuery("update_kid_symptom", """
+    UPDATE kids_profile SET symptom_name = %s, symptom_id = %s WHERE id = %s
+""")
+KIDS_ALLERGIC_TO = PreparedQuery("kids_allergic_to", """
+    SELECT id, name FROM kids_profile
+    WHERE parent_id = %s AND allergy_terms @> ARRAY[%s]::text[]
+    ORDER BY id
+""")
+UPSERT_INGREDIENT = PreparedQuery("upsert_ingredient", """
+    INSERT INTO ingredients (ingredient_name, is_available, parent_id, ingredient_id)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (parent_id, ingredient_name)
+    DO UPDATE SET is_available = EXCLUDED.is_available, ingredient_id = EXCLUDED.ingredient_id
+""")
+SET_INGREDIENT_AVAILABILITY = PreparedQuery("set_ingredient_availability", """
+    UPDATE ingredients SET is_available = %s
+    WHERE ingredient_name = %s AND parent_id = %s
+    RETURNING id
+""")
+LOCK_PANTRY = PreparedQuery("lock_pantry", """
+    SELECT ingredient_name, is_available FROM ingredients WHERE parent_id = %s FOR UPDATE
+""")
+DELETE_INGREDIENTS = PreparedQuery("delete_ingredients", """
+    DELETE FROM ingredients WHERE parent_id = %s AND ingredient_name = ANY(%s)
+""")
+ENQUEUE_REMEDY_JOB = PreparedQuery("enqueue_remedy_job", """
+    INSERT INTO remedy_jobs (parent_id, kid_id, provider) VALUES (%s, %s, %s) RETURNING id
+""")
+CLAIM_REMEDY_JOB = PreparedQuery("claim_remedy_job", """
+    UPDATE remedy_jobs
+    SET status = 'running', started_at = now(), attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM remedy_jobs
+        WHERE status = 'queued'
+        ORDER BY id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, parent_id, kid_id, provider
+""")
+FINISH_REMEDY_JOB = PreparedQuery("finish_remedy_job", """
+    UPDATE remedy_jobs SET status = %s, result = %s, error = %s, finished_at = now()
+    WHERE id = %s
+""")
+REQUEUE_STALE_REMEDY_JOBS = PreparedQuery("requeue_stale_remedy_jobs", """
+    UPDATE remedy_jobs
+    SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'queued' END,
+        error = 'Worker stopped while generating the remedy',
+        finished_at = CASE WHEN attempts >= %s THEN now() END
+    WHERE status = 'running' AND started_at < now() - make_interval(secs => %s)
+""")
+REMEDY_JOB = PreparedQuery("remedy_job", """
+    SELECT id, kid_id, provider, status, result, error, created_at, finished_at
+    FROM remedy_jobs WHERE id = %s AND parent_id = %s
+""")
+REMEDY_JOB_COLUMNS = ("job_id", "kid_id", "provider", "status", "result", "error",
+                      "created_at", "finished_at")
+KNOWN_SYMPTOMS = PreparedQuery("known_symptoms", """
+    SELECT symptom FROM (
+        SELECT symptom, 0 AS source, count(*) AS uses FROM remedy_catalog GROUP BY symptom
+        UNION ALL
+        SELECT symptom_name, 1, count(*) FROM kids_profile
+        WHERE symptom_name IS NOT NULL GROUP BY symptom_name
+    ) known
+    ORDER BY source, uses DESC
+""")
+
+
+class VocabQueries(NamedTuple):
+    by_key: PreparedQuery
+    by_keys: PreparedQuery
+    similar: PreparedQuery
+    insert: PreparedQuery
+
+
+def _vocab_queries(vocab: str) -> VocabQueries:
+    # key %% ... uses the trigram index (pg_trgm.similarity_threshold, 0.3 by
+    # default); the stricter threshold of the resolver is applied on top
+    return VocabQueries(
+        by_key=PreparedQuery(f"{vocab}_by_key", f"SELECT id, name FROM {vocab} WHERE key = %s"),
+        by_keys=PreparedQuery(f"{vocab}_by_keys",
+                              f"SELECT key, id, name FROM {vocab} WHERE key = ANY(%s)"),
+        similar=PreparedQuery(f"{vocab}_similar", f"""
+            SELECT id, name, key FROM {vocab}
+            WHERE key %% %s AND similarity(key, %s) >= %s
+            ORDER BY similarity(key, %s) DESC, id
+            LIMIT 5
+        """),
+        insert=PreparedQuery(f"{vocab}_insert", f"""
+            INSERT INTO {vocab} (key, name) VALUES (%s, %s)
+            ON CONFLICT (key) DO UPDATE SET key = EXCLUDED.key
+            RETURNING id, name
+        """),
+    )
+
+
+VOCAB_QUERIES = {vocab: _vocab_queries(vocab) for vocab in ("symptom_vocab", "ingredient_vocab")}
+NOTIFY = PreparedQuery("notify", """
+    SELECT pg_notify(%s, %s)
+""")
+
+
+def _fetchone(conn, query: PreparedQuery, params: Sequence) -> Optional[tuple]:
+    with conn.cursor(cursor_factory=TracedTupleCursor) as cursor:
+        run(cursor, query, params)
+        return cursor.fetchone()
+
+
+def _fetchall(conn, query: PreparedQuery, params: Sequence) -> List[tuple]:
+    with conn.cursor(cursor_factory=TracedTupleCursor) as cursor:
+        run(cursor, query, params)
+        return cursor.fetchall()
+
+
+def _execute(conn, query: PreparedQuery, params: Sequence):
+    with conn.cursor(cursor_factory=TracedTupleCursor) as cursor:
+        run(cursor, query, params)
+
+
+def get_user(conn, username: str) -> Optional[UserRow]:
+    """Returns the user with this username, or None."""
+    row = _fetchone(conn, USER_BY_USERNAME, (username,))
+    return UserRow(*row) if row else None
+
+
+def create_user(conn, username: str, hashed_password: str):
+    _execute(conn, INSERT_USER, (username, hashed_password))
+
+
+def get_remedy_context(conn, kid_id: int, parent_id: int) -> Optional[RemedyContextRow]:
+    """
+        Returns the symptom, age, allergy terms and available pantry of a kid
+        in one round trip, or None if the kid does not belong to the parent.
+    """
+    row = _fetchone(conn, REMEDY_CONTEXT, (parent_id, kid_id, parent_id))
+    return RemedyContextRow(*row) if row else None
+
+
+def find_catalog_remedy(conn, symptom: str, ingredient_key: str) -> Optional[dict]:
+    """
+        Returns the catalog remedy of a symptom and an ingredient key as a
+        dict of CATALOG_COLUMNS, or None.
+    """
+    row = _fetchone(conn, CATALOG_REMEDY, (symptom, ingredient_key))
+    return dict(zip(CATALOG_COLUMNS, row)) if row else None
+
+
+def catalog_remedy_by_id(conn, catalog_id: int) -> Optional[dict]:
+    """Returns a catalog remedy as a dict of CATALOG_COLUMNS, or None."""
+    row = _fetchone(conn, CATALOG_REMEDY_BY_ID, (catalog_id,))
+    return dict(zip(CATALOG_COLUMNS, row)) if row else None
+
+
+def max_catalog_id(conn) -> int:
+    return _fetchone(conn, MAX_CATALOG_ID, ())[0]
+
+
+def catalog_ingredients(conn, after_id: int, upper_id: int) -> List[Tuple[int, str]]:
+    """
+        Returns the (id, vocabulary key) of the ingredients of the catalog
+        remedies with ids in (after_id, upper_id], most used first.
+    """
+    return _fetchall(conn, CATALOG_INGREDIENTS, (after_id, upper_id))
+
+
+def iter_catalog_index_rows(conn, after_id: int, upper_id: int, batch_size: int = 10_000):
+    """
+        Yields the (id, symptom key, ingredient ids) of the catalog remedies
+        with ids in (after_id, upper_id] by id, fetched ``batch_size`` rows
+        at a time through a server-side cursor.
+    """
+    with conn.cursor(name="remedy_index_scan", cursor_factory=TracedTupleCursor) as cursor:
+        cursor.itersize = batch_size
+        cursor.execute(CATALOG_INDEX_ROWS_SQL, (after_id, upper_id))
+        yield from cursor
+
+
+def kid_belongs_to(conn, kid_id: int, parent_id: int) -> bool:
+    return _fetchone(conn, KID_OF_PARENT, (kid_id, parent_id)) is not None
+
+
+def set_kid_symptom(conn, kid_id: int, symptom_name: str, symptom_id: Optional[int]):
+    _execute(conn, UPDATE_KID_SYMPTOM, (symptom_name, symptom_id, kid_id))
+
+
+def kids_allergic_to(conn, parent_id: int, term: str) -> List[Tuple[int, str]]:
+    """Returns the (id, name) of the parent's kids whose allergy terms contain ``term``."""
+    return _fetchall(conn, KIDS_ALLERGIC_TO, (parent_id, term))
+
+
+def upsert_ingredient(conn, parent_id: int, ingredient_name: str, is_available: bool,
+                      ingredient_id: Optional[int]):
+    _execute(conn, UPSERT_INGREDIENT, (ingredient_name, is_available, parent_id, ingredient_id))
+
+
+def set_ingredient_availability(conn, parent_id: int, ingredient_name: str,
+                                is_available: bool) -> bool:
+    """Returns False if the parent has no such ingredient."""
+    row = _fetchone(conn, SET_INGREDIENT_AVAILABILITY, (is_available, ingredient_name, parent_id))
+    return row is not None
+
+
+def lock_pantry(conn, parent_id: int) -> Dict[str, bool]:
+    """
+        Locks the parent's ingredient rows until the end of the transaction
+        and returns their availability by name.
+    """
+    return dict(_fetchall(conn, LOCK_PANTRY, (parent_id,)))
+
+
+def delete_ingredients(conn, parent_id: int, ingredient_names: List[str]):
+    _execute(conn, DELETE_INGREDIENTS, (parent_id, ingredient_names))
+
+
+def enqueue_remedy_job(conn, parent_id: int, kid_id: int, provider: str) -> int:
+    """Queues a remedy generation and returns the job id."""
+    return _fetchone(conn, ENQUEUE_REMEDY_JOB, (parent_id, kid_id, provider))[0]
+
+
+def claim_remedy_job(conn) -> Optional[RemedyJobRow]:
+    """
+        Marks the oldest queued job as running and returns it, or None if the
+        queue is empty. Jobs locked by other workers are skipped, not waited on.
+    """
+    row = _fetchone(conn, CLAIM_REMEDY_JOB, ())
+    return RemedyJobRow(*row) if row else None
+
+
+def finish_remedy_job(conn, job_id: int, status: str, result=None, error: Optional[str] = None):
+    """Stores the outcome of a job; ``result`` must already be JSON-adapted."""
+    _execute(conn, FINISH_REMEDY_JOB, (status, result, error, job_id))
+
+
+def requeue_stale_remedy_jobs(conn, stale_after: float, max_attempts: int) -> int:
+    """
+        Puts jobs left running for more than ``stale_after`` seconds (their
+        worker died) back in the queue, or fails them after ``max_attempts``.
+
+        Returns:
+            int: The number of jobs requeued or failed.
+    """
+    with conn.cursor(cursor_factory=TracedTupleCursor) as cursor:
+        run(cursor, REQUEUE_STALE_REMEDY_JOBS, (max_attempts, max_attempts, stale_after))
+        return cursor.rowcount
+
+
+def get_remedy_job(conn, job_id: int, parent_id: int) -> Optional[dict]:
+    """Returns a job of the parent as a dict of REMEDY_JOB_COLUMNS, or None."""
+    row = _fetchone(conn, REMEDY_JOB, (job_id, parent_id))
+    return dict(zip(REMEDY_JOB_COLUMNS, row)) if row else None
+
+
+def notify(conn, channel: str, payload: str):
+    """Sends a NOTIFY, delivered to the listeners when the transaction commits."""
+    _execute(conn, NOTIFY, (channel, payload))
+
+
+def known_symptoms(conn) -> List[str]:
+    """Returns the stored symptoms, catalog spellings first, most used first."""
+    return [row[0] for row in _fetchall(conn, KNOWN_SYMPTOMS, ())]
+
+
+def vocab_by_key(conn, vocab: str, key: str) -> Optional[Tuple[int, str]]:
+    """Returns the (id, name) of a vocabulary key, or None."""
+    return _fetchone(conn, VOCAB_QUERIES[vocab].by_key, (key,))
+
+
+def vocab_by_keys(conn, vocab: str, keys: List[str]) -> Dict[str, Tuple[int, str]]:
+    """Returns the (id, name) of the known keys among ``keys``, by key."""
+    return {key: (vocab_id, name)
+            for key, vocab_id, name in _fetchall(conn, VOCAB_QUERIES[vocab].by_keys, (keys,))}
+
+
+def vocab_similar(conn, vocab: str, key: str, threshold: float) -> List[Tuple[int, str, str]]:
+    """Returns the (id, name, key) of the five most similar keys by trigram similarity."""
+    return _fetchall(conn, VOCAB_QUERIES[vocab].similar, (key, key, threshold, key))
+
+
+def vocab_insert(conn, vocab: str, key: str, name: str) -> Tuple[int, str]:
+    """Adds a key, or returns the existing entry if another writer added it first."""
+    return _fetchone(conn, VOCAB_QUERIES[vocab].insert, (key, name))
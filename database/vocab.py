@@ -0,0 +1,152 @@
+"""
+Symptom and ingredient vocabularies: every distinct name gets one integer
+id, stored next to the free-text name in kids_profile, ingredients and
+remedy_catalog.
+
+Names are resolved when they are written. A name is first looked up by its
+key (utils.remedy_keys.vocab_key), so "Ginger  root" and "ginger root" are
+one entry. A new ingredient key is then compared by pg_trgm similarity
+with the known ones, and the closest candidates are only accepted with the
+same words up to one typo per word (utils.minhash.same_words), so
+"parupu" resolves to "paruppu" but "peanut oil" does not resolve to
+"peanut". Symptoms are matched by utils.symptom_index before they get
+here, so their vocabulary only matches keys exactly. Only names that match
+nothing are added.
+
+VOCAB_MATCH_THRESHOLD (default 0.6) is the minimum trigram similarity of a
+candidate. The trigram index only returns keys above
+pg_trgm.similarity_threshold (0.3 by default), so lower values have no
+effect.
+"""
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from database import repository
+from utils.minhash import same_words, words
+from utils.remedy_keys import vocab_key
+
+
+class Vocabulary:
+    """
+        Resolves names to (id, name) entries of a vocabulary table. Resolved
+        keys are cached in the process once their entry is committed; entries
+        are never renamed or removed, so the cache is never stale.
+
+        Args:
+            table (str): symptom_vocab or ingredient_vocab.
+            threshold (float): Minimum trigram similarity of a fuzzy match.
+            max_cached (int): Keys cached before the cache is cleared.
+            fuzzy (bool): Whether keys without an exact match are matched
+            by similarity.
+    """
+
+    def __init__(self, table: str, threshold: float = 0.6, max_cached: int = 10_000,
+                 fuzzy: bool = True):
+        self.table = table
+        self.threshold = threshold
+        self.fuzzy = fuzzy
+        self.max_cached = max_cached
+        self._cache: Dict[str, Tuple[int, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.exact_matches = 0
+        self.fuzzy_matches = 0
+        self.created = 0
+
+    def _remember(self, key: str, entry: Tuple[int, str]) -> Tuple[int, str]:
+        with self._lock:
+            if len(self._cache) >= self.max_cached:
+                self._cache.clear()
+            self._cache[key] = entry
+        return entry
+
+    def _resolve_key(self, conn, key: str, name: str, create: bool) -> Optional[Tuple[int, str]]:
+        entry = repository.vocab_by_key(conn, self.table, key)
+        if entry is not None:
+            self.exact_matches += 1
+            return self._remember(key, tuple(entry))
+        if self.fuzzy:
+            key_words = words(key)
+            for entry_id, entry_name, entry_key in repository.vocab_similar(
+                    conn, self.table, key, self.threshold):
+                if same_words(key_words, words(entry_key)):
+                    self.fuzzy_matches += 1
+                    return self._remember(key, (entry_id, entry_name))
+        if not create:
+            return None
+        # Not cached: the caller's transaction may still roll the insert back
+        self.created += 1
+        return tuple(repository.vocab_insert(conn, self.table, key, name))
+
+    def resolve(self, conn, name: str, create: bool = True) -> Optional[Tuple[int, str]]:
+        """
+            Resolves a name to its vocabulary entry.
+
+            Args:
+                conn: An open connection; new entries are committed with it.
+                name (str): The name as written by the client.
+                create (bool): Whether to add the name if nothing matches.
+
+            Returns:
+                tuple: The (id, name) of the entry, name being the spelling it
+                was first stored with, or None if nothing matches and
+                ``create`` is False or the name is blank.
+        """
+        key = vocab_key(name)
+        if not key:
+            return None
+        entry = self._cache.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        return self._resolve_key(conn, key, " ".join(name.split()), create)
+
+    def resolve_many(self, conn, names: Iterable[str],
+                     create: bool = True) -> Dict[str, Tuple[int, str]]:
+        """
+            Resolves several names, looking up the uncached keys in one query
+            and only trying fuzzy matches for the keys not found.
+
+            Returns:
+                dict: The (id, name) entry of each resolved name, by name.
+        """
+        keys = {name: vocab_key(name) for name in names}
+        resolved: Dict[str, Tuple[int, str]] = {}
+        missing = set()
+        for name, key in keys.items():
+            entry = self._cache.get(key) if key else None
+            if entry is not None:
+                self.hits += 1
+                resolved[name] = entry
+            elif key:
+                missing.add(key)
+
+        found = repository.vocab_by_keys(conn, self.table, sorted(missing)) if missing else {}
+        self.exact_matches += len(found)
+        for key, entry in found.items():
+            self._remember(key, entry)
+        for name, key in keys.items():
+            if name in resolved or not key:
+                continue
+            entry = found.get(key) or self._cache.get(key)
+            if entry is None:
+                entry = self._resolve_key(conn, key, " ".join(name.split()), create)
+            if entry is not None:
+                resolved[name] = entry
+        return resolved
+
+    def stats(self) -> dict:
+        return {
+            "cached": len(self._cache),
+            "threshold": self.threshold if self.fuzzy else None,
+            "hits": self.hits,
+            "exact_matches": self.exact_matches,
+            "fuzzy_matches": self.fuzzy_matches,
+            "created": self.created,
+        }
+
+
+_THRESHOLD = float(os.getenv("VOCAB_MATCH_THRESHOLD", "0.6"))
+symptom_vocab = Vocabulary("symptom_vocab", fuzzy=False)
+ingredient_vocab = Vocabulary("ingredient_vocab", _THRESHOLD)
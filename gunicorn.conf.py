@@ -0,0 +1,48 @@
+"""
+Gunicorn configuration for running the API with several worker processes.
+
+Usage:
+    gunicorn -c gunicorn.conf.py
+
+The application is imported once in the master (preload_app) and the
+master initializes the database and loads the local remedy rules and the
+symptom index before forking, so workers share that memory copy-on-write
+and init_db and its migrations run exactly once. Each worker then opens its own database
+connections and provider HTTP clients: the pools and clients reset
+themselves in the child after fork (see database.database and ai_clients).
+
+Settings are read from the environment (and .env, loaded on import):
+    BIND                 address to listen on (default 0.0.0.0:8000)
+    WEB_CONCURRENCY      number of workers (default: number of CPUs)
+    GUNICORN_TIMEOUT     worker timeout in seconds (default 120)
+
+Admission limits (REMEDY_MAX_CONCURRENCY, ...) and DB_POOL_SIZE apply per
+worker.
+"""
+import multiprocessing
+import os
+
+wsgi_app = "main:app"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+
+
+def on_starting(server):
+    """Initializes shared state in the master, before any worker is forked."""
+    from database.database import DB_READY_ENV, close_pool, init_db
+    from utils.remedy_index import load_remedy_index
+    from utils.remedy_rules import local_remedies
+    from utils.symptom_index import load_symptom_index
+
+    init_db()
+    local_remedies.load()
+    load_symptom_index()
+    load_remedy_index()
+    # Workers must not inherit open database sockets
+    close_pool()
+    os.environ[DB_READY_ENV] = "1"
+    server.log.info("Database initialized, remedy rules and symptoms loaded in the master.")
@@ -5,14 +5,27 @@ such as the lifespan of the application and session middleware.
 It also initializes the database on startup and includes the API routes from
 the 'routes.py' module.
 """
+import asyncio
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
 from starlette.middleware.sessions import SessionMiddleware
 
 from starlette.requests import Request
 from config import templates
-from database.database import init_db
-from routers import kids, ingredients, symptoms, authorisation, remedies, shoppinglists
+from database.database import DB_READY_ENV, init_db
+from database.events import event_listener
+from database.history import history_writer
+from database.query_log import bind_request, reset_request
+from utils import json_codec, tracing
+from utils.event_hub import event_hub
+from utils.loop_monitor import LOOP_MONITOR_ENABLED, loop_monitor
+from utils.remedy_index import load_remedy_index, remedy_index
+from utils.remedy_jobs import remedy_workers
+from utils.remedy_rules import local_remedies
+from utils.symptom_index import load_symptom_index, symptom_index
+from routers import kids, ingredients, symptoms, authorisation, remedies, shoppinglists, metrics, debug, events
 from fastapi.staticfiles import StaticFiles
 
 @asynccontextmanager
@@ -22,18 +35,44 @@ async def lifespan(app: FastAPI):
         on startup and cleaning up on shutdown.
 
         During the lifespan, the database is initialized (tables are created if
-        they do not exist). When the app shuts down, it logs a shutdown message.
+        they do not exist), the curated local remedy rules and the symptom
+        index are loaded and the remedy history write-behind queue is
+        started. Under gunicorn (gunicorn.conf.py) the master has already
+        done the first three before
+        forking, so each worker only starts its own queue. The remedy job
+        workers, the listener feeding the WebSocket events and the
+        event-loop lag monitor are started as well.
+        When the app shuts down, the job workers are stopped and the queue
+        is drained before exiting.
 
         Args:
             app (FastAPI): The FastAPI application instance.
     """
-    print("Initializing database...")
-    init_db()  # Call the function to create tables if not exist
+    if os.getenv(DB_READY_ENV) != "1":  # Already done by a pre-fork server master
+        print("Initializing database...")
+        init_db()  # Call the function to create tables if not exist
+    if not local_remedies.loaded:
+        local_remedies.load()  # Index the curated remedy rules in memory
+    if not symptom_index.loaded:
+        load_symptom_index()  # Known symptoms for near-duplicate matching
+    if not remedy_index.loaded:
+        load_remedy_index()  # Catalog remedies as ingredient bitsets
+    history_writer.start()
+    remedy_workers.start()  # Process queued remedy jobs (REMEDY_JOB_WORKERS=0 disables)
+    event_hub.bind(asyncio.get_running_loop())
+    event_listener.start()  # Forward job events from every process to this worker's sockets
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()  # Detect handlers that block the event loop
     yield
     print("Shutting down...")
+    loop_monitor.stop()
+    await remedy_workers.stop()
+    event_listener.stop()
+    history_writer.stop()  # Flush queued history rows before exiting
 
-# Create FastAPI app instance
-app = FastAPI(lifespan=lifespan)
+# Create FastAPI app instance, serializing responses with orjson when it is installed
+app = FastAPI(lifespan=lifespan,
+              default_response_class=ORJSONResponse if json_codec.orjson else JSONResponse)
 
 # Mount the static directory (for CSS, JS, images, etc.)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -43,6 +82,24 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Add session middleware to manage sessions in the app
 app.add_middleware(SessionMiddleware, secret_key="school")
 
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+        Traces every request and reports the time spent in each phase
+        (database, cache, provider, parsing, ...) in a Server-Timing header.
+    """
+    route_token = bind_request(request.scope)  # tags slow queries with the route
+    try:
+        with tracing.span("http", method=request.method, path=request.url.path) as root:
+            response = await call_next(request)
+            if root is not None:
+                root.set_attribute("status_code", response.status_code)
+                response.headers["Server-Timing"] = tracing.server_timing(root)
+            return response
+    finally:
+        reset_request(route_token)
+
 # Include routes from routes.py
 #app.include_router(router)
 
@@ -53,6 +110,9 @@ app.include_router(ingredients.router)
 app.include_router(symptoms.router)
 app.include_router(remedies.router)
 app.include_router(shoppinglists.router)
+app.include_router(metrics.router)
+app.include_router(debug.router)
+app.include_router(events.router)
 @app.get("/")
 async def home(request: Request):
     """
@@ -0,0 +1,60 @@
+"""
+Standalone remedy job worker.
+
+Processes the jobs queued by POST /remedies/jobs outside the API processes,
+so provider calls never compete with request handling. Run any number of
+these next to the API (usually with REMEDY_JOB_WORKERS=0 on the API side);
+they share the remedy_jobs table and never claim the same job.
+
+Usage:
+    python remedy_worker.py --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import signal
+
+from database.database import DB_READY_ENV, init_db
+from database.events import event_listener
+from database.history import history_writer
+from utils.remedy_index import load_remedy_index
+from utils.remedy_jobs import make_pool
+from utils.remedy_rules import local_remedies
+from utils.symptom_index import load_symptom_index
+
+
+async def run(concurrency: int):
+    workers = make_pool(concurrency)
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+
+    history_writer.start()
+    event_listener.start()  # Household cache invalidations from the API processes
+    workers.start()
+    print(f"Remedy worker started with {concurrency} workers")
+    await stopped.wait()
+    print("Shutting down...")
+    await workers.stop()
+    event_listener.stop()
+    history_writer.stop()  # Flush queued history rows before exiting
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued remedy jobs.")
+    parser.add_argument("--concurrency", type=int,
+                        default=int(os.getenv("REMEDY_JOB_WORKERS", "4")) or 4,
+                        help="Number of jobs processed at once.")
+    args = parser.parse_args()
+
+    if os.getenv(DB_READY_ENV) != "1":
+        init_db()
+    local_remedies.load()
+    load_remedy_index()
+    load_symptom_index()  # Jobs are looked up and catalogued under canonical symptoms
+    asyncio.run(run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ from starlette.requests import Request
 from starlette.responses import JSONResponse
 
 from config import templates
+from database import repository
 from database.database import get_db_connection
 from database.models import User, LoginUser
 from auth import hash_password, verify_password
@@ -24,17 +25,14 @@ def sign_up(user: User):
             JSONResponse: Success message if user is created, otherwise an error message.
     """
     conn = get_db_connection()
-    cursor = conn.cursor()
 
-    cursor.execute("SELECT * FROM users WHERE username=%s", (user.username,))
-    existing_user = cursor.fetchone()
+    existing_user = repository.get_user(conn, user.username)
     if existing_user:
         conn.close()
         raise HTTPException(status_code=400, detail="Username already exists")
 
     hashed_password = hash_password(user.password)
-    cursor.execute("INSERT INTO users (username, password) VALUES (%s, %s)",
-                   (user.username, hashed_password))
+    repository.create_user(conn, user.username, hashed_password)
 
     conn.commit()
     conn.close()
@@ -61,19 +59,16 @@ async def login(request: Request, login_user: LoginUser):
     """
     print("request",request)
     conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT * FROM users WHERE username=%s", (login_user.username,))
-    db_user = cursor.fetchone()
+    db_user = repository.get_user(conn, login_user.username)
     conn.close()
 
-    if not db_user or not verify_password(login_user.password, db_user["password"]):
+    if not db_user or not verify_password(login_user.password, db_user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Incorrect username or password")
 
     # Store user information in session
-    request.session["user_id"] = db_user["id"]
-    request.session["username"] = db_user["username"]
+    request.session["user_id"] = db_user.id
+    request.session["username"] = db_user.username
 
     return JSONResponse(content={"message": "Login successful"})
 
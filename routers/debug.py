@@ -0,0 +1,104 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from utils.authuser_session import get_current_user
+from utils.profiling import memory_profiler, profile_cpu_once
+
+router = APIRouter(prefix="/debug/profile", tags=["Debug"])
+
+
+async def get_debug_user(current_user: dict = Depends(get_current_user)):
+    """
+        Allows only the users listed in the comma separated DEBUG_USERNAMES
+        environment variable; profiling and the trace, stall and slow-query
+        endpoints of routers.metrics are disabled when it is empty.
+
+        Raises:
+            HTTPException 403: If the user is not a debug user.
+    """
+    allowed = {name.strip() for name in os.getenv("DEBUG_USERNAMES", "").split(",") if name.strip()}
+    if current_user["username"] not in allowed:
+        raise HTTPException(status_code=403, detail="Debugging is not allowed for this user")
+    return current_user
+
+
+@router.get("/cpu", response_class=PlainTextResponse)
+async def profile_cpu(seconds: float = Query(10, gt=0, le=60),
+                      interval_ms: float = Query(5, ge=1, le=100),
+                      current_user: dict = Depends(get_debug_user)):
+    """
+        Endpoint sampling the stacks of this worker for a number of seconds
+        while it keeps serving traffic.
+
+        Args:
+            seconds (float): How long to sample.
+            interval_ms (float): Time between samples.
+            current_user (dict): The authenticated, allow-listed user.
+
+        Returns:
+            str: Collapsed stacks ("frame;frame count" per line) for
+            flamegraph tools.
+
+        Raises:
+            HTTPException 409: If a profile is already running in this worker.
+    """
+    # Sampling runs in a thread so the event loop keeps serving the traffic being profiled
+    stacks = await run_in_threadpool(profile_cpu_once, seconds, interval_ms / 1000)
+    if stacks is None:
+        raise HTTPException(status_code=409, detail="A CPU profile is already running")
+    return PlainTextResponse(stacks, headers={
+        "Content-Disposition": 'attachment; filename="profile.folded"'})
+
+
+@router.post("/memory/start")
+async def start_memory_tracing(frames: int = Query(10, ge=1, le=50),
+                               current_user: dict = Depends(get_debug_user)):
+    """
+        Endpoint starting tracemalloc in this worker. Tracing slows down
+        allocations, so stop it when done.
+    """
+    memory_profiler.start(frames)
+    return {"message": "Memory tracing started", "frames": frames}
+
+
+@router.post("/memory/snapshot/{name}")
+async def take_memory_snapshot(name: str, limit: int = Query(20, ge=1, le=200),
+                               current_user: dict = Depends(get_debug_user)):
+    """
+        Endpoint taking a named tracemalloc snapshot.
+
+        Returns:
+            dict: The snapshot name and its top allocating source lines.
+    """
+    try:
+        top = await run_in_threadpool(memory_profiler.snapshot, name, limit)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    return {"snapshot": name, "top": top}
+
+
+@router.get("/memory/diff")
+async def diff_memory_snapshots(first: str, second: str, limit: int = Query(20, ge=1, le=200),
+                                current_user: dict = Depends(get_debug_user)):
+    """
+        Endpoint comparing two snapshots taken earlier.
+
+        Returns:
+            dict: The source lines whose allocations changed the most
+            between the first and the second snapshot.
+    """
+    try:
+        changes = await run_in_threadpool(memory_profiler.diff, first, second, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown snapshot {e}") from e
+    return {"first": first, "second": second, "changes": changes}
+
+
+@router.post("/memory/stop")
+async def stop_memory_tracing(current_user: dict = Depends(get_debug_user)):
+    """Endpoint stopping tracemalloc and dropping the snapshots."""
+    memory_profiler.stop()
+    return {"message": "Memory tracing stopped"}
@@ -0,0 +1,48 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+
+from utils.authuser_session import get_current_user
+from utils.event_hub import event_hub
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket):
+    """
+        WebSocket pushing the events of the logged-in parent's kids as JSON
+        text messages: "progress" when a remedy job starts, then
+        "remedy_ready", "shopping_list_ready" or "remedy_failed" with the
+        job's result.
+
+        The session cookie authenticates the connection like any other
+        route; without a session it is closed with code 1008. Messages sent
+        by the client are ignored.
+    """
+    try:
+        current_user = await get_current_user(websocket)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+
+    subscription = event_hub.subscribe(current_user["id"])
+
+    async def forward_events():
+        while True:
+            await websocket.send_text(await subscription.get())
+
+    sender = asyncio.create_task(forward_events())
+    try:
+        # Reading is how a closed connection is noticed while no event is due
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+        event_hub.unsubscribe(subscription)
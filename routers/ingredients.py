@@ -1,11 +1,27 @@
+from typing import List, Optional
+
 from fastapi import status
 from starlette.responses import JSONResponse
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from psycopg2.extras import execute_values
+from database import repository
 from database.database import get_db_connection
-from database.models import Ingredients
+from database.events import publish_invalidation
+from database.models import IngredientOut, Ingredients, PantrySync
+from database.vocab import ingredient_vocab
 from utils.authuser_session import get_current_user
+from utils.household_cache import household_cache
+from utils.pagination import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor,
+                              parse_fields, select_columns, split_page)
+from utils.pantry import diff_pantry, normalize_ingredient_name
 
 router = APIRouter(prefix="/ingredients", tags=["Ingredients"])
+
+# Output field name -> ingredients column, used for field projection
+INGREDIENT_FIELDS = {
+    "ingredients_name": "ingredient_name",
+    "is_available": "is_available",
+}
 @router.post("/add_ingredient/")
 async def add_ingredients(ingredients: Ingredients, current_user: dict = Depends(get_current_user)):
     """
@@ -16,6 +32,8 @@ async def add_ingredients(ingredients: Ingredients, current_user: dict = Depends
 
         Args:
             ingredients (Ingredients): The ingredient details to be added.
+            The name is stored with the spelling of a similar known
+            ingredient, if any (database.vocab).
             current_user (dict): The authenticated user (parent).
 
         Returns:
@@ -24,18 +42,18 @@ async def add_ingredients(ingredients: Ingredients, current_user: dict = Depends
     """
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
         parent_id = current_user["id"]
-        cursor.execute("""
-            INSERT INTO ingredients(ingredient_name,is_available,parent_id)
-            VALUES (%s, %s ,%s)
-        """, (
-            ingredients.ingredient_name,
-            ingredients.is_available,
-            parent_id
-        ))
+        ingredient_name = normalize_ingredient_name(ingredients.ingredient_name)
+        ingredient_id = None
+        entry = ingredient_vocab.resolve(conn, ingredient_name)
+        if entry is not None:
+            ingredient_id, ingredient_name = entry
+        repository.upsert_ingredient(conn, parent_id, ingredient_name,
+                                     ingredients.is_available, ingredient_id)
+        publish_invalidation(conn, parent_id)
         conn.commit()
         conn.close()
+        household_cache.invalidate(parent_id)
         return JSONResponse(status_code=201,
                             content={"message": "Ingredients added successfull"})
     except Exception as e:
@@ -44,32 +62,52 @@ async def add_ingredients(ingredients: Ingredients, current_user: dict = Depends
                             detail="Database error occurred.") from e
 
 
-@router.get("/get_ingredient/")
-async def get_ingredients(current_user: dict = Depends(get_current_user)):
+@router.get("/get_ingredient/", response_model=List[IngredientOut],
+            response_model_exclude_unset=True)
+async def get_ingredients(response: Response,
+                          limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                          cursor: Optional[str] = None,
+                          fields: Optional[str] = None,
+                          current_user: dict = Depends(get_current_user)):
     """
-        Endpoint to add ingredients to the authenticated user's ingredient list.
-        This endpoint allows the parent to add ingredients with their availability status.
+        Endpoint to list the authenticated user's ingredients, one page at a time.
+        Ingredients are ordered by id; the cursor of the next page is returned
+        in the X-Next-Cursor response header.
 
         Args:
-            ingredients (Ingredients): The ingredient details to be added.
-            current_use r (dict): The authenticated user (parent).
+            limit (int): Maximum number of ingredients to return.
+            cursor (str): Cursor from a previous page, omitted for the first page.
+            fields (str): Comma separated list of fields to return, all by default.
+            current_user (dict): The authenticated user (parent).
 
         Returns:
-            JSONResponse: Success message if ingredients are added, otherwise an error message.
+            list: A page of ingredients with their availability status.
     """
+    try:
+        after_id = decode_cursor(cursor, int) or 0
+        output_fields = parse_fields(fields, INGREDIENT_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
     conn = get_db_connection()
-    cursor = conn.cursor()
-    parent_id = current_user["id"]
-    cursor.execute("""
-        SELECT * from ingredients where parent_id = %s
-        """, (parent_id,))
-    ingredients = cursor.fetchall()
-    if not ingredients:
+    try:
+        cursor_ = conn.cursor()
+        parent_id = current_user["id"]
+        cursor_.execute(f"""
+            SELECT {select_columns(output_fields, INGREDIENT_FIELDS, 'id')}
+            from ingredients where parent_id = %s AND id > %s
+            ORDER BY id LIMIT %s
+            """, (parent_id, after_id, limit + 1))
+        ingredients, next_cursor = split_page(cursor_.fetchall(), limit, "id")
+    finally:
+        conn.close()
+    if not ingredients and cursor is None:
         raise HTTPException(status_code=404,
                             detail="No Ingredients found for this user")
-    return [{"ingredients_name": ingredient["ingredient_name"],
-             "is_available": ingredient["is_available"]} for
-            ingredient in ingredients]
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [{field: ingredient[INGREDIENT_FIELDS[field]] for field in output_fields}
+            for ingredient in ingredients]
 
 
 @router.put("/update_ingredient/")
@@ -97,30 +135,17 @@ async def update_ingredients(ingredients: Ingredients,
                 - 500 if there is a database error during the update process.
     """
     conn = get_db_connection()
-    cursor = conn.cursor()
     try:
 
         parent_id = current_user["id"]
-        # Check if ingredient exists for this user
-        cursor.execute(
-            "SELECT id FROM ingredients WHERE ingredient_name = %s AND parent_id = %s",
-            (ingredients.ingredient_name, parent_id),
-        )
-        existing_ingredient = cursor.fetchone()
-
-        if not existing_ingredient:
+        ingredient_name = normalize_ingredient_name(ingredients.ingredient_name)
+        # Update is_available status; False tells us the row did not exist
+        if not repository.set_ingredient_availability(
+                conn, parent_id, ingredient_name, ingredients.is_available):
             raise HTTPException(status_code=404, detail="Ingredient not found for this user")
-
-        # Update is_available status
-        cursor.execute("""
-        UPDATE ingredients SET is_available = %s
-        where ingredient_name = %s and parent_id = %s
-        """, (
-            ingredients.is_available,
-            ingredients.ingredient_name,
-            parent_id
-        ))
+        publish_invalidation(conn, parent_id)
         conn.commit()
+        household_cache.invalidate(parent_id)
 
         return {"message": "Ingredient updated successfully",
                 "ingredient": ingredients.ingredient_name,
@@ -135,3 +160,63 @@ async def update_ingredients(ingredients: Ingredients,
         conn.close()
 
 
+@router.put("/sync_pantry/")
+async def sync_pantry(pantry: PantrySync, current_user: dict = Depends(get_current_user)):
+    """
+        Endpoint to replace the authenticated user's pantry with the full
+        pantry state sent by the client.
+        The stored pantry is diffed against the incoming one; new and flipped
+        ingredients go through a single INSERT ... ON CONFLICT batch and
+        missing ones are deleted, all in one transaction. Names are mapped to
+        the spelling of a similar known ingredient first (database.vocab).
+
+        Args:
+            pantry (PantrySync): The complete pantry state of the client.
+            current_user (dict): The authenticated user (parent).
+
+        Returns:
+            dict: A success message with the inserted, updated and deleted ingredients.
+
+        Raises:
+            HTTPException:
+                - 500 if there is a database error during the sync.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        parent_id = current_user["id"]
+        # Lock the parent's rows so concurrent syncs apply one after the other
+        stored = repository.lock_pantry(conn, parent_id)
+        incoming = [(normalize_ingredient_name(item.ingredient_name), item.is_available)
+                    for item in pantry.ingredients]
+        entries = ingredient_vocab.resolve_many(conn, {name for name, _ in incoming})
+        diff = diff_pantry(stored, ((entries[name][1] if name in entries else name, is_available)
+                                    for name, is_available in incoming))
+
+        if diff.upserts:
+            ids = {name: vocab_id for vocab_id, name in entries.values()}
+            execute_values(cursor, """
+                INSERT INTO ingredients (ingredient_name, is_available, parent_id, ingredient_id)
+                VALUES %s
+                ON CONFLICT (parent_id, ingredient_name)
+                DO UPDATE SET is_available = EXCLUDED.is_available,
+                              ingredient_id = EXCLUDED.ingredient_id
+            """, [(name, is_available, parent_id, ids.get(name))
+                  for name, is_available in diff.upserts])
+        if diff.deletes:
+            repository.delete_ingredients(conn, parent_id, diff.deletes)
+        publish_invalidation(conn, parent_id)
+        conn.commit()
+        household_cache.invalidate(parent_id)
+
+        return {"message": "Pantry synced successfully",
+                "inserted": [name for name, _ in diff.inserts],
+                "updated": [name for name, _ in diff.updates],
+                "deleted": diff.deletes}
+    except Exception as e:
+        conn.rollback()
+        print(f"An unexpected error occurred: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail="Database error occurred.") from e
+    finally:
+        conn.close()
@@ -1,9 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from database import repository
 from database.database import get_db_connection
-from database.models import KidsProfile
+from database.events import publish_invalidation
+from database.models import KidProfileOut, KidSummary, KidsProfile
+from utils.allergens import normalize_allergen, parse_allergies
 from utils.authuser_session import get_current_user
+from utils.household_cache import household_cache
+from utils.pagination import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor,
+                              parse_fields, select_columns, split_page)
 
 router = APIRouter(prefix="/kids", tags=["Kids Profile"])
+
+# Output field name -> kids_profile column, used for field projection
+KID_FIELDS = {
+    "id": "id",
+    "name": "name",
+    "age": "age",
+    "height": "height",
+    "weight": "weight",
+    "allergies": "allergies",
+    "symptom": "symptom_name",
+}
 # Endpoint to create kids' profiles
 @router.post("/add_kid_profile", status_code=status.HTTP_201_CREATED)
 async def create_kids_profile(
@@ -29,8 +48,8 @@ async def create_kids_profile(
         parent_username = current_user['username']  # Get parent username
 
         cursor.execute("""
-            INSERT INTO kids_profile (name, age, height, weight, allergies, parent_id)
-            VALUES (%s, %s, %s, %s, %s, %s)
+            INSERT INTO kids_profile (name, age, height, weight, allergies, allergy_terms, parent_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
             RETURNING id
         """, (
             kids_profile.name,
@@ -38,12 +57,15 @@ async def create_kids_profile(
             kids_profile.height,
             kids_profile.weight,
             kids_profile.allergies,
+            list(parse_allergies(kids_profile.allergies)),
             parent_id,  # Use the parent_id from current_user
         ))
 
         new_kid_id = cursor.fetchone()['id']
+        publish_invalidation(conn, parent_id)
         conn.commit()
         conn.close()
+        household_cache.invalidate(parent_id)
 
         # Include parent username in the response
         return {"id": new_kid_id,
@@ -57,46 +79,87 @@ async def create_kids_profile(
                             detail="Database error occurred.") from e
 
 
-@router.get("/get_kids_profile")
-async def get_kids(current_user: dict = Depends(get_current_user)):
+@router.get("/get_kids_profile", response_model=List[KidProfileOut],
+            response_model_exclude_unset=True)
+async def get_kids(response: Response,
+                   limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                   cursor: Optional[str] = None,
+                   fields: Optional[str] = None,
+                   current_user: dict = Depends(get_current_user)):
     """
-    Endpoint to retrieve all kids' profiles
-    associated with the authenticated user (parent).
-    This endpoint fetches kids' profiles based on the parent's id.
+    Endpoint to retrieve the kids' profiles
+    associated with the authenticated user (parent), one page at a time.
+    Profiles are ordered by id; the cursor of the next page is returned in
+    the X-Next-Cursor response header.
 
     Args:
+        limit (int): Maximum number of profiles to return.
+        cursor (str): Cursor from a previous page, omitted for the first page.
+        fields (str): Comma separated list of fields to return, all by default.
         current_user (dict): The authenticated user (parent).
 
     Returns:
-        list: A list of kids' profiles associated with the authenticated parent.
+        list: A page of kids' profiles associated with the authenticated parent.
     """
+    try:
+        after_id = decode_cursor(cursor, int) or 0
+        output_fields = parse_fields(fields, KID_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
     conn = get_db_connection()
-    cursor = conn.cursor()
-    print("-----------", current_user['id'])
-    parent_id = current_user['id']
-    cursor.execute("SELECT * "
-                   " FROM kids_profile WHERE parent_id = %s",
-                   (parent_id,))
-    kids = cursor.fetchall()
-    conn.close()
-    if not kids:
+    try:
+        cursor_ = conn.cursor()
+        parent_id = current_user['id']
+        cursor_.execute(f"SELECT {select_columns(output_fields, KID_FIELDS, 'id')}"
+                        " FROM kids_profile WHERE parent_id = %s AND id > %s"
+                        " ORDER BY id LIMIT %s",
+                        (parent_id, after_id, limit + 1))
+        kids, next_cursor = split_page(cursor_.fetchall(), limit, "id")
+    finally:
+        conn.close()
+    if not kids and cursor is None:
         raise HTTPException(status_code=404,
                             detail="No Kids found for this user")
-    print(kids)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [
         {
-            "id": kid["id"],
-            "name": kid["name"],
-            "age": kid["age"],
-            "height": kid["height"],
-            "weight": kid["weight"],
-            "allergies": kid["allergies"],
-            **({"symptom": kid["symptom_name"]} if kid["symptom_name"] else {})  # Add symptom only if present
+            field: kid[KID_FIELDS[field]]
+            for field in output_fields
+            # Add symptom only if present
+            if field != "symptom" or kid["symptom_name"]
         }
         for kid in kids
     ]
 
 
+@router.get("/allergic_to", response_model=List[KidSummary])
+async def get_kids_allergic_to(allergen: str, current_user: dict = Depends(get_current_user)):
+    """
+    Endpoint to list the kids of the authenticated user (parent) who are
+    allergic to an ingredient. The allergen is normalized the same way the
+    stored allergies are, so "Peanuts" finds kids allergic to "peanut".
+
+    Args:
+        allergen (str): The allergen to look for.
+        current_user (dict): The authenticated user (parent).
+
+    Returns:
+        list: The id and name of every matching kid.
+    """
+    term = normalize_allergen(allergen)
+    if not term:
+        raise HTTPException(status_code=400, detail="Allergen must not be empty.")
+
+    conn = get_db_connection()
+    try:
+        kids = repository.kids_allergic_to(conn, current_user['id'], term)
+        return [{"id": kid_id, "name": name} for kid_id, name in kids]
+    finally:
+        conn.close()
+
+
 @router.post("/update_kid_profile/{kid_id}")
 async def update_kidsprofile(kid_id: int, kid: KidsProfile,
                              current_user: dict = Depends(get_current_user)):
@@ -104,9 +167,7 @@ async def update_kidsprofile(kid_id: int, kid: KidsProfile,
         conn = get_db_connection()
         cursor = conn.cursor()
         parent_id = current_user["id"]
-        cursor.execute("SELECT * from kids_profile where id = %s and parent_id = %s", (kid_id, parent_id))
-        existing_kid = cursor.fetchone()
-        if not existing_kid:
+        if not repository.kid_belongs_to(conn, kid_id, parent_id):
             raise HTTPException(status_code=403, detail="you are not authorised to update this kids_profile")
             # Dynamically build the update query based on provided fields
         update_fields = []
@@ -139,6 +200,8 @@ async def update_kidsprofile(kid_id: int, kid: KidsProfile,
                 updated_allergies = kid.allergies
             update_fields.append("allergies = %s")
             update_values.append(updated_allergies)
+            update_fields.append("allergy_terms = %s")
+            update_values.append(list(parse_allergies(updated_allergies)))
 
         # If there are no fields to update, raise an exception
         if not update_fields:
@@ -153,8 +216,10 @@ async def update_kidsprofile(kid_id: int, kid: KidsProfile,
         cursor.execute(update_query, tuple(update_values))
 
         # Commit the changes to the database
+        publish_invalidation(conn, parent_id)
         conn.commit()
         conn.close()
+        household_cache.invalidate(parent_id)
         return {"message": "Kids_profile updated successfully",
                 "kid_id": kid_id}
 
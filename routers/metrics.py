@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, Query
+
+from database.events import event_listener
+from database.history import history_writer
+from database.query_log import query_log
+from database.vocab import ingredient_vocab, symptom_vocab
+from routers.debug import get_debug_user
+from utils.admission import admission
+from utils.household_cache import household_cache
+from utils.loop_monitor import loop_monitor
+from utils.remedy_index import remedy_index
+from utils.remedy_jobs import remedy_workers
+from utils.remedy_rules import local_remedies
+from utils.shared_cache import remedy_cache
+from utils.symptom_index import symptom_index
+from utils.tracing import exporter
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/")
+async def get_metrics():
+    """
+        Endpoint exposing in-process performance counters of this worker.
+
+        Returns:
+            dict: Cache statistics, including hit ratios, the state of the
+            history write-behind queue, the AI provider admission queues, the
+            coverage of the local remedy engine, the remedy cache tiers, the
+            remedy index, the symptom index, the vocabulary resolvers, the
+            remedy job workers, the WebSocket event connections, the
+            event-loop lag histogram and database statement timings.
+    """
+    return {"household_cache": household_cache.stats(),
+            "history_writer": history_writer.stats(),
+            "admission": admission.stats(),
+            "local_remedies": local_remedies.stats(),
+            "remedy_cache": remedy_cache.stats(),
+            "remedy_index": remedy_index.stats(),
+            "symptom_index": symptom_index.stats(),
+            "vocab": {"symptoms": symptom_vocab.stats(),
+                      "ingredients": ingredient_vocab.stats()},
+            "remedy_jobs": remedy_workers.stats(),
+            "events": event_listener.stats(),
+            "event_loop": loop_monitor.stats(),
+            "queries": query_log.stats()}
+
+
+@router.get("/traces")
+async def get_traces(limit: int = Query(100, ge=1, le=2000),
+                     current_user: dict = Depends(get_debug_user)):
+    """
+        Endpoint exposing the most recent tracing spans of this worker.
+        Restricted to DEBUG_USERNAMES, like the profiling endpoints.
+
+        Args:
+            limit (int): Maximum number of spans to return.
+            current_user (dict): The authenticated debug user.
+
+        Returns:
+            dict: The spans, newest first, in OpenTelemetry OTLP/JSON span format.
+    """
+    return {"spans": exporter.recent(limit)}
+
+
+@router.get("/loop_stalls")
+async def get_loop_stalls(current_user: dict = Depends(get_debug_user)):
+    """
+        Endpoint exposing the event-loop stalls captured by this worker.
+        Restricted to DEBUG_USERNAMES, like the profiling endpoints.
+
+        Returns:
+            dict: The stalls, newest first, with how long the loop had been
+            blocked and the stack of the call that blocked it.
+    """
+    return {"stalls": loop_monitor.stalls()}
+
+
+@router.get("/slow_queries")
+async def get_slow_queries(current_user: dict = Depends(get_debug_user)):
+    """
+        Endpoint exposing the recent slow database statements of this worker.
+        Restricted to DEBUG_USERNAMES, like the profiling endpoints: the
+        statements and plans contain literal parameter values.
+
+        Returns:
+            dict: The statements, newest first, with their duration, the
+            route that ran them and, when sampled, their EXPLAIN plan.
+    """
+    return {"slow_queries": query_log.slow_queries()}
@@ -1,33 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from starlette.concurrency import run_in_threadpool
 
-from ai_clients import gemini_client, groq_client
+from database import repository
 from database.database import get_db_connection
-from ai_clients.openai_client import generate_remedy_instructions
+from database.models import RemedyJobRequest
+from database.remedy_context import RemedyContext, load_remedy_context
+from utils.admission import OverloadedError, admission
 from utils.authuser_session import get_current_user
-import json
+from utils.household_cache import household_cache
+from utils.remedy_jobs import enqueue_job, remedy_workers
+from utils.remedy_pipeline import PROVIDERS, ProviderError, get_known_remedy, record_provider_answer
+from utils.tracing import span
 router = APIRouter(prefix="/remedies", tags=["Kitchen_Remedy"])
-def get_existing_remedy(symptom_name,ingredients):
+
+
+def get_remedy_context(kid_id: int, parent_id: int) -> RemedyContext:
+    """
+        Returns the remedy inputs of a kid from the household cache, loading
+        them in a single statement on a miss.
+
+        Raises:
+            HTTPException 404: If the kid does not belong to the parent.
+    """
+    with span("context"):
+        context = household_cache.get(parent_id, kid_id, load_remedy_context)
+    if context is None:
+        raise HTTPException(status_code=404, detail="Kid not found for this user")
+    return context
+
+
+async def call_provider(provider: str, generate, *args):
+    """
+        Runs a blocking AI client call in the threadpool once the global and
+        the provider's concurrency limiters admit it.
+
+        Raises:
+            HTTPException 503: With a Retry-After header, if the request
+            cannot be admitted.
+    """
     try:
-        conn= get_db_connection()
-        cursor = conn.cursor()
-        search_query = """
-             SELECT remedy_name, steps, symptom, ingredients
-             FROM remedies
-             WHERE symptom = %s
-             AND 
-             (SELECT array_agg(value ORDER BY value) FROM jsonb_array_elements_text(ingredients::jsonb)) = 
-             (SELECT array_agg(value ORDER BY value) FROM jsonb_array_elements_text(%s::jsonb))
-              LIMIT 1;
-              """
-        cursor.execute(search_query, (symptom_name, json.dumps(sorted(ingredients))))
-        result = cursor.fetchone()
-        if result:
-            return result
-        return None
+        async with admission.slot(provider):
+            return await run_in_threadpool(generate, *args)
+    except OverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e),
+                            headers={"Retry-After": str(e.retry_after)}) from e
+
+
+async def serve_remedy(kid_id: int, parent_id: int, provider: str) -> dict:
+    """
+        Answers a synchronous remedy request with the shared pipeline:
+        curated local remedies first, then the catalog, then the provider,
+        whose answer is recorded like a remedy job's.
+
+        Raises:
+            HTTPException 404: If the kid does not belong to the parent.
+            HTTPException 502: If the provider failed.
+            HTTPException 503: If the provider call cannot be admitted.
+    """
+    # Symptom, allergies and pantry come from the household cache
+    context = get_remedy_context(kid_id, parent_id)
+    try:
+        remedy = await run_in_threadpool(get_known_remedy, context)
+        if remedy:
+            return remedy
+        answer = await call_provider(provider, PROVIDERS[provider], context.symptom,
+                                     context.safe_pantry, list(context.allergies))
+        return record_provider_answer(context, provider, answer)
+    except HTTPException:
+        raise
+    except ProviderError as e:
+        raise HTTPException(status_code=502, detail=str(e)) from e
     except Exception as e:
-        print(f"Database error: {e}")
-        raise HTTPException(status_code=500,
-                            detail="Database error occurred") from e
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Home endpoint
 
 @router.get("/get_kitchen_remedy/open_ai/{kid_id}")
@@ -46,6 +92,7 @@ async def get_remedy(kid_id: int, current_user: dict = Depends(get_current_user)
             HTTPException 403: If the user is not authorized to access the kid's profile.
             HTTPException 404: If no symptom is found for the given kid.
             HTTPException 500: If there is an internal server error.
+            HTTPException 502: If the AI provider failed.
 
         Example Response:
             {
@@ -54,119 +101,9 @@ async def get_remedy(kid_id: int, current_user: dict = Depends(get_current_user)
                 "ingredients": ["Honey", "Ginger", "Lemon"]
             }
         """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
+    return await serve_remedy(kid_id, current_user["id"], "openai")
 
-        parent_id = current_user["id"]
-        cursor.execute("SELECT symptom_name FROM kids_profile WHERE id = %s and parent_id = %s", (kid_id, parent_id))
-        kid_symptom = cursor.fetchone()
-
-        symptom = kid_symptom["symptom_name"]
-        print(f"symptom::{symptom}")
-
-        # Fetch ingredients based on the symptom
-        cursor.execute("SELECT ingredient_name "
-                       "FROM ingredients WHERE is_available = true "
-                       "and parent_id = %s",
-                       (parent_id,))
-        ingredients = cursor.fetchall()
-        ingredients_list = [
-            ingredient["ingredient_name"] for ingredient in ingredients]  # Extract ingredients as a list
-
-        print("Remedy Information:")
-        print(f"  Kid ID: {kid_id}")
-        print(f"  Symptom: {symptom}")
-        print(f"  Ingredients: {ingredients_list}")
-
-        result = get_existing_remedy(symptom,ingredients_list)
-
-        if result:
-            print(f"result:{result}")
-            print(f"result[0]::{result['remedy_name']}")
-            print(f"result[1]::{result['steps']}")
-            insert_query = """
-                                        INSERT INTO remedies (kid_id, parent_id, symptom, remedy_name, steps, ingredients)
-                                        VALUES (%s, %s, %s, %s, %s, %s)
-                                    """
-            cursor.execute(insert_query, (
-                kid_id,
-                parent_id,
-                symptom,
-                result['remedy_name'],
-                json.dumps(result['steps']),
-                json.dumps(ingredients_list)
-            ))
-            conn.commit()
-            remedy_instructions= {
-            "kid_id": kid_id,
-            "symptom": symptom,
-            "ingredients": ingredients_list,
-         "remedy_name": result["remedy_name"],
-           "steps": result["steps"]
-    }
-            return remedy_instructions
-        else:
-            # Generate AI remedy instructions
-            cursor.execute("SELECT allergies from kids_profile where id = %s and parent_id = %s", (kid_id, parent_id))
-            row = cursor.fetchone()
-
-            allergies_string = row['allergies']
-            allergies_list = allergies_string.split(',')
-            print(allergies_list)
-            remedy_instructions = generate_remedy_instructions(symptom, ingredients_list,allergies_list)
-            print("remedy_instructions",remedy_instructions)
-            ##remedy_instructions = remedy_instructions.replace("\n", " ")
-        if hasattr(remedy_instructions, 'remedy_name') and hasattr(remedy_instructions,
-                                                                   'steps'):  # check if remedy instruction is a pydantic object
-                print(f"   inside Remedy Name: {remedy_instructions.remedy_name}")
-                print(f"    Steps:{remedy_instructions.steps}")
-                insert_query = """
-                                INSERT INTO remedies (kid_id, parent_id, symptom, remedy_name, steps, ingredients)
-                                VALUES (%s, %s, %s, %s, %s, %s)
-                            """
-                cursor.execute(insert_query,(
-                             kid_id,
-                             parent_id,
-                             symptom,
-                             remedy_instructions.remedy_name,
-                             json.dumps(remedy_instructions.steps),
-                            json.dumps(ingredients_list)
-                             ))
-                conn.commit()
-                print("returned::::",remedy_instructions)
-
-                return {
-            "kid_id": kid_id,
-            "symptom": symptom,
-            "ingredients": ingredients_list,
-            "remedy_instructions": remedy_instructions
-
-        }
-        else:
-            if isinstance(remedy_instructions, str):
-               insert_query = """
-                                INSERT INTO remedy_shopping_list (kid_id, parent_id, symptom,ingredients_to_buy)
-                                 VALUES (%s, %s, %s, %s)
-                                 """
-               cursor.execute(insert_query, (
-                    kid_id,
-                    parent_id,
-                    symptom,
-                    json.dumps(remedy_instructions)
-
-                ))
-               conn.commit()
-               return {
-                    "kid_id": kid_id,
-                    "symptom": symptom,
-                    "Ingreidents_to_Buy": remedy_instructions}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cursor.close()
-        conn.close()
 @router.get("/get_kitchen_remedy/gemini_client/{kid_id}")
 async def get_remedy(kid_id: int, current_user: dict = Depends(get_current_user)):
     """
@@ -183,6 +120,7 @@ async def get_remedy(kid_id: int, current_user: dict = Depends(get_current_user)
             HTTPException 403: If the user is not authorized to access the kid's profile.
             HTTPException 404: If no symptom is found for the given kid.
             HTTPException 500: If there is an internal server error.
+            HTTPException 502: If the AI provider failed.
 
         Example Response:
             {
@@ -191,61 +129,7 @@ async def get_remedy(kid_id: int, current_user: dict = Depends(get_current_user)
                 "ingredients": ["Honey", "Ginger", "Lemon"]
             }
         """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-
-        parent_id = current_user["id"]
-        cursor.execute("SELECT symptom_name FROM kids_profile WHERE id = %s and parent_id = %s", (kid_id, parent_id))
-        kid_symptom = cursor.fetchone()
-
-        symptom = kid_symptom["symptom_name"]
-        print(f"symptom::{symptom}")
-
-        # Fetch ingredients based on the symptom
-        cursor.execute("SELECT ingredient_name "
-                       "FROM ingredients WHERE is_available = true "
-                       "and parent_id = %s",
-                       (parent_id,))
-        ingredients = cursor.fetchall()
-        ingredients_list = [
-            ingredient["ingredient_name"] for ingredient in ingredients]  # Extract ingredients as a list
-
-        print("Remedy Information:")
-        print(f"  Kid ID: {kid_id}")
-        print(f"  Symptom: {symptom}")
-        print(f"  Ingredients: {ingredients_list}")
-        remedy_instructions = gemini_client.generate_remedy_instructions(symptom, ingredients_list,["peanut"])
-        print("remedy_instructions",remedy_instructions)
-            ##remedy_instructions = remedy_instructions.replace("\n", " ")
-        if hasattr(remedy_instructions, 'remedy_name') and hasattr(remedy_instructions,
-                                                                   'steps'):  # check if remedy instruction is a pydantic object
-                print(f"   inside Remedy Name: {remedy_instructions.remedy_name}")
-                print(f"    Steps:{remedy_instructions.steps}")
-
-                print("returned::::",remedy_instructions)
-
-                return {
-
-            "kid_id": kid_id,
-            "symptom": symptom,
-            "ingredients": ingredients_list,
-            "remedy_instructions": remedy_instructions
-
-        }
-        else:
-            if isinstance(remedy_instructions, str):
-                return {
-                    "parent_id":parent_id,
-                    "kid_id": kid_id,
-                    "symptom": symptom,
-                    "Ingreidents_to_Buy": remedy_instructions}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cursor.close()
-        conn.close()
+    return await serve_remedy(kid_id, current_user["id"], "gemini")
 
 
 @router.get("/get_kitchen_remedy/groq_client/{kid_id}")
@@ -264,6 +148,7 @@ async def get_remedy(kid_id: int, current_user: dict = Depends(get_current_user)
                 HTTPException 403: If the user is not authorized to access the kid's profile.
                 HTTPException 404: If no symptom is found for the given kid.
                 HTTPException 500: If there is an internal server error.
+                HTTPException 502: If the AI provider failed.
 
             Example Response:
                 {
@@ -272,62 +157,50 @@ async def get_remedy(kid_id: int, current_user: dict = Depends(get_current_user)
                     "ingredients": ["Honey", "Ginger", "Lemon"]
                 }
             """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    parent_id = current_user["id"]
-    symptom = ""
-    try:
+    return await serve_remedy(kid_id, current_user["id"], "groq")
 
 
-        cursor.execute("SELECT symptom_name FROM kids_profile WHERE id = %s and parent_id = %s", (kid_id, parent_id))
-        kid_symptom = cursor.fetchone()
-
-        symptom = kid_symptom["symptom_name"]
-        print(f"symptom::{symptom}")
-
-        # Fetch ingredients based on the symptom
-        cursor.execute("SELECT ingredient_name "
-                       "FROM ingredients WHERE is_available = true "
-                       "and parent_id = %s",
-                       (parent_id,))
-        ingredients = cursor.fetchall()
-        ingredients_list = [
-            ingredient["ingredient_name"] for ingredient in ingredients]  # Extract ingredients as a list
-
-        print("Remedy Information:")
-        print(f"  Kid ID: {kid_id}")
-        print(f"  Symptom: {symptom}")
-        print(f"  Ingredients: {ingredients_list}")
-        remedy_instructions = groq_client.generate_remedy_instructions(symptom, ingredients_list)
-        print("remedy_instructions", remedy_instructions)
-        ##remedy_instructions = remedy_instructions.replace("\n", " ")
-        if hasattr(remedy_instructions, 'remedy_name') and hasattr(remedy_instructions,
-                                                                   'steps'):  # check if remedy instruction is a pydantic object
-            print(f"   inside Remedy Name: {remedy_instructions.remedy_name}")
-            print(f"    Steps:{remedy_instructions.steps}")
-
-            print("returned::::", remedy_instructions)
-
-            return {
-                "kid_id": kid_id,
-                "symptom": symptom,
-                "ingredients": ingredients_list,
-                "remedy_instructions": remedy_instructions
+@router.post("/jobs", status_code=202)
+async def create_remedy_job(job: RemedyJobRequest, response: Response,
+                            current_user: dict = Depends(get_current_user)):
+    """
+        Queues a remedy generation for a kid and returns immediately, so the
+        client does not hold a connection open while the provider answers.
 
-            }
-        else:
-            if isinstance(remedy_instructions, str):
+        Args:
+            job (RemedyJobRequest): The kid and the AI provider to use.
+            current_user (dict): The authenticated user (parent).
 
-                return {
-                    "parent_id":parent_id,
-                    "kid_id": kid_id,
-                    "symptom": symptom,
-                    "Ingreidents_to_Buy": remedy_instructions}
+        Returns:
+            dict: The job id and status; poll GET /remedies/jobs/{job_id}
+            (also in the Location header) for the result.
+
+        Raises:
+            HTTPException 404: If the kid does not belong to the user.
+    """
+    parent_id = current_user["id"]
+    get_remedy_context(job.kid_id, parent_id)
+    job_id = await run_in_threadpool(enqueue_job, parent_id, job.kid_id, job.provider)
+    remedy_workers.notify()
+    response.headers["Location"] = f"/remedies/jobs/{job_id}"
+    return {"job_id": job_id, "status": "queued"}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cursor.close()
-        conn.close()
 
+@router.get("/jobs/{job_id}")
+async def get_remedy_job(job_id: int, current_user: dict = Depends(get_current_user)):
+    """
+        Returns the status of a remedy job: queued, running, done or failed.
+        The result holds the same remedy fields as the synchronous routes
+        once the job is done; error explains a failed job.
 
+        Raises:
+            HTTPException 404: If the job does not exist or belongs to another user.
+    """
+    conn = get_db_connection()
+    try:
+        job = repository.get_remedy_job(conn, job_id, current_user["id"])
+    finally:
+        conn.close()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found for this user")
+    return job
@@ -1,44 +1,74 @@
-from fastapi import APIRouter, Depends, HTTPException
-from matplotlib.backend_bases import cursors
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
 from database.database import get_db_connection
-from ai_clients import gemini_client, groq_client
-from database.database import get_db_connection
-from ai_clients.openai_client import generate_remedy_instructions
+from database.models import ShoppingListPage
+from utils.authuser_session import get_current_user
+from utils.pagination import (DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor,
+                              parse_fields, select_columns, split_page)
 
-import json
+router = APIRouter(prefix="/remedy_shopping_list",tags=["Remedy_Shopping_List"])
 
-from routes import get_current_user
+# Output field name -> aggregate expression over shopping_list_items, used for
+# field projection. Every expression is aliased to its output field name.
+SHOPPING_ITEM_FIELDS = {
+    "item_name": "item_name",
+    "request_count": "COUNT(*) AS request_count",
+    "kid_ids": "array_agg(DISTINCT kid_id) AS kid_ids",
+    "symptoms": "array_agg(DISTINCT symptom) AS symptoms",
+}
 
-router = APIRouter(prefix="/remedy_shopping_list",tags=["Remedy_Shopping_List"])
 
-@router.get("/get_shopping_list")
-def get_shopping_list(current_user: dict = Depends(get_current_user)):
+@router.get("/get_shopping_list", response_model=ShoppingListPage,
+            response_model_exclude_unset=True)
+def get_shopping_list(response: Response,
+                      limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                      cursor: Optional[str] = None,
+                      fields: Optional[str] = None,
+                      current_user: dict = Depends(get_current_user)):
+    """
+        Endpoint to get the deduplicated shopping list for the authenticated
+        user's kids, one page at a time.
+        Items are aggregated in SQL: each item appears once with the number of
+        remedy requests that needed it and the kids and symptoms it was for.
+        Items are ordered by name; the cursor of the next page is returned in
+        the X-Next-Cursor response header.
+
+        Args:
+            limit (int): Maximum number of items to return.
+            cursor (str): Cursor from a previous page, omitted for the first page.
+            fields (str): Comma separated list of fields to return, all by default.
+            current_user (dict): The authenticated user (parent).
+
+        Returns:
+            dict: A page of aggregated items under the "shopping_list" key.
+    """
+    try:
+        after_item = decode_cursor(cursor, str) or ""
+        output_fields = parse_fields(fields, SHOPPING_ITEM_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
     conn = get_db_connection()
-    cursor = conn.cursor()
+    cursor_ = conn.cursor()
     try:
-        search_query = """
-               SELECT kid_id, symptom, ingredients_to_buy
-               FROM remedy_shopping_list
-               WHERE parent_id = %s
+        search_query = f"""
+               SELECT {select_columns(output_fields, SHOPPING_ITEM_FIELDS, 'item_name')}
+               FROM shopping_list_items
+               WHERE parent_id = %s AND item_name > %s
+               GROUP BY item_name
+               ORDER BY item_name LIMIT %s
            """
-        cursor.execute(search_query, (current_user["id"],))  # Correct parameter passing
-        shopping_lists = cursor.fetchall()  # Fetch all rows
-        print(shopping_lists)
-        for row in shopping_lists:
-            kid_id = row['kid_id']
-            symptom = row['symptom']
-            ingredients = row['ingredients_to_buy']
-            print(f"Kid ID: {kid_id}, Symptom: {symptom}, Ingredients: {ingredients}")
-            # Convert the data into a formatted list of strings
-        formatted_results = [
-                f"Kid ID: {row['kid_id']}, Symptom: {row['symptom']}, Ingredients: {row['ingredients_to_buy']}"
-                for row in shopping_lists
-            ]
-
-        return {"shopping_lists": formatted_results}
+        cursor_.execute(search_query, (current_user["id"], after_item, limit + 1))
+        items, next_cursor = split_page(cursor_.fetchall(), limit, "item_name")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+
+        return {"shopping_list": [{field: row[field] for field in output_fields}
+                                  for row in items]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        cursor.close()
-        conn.close()
\ No newline at end of file
+        cursor_.close()
+        conn.close()
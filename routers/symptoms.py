@@ -1,7 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from database import repository
 from database.database import get_db_connection
+from database.events import publish_invalidation
 from database.models import KidsProfileSymptom
+from database.vocab import symptom_vocab
 from utils.authuser_session import get_current_user
+from utils.household_cache import household_cache
+from utils.symptom_index import canonicalize_new_symptom, remember_symptom
 
 router = APIRouter(prefix="/symptoms", tags=["Symptoms"])
 @router.post("/update_kid_symptom/{kid_id}")
@@ -18,27 +25,47 @@ async def update_kid_symptom(kid_id: int, symptom: KidsProfileSymptom,
             current_user (dict): The authenticated user (parent).
 
         Returns:
-            dict: Success message with updated symptom details.
+            dict: Success message with updated symptom details. The
+            symptom_name is stored as written; the vocabulary id stored
+            with it is the one of a similar symptom already known, if any
+            (utils.symptom_index and database.vocab).
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        parent_id = current_user["id"]
+        symptom_name = await run_in_threadpool(
+            store_kid_symptom, kid_id, current_user["id"], symptom.symptom_name)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Database error: {e}")
+        raise HTTPException(status_code=500,
+                            detail="Database error occurred") from e
+    return {"message": "Symptom updated successfully",
+            "kid_id": kid_id, "symptom_name": symptom_name}
+
+
+def store_kid_symptom(kid_id: int, parent_id: int, name: str) -> str:
+    """
+        Stores a kid's symptom as written with the vocabulary id of its
+        canonical spelling, and returns the stored name.
 
-        cursor.execute("SELECT * FROM kids_profile where id = %s and parent_id= %s",
-                       (kid_id, parent_id))
-        existing_kid = cursor.fetchone()
-        if not existing_kid:
+        Raises:
+            HTTPException 403: If the kid does not belong to the parent.
+    """
+    conn = get_db_connection()
+    try:
+        if not repository.kid_belongs_to(conn, kid_id, parent_id):
             raise HTTPException(status_code=403,
                                 detail="you are not authorised to update this kid's symptoms")
-        cursor.execute("""UPDATE kids_profile SET symptom_name = %s WHERE id = %s
-        """, (symptom.symptom_name, kid_id))
+        symptom_name = " ".join(name.split())
+        # The canonical spelling is only the vocabulary key
+        canonical = canonicalize_new_symptom(symptom_name)
+        entry = symptom_vocab.resolve(conn, canonical)
+        symptom_id = entry[0] if entry is not None else None
+        repository.set_kid_symptom(conn, kid_id, symptom_name, symptom_id)
+        publish_invalidation(conn, parent_id)
         conn.commit()
+    finally:
         conn.close()
-
-        return {"message": "Symptom updated successfully",
-                "kid_id": kid_id, "symptom_name": symptom.symptom_name}
-    except Exception as e:
-        print(f"Database error: {e}")
-        raise HTTPException(status_code=500,
-                            detail="Database error occurred") from e
+    remember_symptom(canonical)
+    household_cache.invalidate(parent_id)
+    return symptom_name
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from utils.admission import AdmissionController, ConcurrencyLimiter, OverloadedError
+
+
+def test_full_queue_is_rejected_immediately():
+    """Test that requests beyond concurrency + queue fail fast."""
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", max_concurrency=1, max_queue=1, timeout=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+
+        with pytest.raises(OverloadedError) as error:
+            await limiter.acquire()
+        assert error.value.reason == "queue full"
+        assert limiter.stats()["queue_depth"] == 1
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["admitted"] == 2
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_wait_times_out():
+    """Test that a request waiting longer than the timeout is turned away."""
+    async def scenario():
+        limiter = ConcurrencyLimiter("test", max_concurrency=1, max_queue=5, timeout=0.01)
+        await limiter.acquire()
+        with pytest.raises(OverloadedError) as error:
+            await limiter.acquire()
+        return limiter, error.value
+
+    limiter, error = asyncio.run(scenario())
+    assert error.reason == "wait timed out"
+    assert limiter.stats()["timed_out"] == 1
+
+
+def test_saturated_provider_does_not_hold_global_slots():
+    """Test that requests waiting for a busy provider leave global capacity to the others."""
+    async def scenario():
+        admission = AdmissionController(
+            ConcurrencyLimiter("global", max_concurrency=2, max_queue=5, timeout=5),
+            {"slow": ConcurrencyLimiter("slow", max_concurrency=1, max_queue=5, timeout=5),
+             "fast": ConcurrencyLimiter("fast", max_concurrency=1, max_queue=5, timeout=5)})
+        release = asyncio.Event()
+
+        async def call_slow():
+            async with admission.slot("slow"):
+                await release.wait()
+
+        slow_calls = [asyncio.create_task(call_slow()) for _ in range(3)]
+        await asyncio.sleep(0)
+        async with admission.slot("fast"):
+            in_flight = admission.global_limiter.stats()["in_flight"]
+        release.set()
+        await asyncio.gather(*slow_calls)
+        return in_flight
+
+    assert asyncio.run(asyncio.wait_for(scenario(), 1)) == 2
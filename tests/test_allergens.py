@@ -0,0 +1,48 @@
+from utils.allergens import compile_matcher, filter_ingredients, parse_allergies
+
+
+def test_parse_allergies_normalizes_case_whitespace_and_plurals():
+    """Test that free-text allergies become distinct normalized terms."""
+    assert parse_allergies(" Peanuts, milk ;egg,, PEANUT") == ("peanut", "milk", "egg")
+    assert parse_allergies(None) == ()
+
+
+def test_matcher_catches_case_whitespace_and_compound_names():
+    """Test the cases exact, case-sensitive filtering used to miss."""
+    matcher = compile_matcher([" peanut"])
+
+    assert matcher.matches("Peanut")
+    assert matcher.matches("peanut butter")
+    assert matcher.matches("Roasted Peanuts")
+    assert not matcher.matches("Honey")
+
+
+def test_matcher_respects_word_boundaries():
+    """Test that an allergen does not match inside an unrelated word."""
+    matcher = compile_matcher(["egg"])
+
+    assert matcher.matches("Boiled eggs")
+    assert not matcher.matches("Eggplant")
+
+
+def test_matcher_catches_es_and_ies_plurals():
+    """Test plurals formed with "es" and "ies", which a trailing "s" misses."""
+    pantry = ["Tomatoes", "Cherry tomatoes", "Potatoes", "Mangoes", "Mango", "Honey"]
+
+    assert filter_ingredients(pantry, ["tomato", "potato", "mango"]) == ["Honey"]
+    assert filter_ingredients(["Peaches", "Peach", "Pear"], ["peaches"]) == ["Pear"]
+    assert filter_ingredients(["Strawberries", "Strawberry jam", "Milk"], ["strawberry"]) == ["Milk"]
+    assert filter_ingredients(["Quiche", "Cheeses"], ["quiches", "cheese"]) == []
+    assert parse_allergies("Tomatoes, Peaches, Berries, cheeses") == ("tomato", "peach", "berry", "cheese")
+    # Terms stored by the old folding still match
+    assert compile_matcher(["tomatoe"]).matches("Cherry tomatoes")
+    assert compile_matcher(["tomatoe"]).matches("tomato")
+
+
+def test_filter_ingredients_keeps_order_and_handles_no_allergies():
+    """Test pantry filtering."""
+    pantry = ["Honey", "Peanut Butter", "Milk", "Ginger"]
+
+    assert filter_ingredients(pantry, ["peanut", "Milk"]) == ["Honey", "Ginger"]
+    assert filter_ingredients(pantry, None) == pantry
+    assert compile_matcher(["Milk"]) is compile_matcher(["milk "])
@@ -0,0 +1,72 @@
+import time
+
+from utils.bitset_index import RemedyIndex
+
+INGREDIENTS = [(1, "honey"), (2, "ginger"), (3, "lemon"), (4, "turmeric"), (5, "milk")]
+
+
+def make_index():
+    index = RemedyIndex()
+    index.update(INGREDIENTS, [
+        (10, "cough", [1, 3]),
+        (11, "cough", [1, 2, 3]),
+        (12, "cough", [4, 5]),
+        (13, "sore throat", [1]),
+    ], upper_id=13)
+    return index
+
+
+def test_exact_matches_ignore_order_case_and_spacing():
+    index = make_index()
+    assert index.exact("Cough", ["Lemon", "honey"]) == 10
+    assert index.exact("cough", [" Ginger", "lemon", "HONEY"]) == 11
+    assert index.exact("cough", ["honey"]) is None
+    assert index.exact("cough", ["honey", "lemon", "garlic"]) is None
+    assert index.exact("fever", ["honey", "lemon"]) is None
+
+
+def test_can_make_returns_remedies_needing_only_pantry_ingredients():
+    index = make_index()
+    assert index.can_make("cough", ["honey", "lemon", "garlic"]) == [10]
+    assert index.can_make("cough", ["honey", "lemon", "ginger", "milk", "turmeric"]) == [10, 11, 12]
+    assert index.can_make("cough", ["milk"]) == []
+    assert index.best("cough", ["honey", "lemon", "ginger", "garlic"]) == 11
+    assert index.best("sore throat", ["lemon"]) is None
+
+
+def test_update_skips_remedies_read_again_and_assigns_new_bits():
+    index = make_index()
+    assert index.refresh_from == 0
+    index.update([(6, "garlic")], [(13, "sore throat", [1]), (14, "cough", [6, 1])], upper_id=14)
+    assert len(index) == 5
+    assert index.exact("cough", ["garlic", "honey"]) == 14
+    assert index.can_make("sore throat", ["honey"]) == [13]
+
+
+def test_masks_wider_than_a_word():
+    index = RemedyIndex()
+    ingredients = [(i, f"ingredient {i}") for i in range(1, 201)]
+    index.update(ingredients, [(1, "cold", [1, 150]), (2, "cold", [2, 70, 199]), (3, "cold", [150])],
+                 upper_id=3)
+    pantry = ["ingredient 1", "ingredient 150", "ingredient 70"]
+    assert index.exact("cold", ["ingredient 150", "ingredient 1"]) == 1
+    assert index.can_make("cold", pantry) == [1, 3]
+    assert index.best("cold", pantry) == 1
+    # Highest bits 149, 198 and 149: 3, 4 and 3 words, plus one id each
+    assert index.memory_bytes() == (3 + 4 + 3) * 8 + 3 * 8
+
+
+def test_lookup_is_fast_with_many_remedies():
+    """Test that a subset lookup stays well under a millisecond with 50000 remedies."""
+    index = RemedyIndex()
+    ingredients = [(i, f"ingredient {i}") for i in range(1, 101)]
+    remedies = ((catalog_id, f"symptom {catalog_id % 50}",
+                 [catalog_id % 100 + 1, catalog_id * 7 % 100 + 1, catalog_id * 13 % 100 + 1])
+                for catalog_id in range(1, 50_001))
+    index.update(ingredients, remedies, upper_id=50_000)
+    pantry = [f"ingredient {i}" for i in range(1, 100, 9)]
+
+    start = time.perf_counter()
+    for _ in range(100):
+        index.best("symptom 7", pantry)
+    assert (time.perf_counter() - start) / 100 < 0.002
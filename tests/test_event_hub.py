@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+from utils.event_hub import EventHub
+
+
+def test_events_reach_only_the_parents_connections():
+    """Test per-parent routing of an event published from another thread."""
+    hub = EventHub()
+
+    async def scenario():
+        hub.bind(asyncio.get_running_loop())
+        mine, other = hub.subscribe(1), hub.subscribe(2)
+        thread = threading.Thread(target=hub.publish, args=(1, '{"type": "remedy_ready"}'))
+        thread.start()
+        thread.join()
+        event = await asyncio.wait_for(mine.get(), 1)
+        await asyncio.sleep(0)
+        return event, len(other._events)
+
+    event, other_pending = asyncio.run(scenario())
+    assert event == '{"type": "remedy_ready"}'
+    assert other_pending == 0
+
+
+def test_slow_connection_drops_its_oldest_events():
+    """Test that the per-connection queue is bounded."""
+    hub = EventHub(max_pending=2)
+
+    async def scenario():
+        hub.bind(asyncio.get_running_loop())
+        subscription = hub.subscribe(1)
+        for i in range(5):
+            hub.publish(1, str(i))
+        await asyncio.sleep(0)
+        return [await subscription.get(), await subscription.get()], subscription
+
+    events, subscription = asyncio.run(scenario())
+    assert events == ["3", "4"]
+    assert subscription.dropped == 3
+
+
+def test_unsubscribe_forgets_the_parent():
+    hub = EventHub()
+
+    async def scenario():
+        subscription = hub.subscribe(1)
+        assert hub.stats()["connections"] == 1
+        hub.unsubscribe(subscription)
+
+    asyncio.run(scenario())
+    assert hub.stats()["connections"] == 0 and hub.stats()["parents"] == 0
@@ -0,0 +1,21 @@
+import json
+
+from database.events import MAX_ERROR_LENGTH, MAX_PAYLOAD, event_payload
+
+
+def test_small_events_are_sent_whole():
+    """Test the "<parent_id>:<event JSON>" payload."""
+    event = {"type": "remedy_ready", "job_id": 1, "result": {"remedy_name": "Tea"}}
+
+    assert event_payload(7, event) == '7:' + json.dumps(event, separators=(",", ":"))
+
+
+def test_large_results_and_errors_are_truncated():
+    """Test that neither a long result nor a long error exceeds the NOTIFY limit."""
+    ready = event_payload(7, {"type": "remedy_ready", "result": {"steps": ["x" * 9000]}})
+    failed = event_payload(7, {"type": "remedy_failed", "result": None, "error": "e" * 9000})
+
+    for payload in (ready, failed):
+        assert len(payload.encode("utf-8")) <= MAX_PAYLOAD
+        assert json.loads(payload.split(":", 1)[1])["truncated"] is True
+    assert len(json.loads(failed.split(":", 1)[1])["error"]) == MAX_ERROR_LENGTH + 3
@@ -0,0 +1,95 @@
+from utils.household_cache import HouseholdContextCache
+
+
+def make_loader(calls):
+    """Builds a loader that records every database read it stands in for."""
+    def loader(kid_id, parent_id):
+        calls.append((parent_id, kid_id))
+        return {"kid_id": kid_id, "symptom": "Cough", "pantry": ("Honey",)}
+    return loader
+
+
+def test_warm_read_does_not_call_loader():
+    """Test that only the first read of a kid hits the loader."""
+    cache = HouseholdContextCache()
+    calls = []
+
+    first = cache.get(7, 1, make_loader(calls))
+    second = cache.get(7, 1, make_loader(calls))
+
+    assert first is second
+    assert calls == [(7, 1)]
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_invalidate_drops_every_kid_of_the_parent():
+    """Test write-through invalidation."""
+    cache = HouseholdContextCache()
+    calls = []
+
+    cache.get(7, 1, make_loader(calls))
+    cache.get(7, 2, make_loader(calls))
+    cache.invalidate(7)
+    cache.get(7, 1, make_loader(calls))
+    cache.get(7, 2, make_loader(calls))
+
+    assert calls == [(7, 1), (7, 2), (7, 1), (7, 2)]
+
+
+def test_missing_kid_is_not_cached():
+    """Test that a 'not found' result is looked up again next time."""
+    cache = HouseholdContextCache()
+    calls = []
+
+    def loader(kid_id, parent_id):
+        calls.append(kid_id)
+
+    assert cache.get(7, 99, loader) is None
+    assert cache.get(7, 99, loader) is None
+    assert calls == [99, 99]
+
+
+def test_load_racing_an_invalidation_is_not_stored():
+    """Test that a load overlapping a write does not cache stale data."""
+    cache = HouseholdContextCache()
+
+    def racing_loader(kid_id, parent_id):
+        cache.invalidate(parent_id)
+        return {"kid_id": kid_id}
+
+    cache.get(7, 1, racing_loader)
+
+    assert cache.stats()["households"] == 0
+    assert cache._versions == {} and cache._loading == {}
+
+
+def test_invalidations_without_loads_in_flight_keep_no_state():
+    """Test that invalidating many parents does not grow the cache."""
+    cache = HouseholdContextCache()
+    for parent_id in range(1000):
+        cache.invalidate(parent_id)
+
+    assert cache._versions == {} and cache.stats()["invalidations"] == 1000
+
+
+def test_least_recently_used_household_is_evicted():
+    """Test that the cache stays bounded."""
+    cache = HouseholdContextCache(max_households=2)
+    calls = []
+
+    for parent_id in (1, 2, 1, 3):
+        cache.get(parent_id, 1, make_loader(calls))
+    cache.get(2, 1, make_loader(calls))
+
+    assert calls == [(1, 1), (2, 1), (3, 1), (2, 1)]
+
+
+def test_entries_expire_after_the_ttl():
+    """Test that a context cached longer than the ttl is loaded again."""
+    cache = HouseholdContextCache(ttl=0.0)
+    calls = []
+
+    cache.get(7, 1, make_loader(calls))
+    cache.get(7, 1, make_loader(calls))
+
+    assert calls == [(7, 1), (7, 1)]
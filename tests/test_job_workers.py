@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+from utils.job_workers import JobWorkerPool
+
+
+def make_pool(jobs, done, **kwargs):
+    lock = threading.Lock()
+
+    def claim():
+        with lock:
+            return jobs.pop(0) if jobs else None
+
+    def process(job):
+        if job == "bad":
+            raise ValueError("provider error")
+        done.append(job)
+
+    return JobWorkerPool(claim, process, **kwargs)
+
+
+def test_queued_jobs_are_processed_and_failures_counted():
+    """Test that the workers drain the queue and survive a failing job."""
+    jobs, done = [1, "bad", 2, 3], []
+    pool = make_pool(jobs, done, concurrency=2, poll_interval=0.01)
+
+    async def scenario():
+        pool.start()
+        for _ in range(200):
+            if pool.processed + pool.failed == 4:
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+
+    asyncio.run(scenario())
+
+    assert sorted(done) == [1, 2, 3]
+    assert pool.stats()["failed"] == 1 and not pool.running
+
+
+def test_notify_wakes_idle_workers_before_the_poll_interval():
+    """Test that a job submitted in-process is picked up without waiting for the next poll."""
+    jobs, done = [], []
+    pool = make_pool(jobs, done, concurrency=1, poll_interval=30)
+
+    async def scenario():
+        pool.start()
+        await asyncio.sleep(0.05)  # the worker found the queue empty and sleeps
+        jobs.append("job")
+        pool.notify()
+        for _ in range(100):
+            if done:
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+
+    asyncio.run(scenario())
+    assert done == ["job"]
+
+
+def test_idle_housekeeping_is_rate_limited():
+    calls = []
+    pool = JobWorkerPool(lambda: None, lambda job: None, concurrency=1, poll_interval=0.01,
+                         on_idle=lambda: calls.append(1), idle_every=60)
+
+    async def scenario():
+        pool.start()
+        await asyncio.sleep(0.1)
+        await pool.stop()
+
+    asyncio.run(scenario())
+    assert calls == [1]
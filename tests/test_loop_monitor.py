@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from utils.loop_monitor import LoopLagMonitor
+
+
+def blocking_handler():
+    """Stands in for a synchronous call made inside an async handler."""
+    time.sleep(0.3)
+
+
+def test_stall_is_measured_and_its_stack_captured():
+    """Test that a blocking call shows up in the histogram and the stall log."""
+    monitor = LoopLagMonitor(interval=0.02, threshold=0.05)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_handler()
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+    asyncio.run(scenario())
+
+    stats = monitor.stats()
+    assert stats["max_lag_ms"] >= 200
+    assert stats["histogram_ms"]["+Inf"] == stats["samples"]
+    assert stats["histogram_ms"]["100"] < stats["samples"]
+    assert stats["stalls"] == 1
+    assert any("blocking_handler" in line for line in monitor.stalls()[0]["stack"])
+
+
+def test_histogram_is_cumulative():
+    """Test bucket accounting."""
+    monitor = LoopLagMonitor(buckets=(1, 10))
+
+    for lag in (0.0005, 0.005, 0.05):
+        monitor.record(lag)
+
+    assert monitor.histogram() == {"1": 1, "10": 2, "+Inf": 3}
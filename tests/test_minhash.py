@@ -0,0 +1,77 @@
+import time
+
+from utils.minhash import SymptomIndex, compact_term, jaccard, same_words, shingles, words
+
+
+def make_index():
+    index = SymptomIndex()
+    for symptom in ("Sore Throat", "Earache", "Cough", "Stomach Ache", "Fever", "Headache"):
+        index.add(symptom)
+    return index
+
+
+def test_spelling_and_spacing_variants_map_to_the_canonical_symptom():
+    """Test exact (compacted) and fuzzy matches."""
+    index = make_index()
+    assert index.match("ear ache") == "Earache"
+    assert index.match("earache ") == "Earache"
+    assert index.match("sore throats") == "Sore Throat"
+    assert index.match("sore throt") == "Sore Throat"
+    assert index.match("stomachache") == "Stomach Ache"
+    assert index.stats()["fuzzy_hits"] == 2
+
+
+def test_different_symptoms_do_not_match():
+    index = make_index()
+    assert index.match("ear pain") is None
+    assert index.match("rash") is None
+    assert index.match("stomach pain") is None
+    assert index.match("") is None
+
+
+def test_symptoms_differing_in_a_word_do_not_match():
+    """Test pairs close in shingles that are different symptoms."""
+    index = SymptomIndex()
+    for symptom in ("Eye infection", "Cut finger", "Ear pain"):
+        index.add(symptom)
+
+    assert index.match("Nose infection") is None
+    assert index.match("Cut finger nail") is None
+    assert index.match("Eye pain") is None
+    assert index.match("eye infections") == "Eye infection"
+    assert index.match("cut fingr") == "Cut finger"
+
+
+def test_same_words_allows_one_typo_per_long_word():
+    """Test the check also applied to fuzzy ingredient matches (database.vocab)."""
+    assert same_words(words("parupu"), words("paruppu"))
+    assert same_words(words("Olive  oil"), words("olve oil"))
+    assert not same_words(words("peanut oil"), words("peanut"))
+    assert not same_words(words("almond oil"), words("almond milk"))
+    assert not same_words(words("rice"), words("ricotta"))
+
+
+def test_canonicalize_adds_new_symptoms_once():
+    index = make_index()
+    assert index.canonicalize("Runny Nose") == "Runny Nose"
+    assert index.canonicalize("runny  nose!") == "Runny Nose"
+    assert len(index) == 7
+
+
+def test_shingles_and_jaccard():
+    assert shingles(compact_term("Cold")) == {"col", "old"}
+    assert shingles("ab") == {"ab"}
+    assert jaccard(shingles("sorethroat"), shingles("sorethroats")) == 8 / 9
+
+
+def test_lookup_is_fast_with_many_symptoms():
+    """Test that a fuzzy lookup stays well under a millisecond with 2000 symptoms."""
+    index = SymptomIndex()
+    for i in range(2000):
+        index.add(f"symptom {i:05d} variant {i * 7919 % 10007}")
+    index.add("Sore Throat")
+
+    start = time.perf_counter()
+    for _ in range(100):
+        assert index.match("sore throt") == "Sore Throat"
+    assert (time.perf_counter() - start) / 100 < 0.002
@@ -0,0 +1,56 @@
+import pytest
+
+from utils.pagination import (decode_cursor, encode_cursor, parse_fields,
+                              select_columns, split_page)
+
+FIELDS = {"id": "id", "name": "name", "symptom": "symptom_name"}
+
+
+def test_cursor_round_trip():
+    """Test that ids and string keys survive encoding."""
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(encode_cursor("sore throat")) == "sore throat"
+    assert decode_cursor(None) is None
+
+
+def test_decode_cursor_rejects_garbage():
+    """Test that a tampered cursor is reported as a ValueError."""
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor!")
+
+
+def test_decode_cursor_checks_the_key_type():
+    """Test that a well-formed cursor holding a key of the wrong type is rejected."""
+    assert decode_cursor(encode_cursor(7), int) == 7
+    assert decode_cursor(encode_cursor("honey"), str) == "honey"
+    for value in ("7", [7], {"id": 7}, True, None):
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor(value), int)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(7), str)
+
+
+def test_parse_fields_keeps_declared_order_and_rejects_unknown():
+    """Test field projection parsing."""
+    assert parse_fields(None, FIELDS) == ["id", "name", "symptom"]
+    assert parse_fields("symptom, name", FIELDS) == ["name", "symptom"]
+    with pytest.raises(ValueError):
+        parse_fields("name,password", FIELDS)
+
+
+def test_select_columns_always_includes_key():
+    """Test that the keyset column is selected even when not requested."""
+    assert select_columns(["symptom"], FIELDS, "id") == "id, symptom_name"
+
+
+def test_split_page_returns_next_cursor_only_when_more_rows():
+    """Test that the extra row read past the limit produces a cursor."""
+    rows = [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    page, next_cursor = split_page(rows, 2, "id")
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor) == 2
+
+    page, next_cursor = split_page(rows, 3, "id")
+    assert page == rows
+    assert next_cursor is None
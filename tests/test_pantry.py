@@ -0,0 +1,30 @@
+from utils.pantry import diff_pantry
+
+
+def test_diff_pantry_inserts_flips_and_deletes():
+    """Test that new, flipped and missing ingredients land in the right bucket."""
+    stored = {"Honey": True, "Ginger": False, "Garlic": True}
+    incoming = [("Honey", True), ("Ginger", True), ("Lemon", False)]
+
+    diff = diff_pantry(stored, incoming)
+
+    assert diff.inserts == [("Lemon", False)]
+    assert diff.updates == [("Ginger", True)]
+    assert diff.deletes == ["Garlic"]
+    assert diff.upserts == [("Lemon", False), ("Ginger", True)]
+
+
+def test_diff_pantry_collapses_duplicates_and_whitespace():
+    """Test that duplicate names in the payload become a single row, last one winning."""
+    diff = diff_pantry({}, [(" Honey ", True), ("Honey", False), ("   ", True)])
+
+    assert diff.inserts == [("Honey", False)]
+    assert diff.updates == []
+    assert diff.deletes == []
+
+
+def test_diff_pantry_no_changes():
+    """Test that an unchanged pantry produces an empty diff."""
+    diff = diff_pantry({"Honey": True}, [("Honey", True)])
+
+    assert diff == ([], [], [])
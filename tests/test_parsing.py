@@ -0,0 +1,51 @@
+import pytest
+
+from ai_clients.parsing import RemedyInstruction, TruncatedRemedyError, parse_remedy, repair_truncated_json
+
+REMEDY = '{"remedy_name": "Honey Lemon Tea", "steps": ["Warm water", "Add honey"]}'
+
+
+def test_parse_plain_and_fenced_output():
+    """Test that fences and leading chatter are stripped."""
+    expected = RemedyInstruction(remedy_name="Honey Lemon Tea", steps=["Warm water", "Add honey"])
+
+    assert parse_remedy(REMEDY) == expected
+    assert parse_remedy(f"```json\n{REMEDY}\n```") == expected
+    assert parse_remedy(f"Here is a remedy:\n{REMEDY}") == expected
+
+
+def test_parse_repairs_output_truncated_after_the_steps():
+    """Test output cut off by the token limit once the steps are complete."""
+    assert parse_remedy('{"remedy_name": "Ginger Tea", "steps": ["Boil"], "no').steps == ["Boil"]
+    assert parse_remedy('{"remedy_name": "Ginger Tea", "steps": ["Boil"]').remedy_name == "Ginger Tea"
+
+
+def test_parse_rejects_output_truncated_inside_the_steps():
+    """Test that a half-written or possibly missing step is never accepted."""
+    with pytest.raises(TruncatedRemedyError):
+        parse_remedy('```json\n{"remedy_name": "Honey Lemon Tea", "steps": ["Warm water", "Add ho')
+    with pytest.raises(TruncatedRemedyError):
+        parse_remedy('{"remedy_name": "Honey Lemon Tea", "steps": ["Warm water", ')
+    with pytest.raises(TruncatedRemedyError):
+        parse_remedy('{"remedy_name": "Honey Le')
+
+
+def test_repair_leaves_complete_json_unchanged():
+    """Test that valid documents are not modified."""
+    assert repair_truncated_json(REMEDY) == REMEDY
+    assert repair_truncated_json('{"remedy_name": "Tea", "steps": [') == '{"remedy_name": "Tea", "steps": []}'
+
+
+def test_parse_unwraps_schema_shaped_output():
+    """Test the schema-shaped answer Gemini sometimes returns."""
+    remedy = parse_remedy('{"properties": {"remedy_name": {"title": "Warm Compress"}}, "steps": ["Warm a cloth"]}')
+
+    assert remedy == RemedyInstruction(remedy_name="Warm Compress", steps=["Warm a cloth"])
+
+
+def test_parse_rejects_non_remedies():
+    """Test that output that is not a remedy raises ValueError."""
+    with pytest.raises(ValueError):
+        parse_remedy("No remedy possible with available ingredients.")
+    with pytest.raises(ValueError):
+        parse_remedy('{"steps": ["Boil"]}')
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+
+from database.prepared import PreparedQuery, run
+
+
+class FakeCursor:
+    def __init__(self, prepared):
+        self.connection = SimpleNamespace(prepared=prepared)
+        self.statements = []
+
+    def execute(self, query, vars=None):
+        self.statements.append((query, vars))
+
+
+def test_placeholders_are_numbered_for_prepare():
+    """Test the PREPARE and EXECUTE texts built from a %s statement."""
+    query = PreparedQuery("catalog_remedy",
+                          "SELECT 1 FROM remedy_catalog WHERE symptom = %s AND name LIKE 'a%%' AND key = %s")
+    assert query.arity == 2
+    assert query.prepare_sql == ("PREPARE catalog_remedy AS SELECT 1 FROM remedy_catalog"
+                                 " WHERE symptom = $1 AND name LIKE 'a%' AND key = $2")
+    assert query.execute_sql == "EXECUTE catalog_remedy(%s, %s)"
+    assert PreparedQuery("no_args", "SELECT 1").execute_sql == "EXECUTE no_args"
+
+
+def test_named_placeholders_and_bad_names_are_rejected():
+    with pytest.raises(ValueError):
+        PreparedQuery("ctx", "SELECT %(kid_id)s")
+    with pytest.raises(ValueError):
+        PreparedQuery("drop table; --", "SELECT 1")
+
+
+def test_statement_is_prepared_once_per_connection():
+    """Test that PREPARE is sent only the first time on a connection."""
+    query = PreparedQuery("kid_of_parent", "SELECT 1 FROM kids_profile WHERE id = %s AND parent_id = %s")
+    cursor = FakeCursor(set())
+    run(cursor, query, (1, 2))
+    run(cursor, query, (3, 4))
+    assert cursor.statements == [
+        (query.prepare_sql, None),
+        (query.execute_sql, (1, 2)),
+        (query.execute_sql, (3, 4)),
+    ]
+
+
+def test_connection_without_prepared_set_runs_the_plain_statement():
+    query = PreparedQuery("kid_of_parent", "SELECT 1 FROM kids_profile WHERE id = %s")
+    cursor = FakeCursor(None)
+    run(cursor, query, (1,))
+    assert cursor.statements == [(query.sql, (1,))]
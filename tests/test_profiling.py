@@ -0,0 +1,43 @@
+import threading
+import time
+
+from utils.profiling import MemoryProfiler, sample_cpu
+
+
+def busy_loop(stop):
+    """Keeps a thread on the CPU until stopped."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sample_cpu_returns_collapsed_stacks():
+    """Test that a busy thread dominates the collapsed output."""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        folded = sample_cpu(0.2, interval=0.002)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = [line for line in folded.splitlines() if "busy_loop" in line]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert stack.startswith("busy;") and int(count) > 0
+
+
+def test_memory_diff_points_at_allocating_line():
+    """Test tracemalloc snapshots and their diff."""
+    profiler = MemoryProfiler()
+    profiler.start()
+    try:
+        profiler.snapshot("before")
+        retained = [bytearray(1024) for _ in range(2000)]
+        profiler.snapshot("after")
+        changes = profiler.diff("before", "after", limit=5)
+    finally:
+        profiler.stop()
+
+    assert retained and any("test_profiling.py" in change for change in changes)
+    assert profiler.snapshot_names() == []
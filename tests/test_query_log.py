@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from database.prepared import PreparedQuery
+from database.query_log import QueryLog, bind_request, is_explainable, reset_request
+
+
+def test_only_slow_statements_are_logged_with_their_route():
+    """Test the threshold and the route tag."""
+    log = QueryLog(slow_threshold=0.1, explain_sample_rate=0.0)
+    token = bind_request({"path": "/remedies/get_kitchen_remedy/open_ai/5",
+                          "route": SimpleNamespace(path="/remedies/get_kitchen_remedy/open_ai/{kid_id}")})
+    try:
+        assert log.record("SELECT 1", 0.01) is None
+        entry = log.record("SELECT * FROM remedy_catalog", 0.5)
+    finally:
+        reset_request(token)
+
+    assert entry["route"] == "/remedies/get_kitchen_remedy/open_ai/{kid_id}"
+    assert entry["duration_ms"] == 500.0 and "plan" not in entry
+    assert log.stats()["statements"] == 2 and log.stats()["slow_statements"] == 1
+    assert log.slow_queries() == [entry]
+
+
+def test_sampled_slow_statements_capture_a_plan():
+    """Test that the plan callback runs only for sampled slow statements."""
+    calls = []
+    log = QueryLog(slow_threshold=0.1, explain_sample_rate=1.0)
+
+    def explain():
+        calls.append(1)
+        return "Seq Scan on remedy_catalog"
+
+    log.record("SELECT 1", 0.01, explain)
+    entry = log.record("SELECT * FROM remedy_catalog", 0.2, explain)
+
+    assert calls == [1]
+    assert entry["plan"] == "Seq Scan on remedy_catalog" and entry["route"] is None
+
+
+def test_only_plain_reads_are_explainable():
+    """Test that statements with side effects are never run again."""
+    assert is_explainable("SELECT * FROM kids_profile WHERE id = 1")
+    assert is_explainable("WITH pantry AS (SELECT 1) SELECT * FROM pantry")
+    assert not is_explainable("SELECT * FROM ingredients WHERE parent_id = 1 FOR UPDATE")
+    assert not is_explainable("WITH moved AS (DELETE FROM remedies RETURNING *) SELECT 1")
+    assert not is_explainable("INSERT INTO remedy_history VALUES (1)")
+
+
+def test_execute_is_explainable_only_for_read_only_prepared_statements():
+    """Test EXPLAIN capture for the EXECUTE of a prepared statement."""
+    PreparedQuery("log_test_read", "SELECT * FROM kids_profile WHERE id = %s")
+    PreparedQuery("log_test_write", "UPDATE kids_profile SET symptom = %s WHERE id = %s")
+
+    assert is_explainable("EXECUTE log_test_read(1)")
+    assert not is_explainable("EXECUTE log_test_write('cough', 1)")
+    assert not is_explainable("EXECUTE unknown_statement(1)")
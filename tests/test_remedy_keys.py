@@ -0,0 +1,22 @@
+from utils.remedy_keys import VOCAB_KEY_SQL, content_hash, ingredient_key, vocab_key
+
+
+def test_ingredient_key_ignores_order():
+    """Test that the same pantry in a different order maps to the same key."""
+    assert ingredient_key(["Honey", "Ginger"]) == ingredient_key(["Ginger", "Honey"])
+
+
+def test_content_hash_addresses_remedy_content():
+    """Test that identical remedies share a hash and different steps do not."""
+    steps = ["Mix honey in warm water.", "Sip slowly."]
+    first = content_hash("Cough", ["Honey", "Ginger"], "Honey tea", steps)
+
+    assert first == content_hash("Cough", ["Ginger", "Honey"], "Honey tea", list(steps))
+    assert first != content_hash("Cough", ["Honey", "Ginger"], "Honey tea", steps[:1])
+    assert len(first) == 32
+
+
+def test_vocab_key_collapses_case_and_whitespace():
+    """Test the vocabulary key shared by the resolver and the SQL backfill."""
+    assert vocab_key("  Sore \t Throat ") == vocab_key("sore throat") == "sore throat"
+    assert VOCAB_KEY_SQL.format("name") == "lower(btrim(regexp_replace(name, '\\s+', ' ', 'g')))"
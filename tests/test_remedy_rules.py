@@ -0,0 +1,33 @@
+from utils.remedy_rules import LocalRemedyEngine
+
+
+def make_engine():
+    engine = LocalRemedyEngine()
+    engine.load()
+    return engine
+
+
+def test_most_specific_rule_matches_case_insensitively():
+    """Test that the richest rule the pantry allows is chosen."""
+    engine = make_engine()
+
+    rule = engine.match("Cough ", ["Ginger", " honey", "Rice"], age=5)
+
+    assert rule.remedy_name == "Ginger Honey Tea"
+
+
+def test_age_and_allergies_exclude_rules():
+    """Test that honey rules are skipped for babies and allergic kids."""
+    engine = make_engine()
+
+    assert engine.match("Sore Throat", ["Honey", "Lemon"], age=0) is None
+    assert engine.match("Sore Throat", ["Honey", "Lemon"], allergies=["Lemon"], age=4) is None
+
+
+def test_unknown_symptom_falls_back_and_coverage_is_reported():
+    """Test that unmatched requests count against the coverage rate."""
+    engine = make_engine()
+
+    assert engine.match("Ear Pain", ["Water"], age=3).remedy_name == "Warm Compress for Ear Pain"
+    assert engine.match("Rash", ["Water"], age=3) is None
+    assert engine.stats()["coverage_rate"] == 0.5
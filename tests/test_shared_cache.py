@@ -0,0 +1,43 @@
+from utils.shared_cache import RemedyCache, SharedCache
+
+REMEDY = {"content_hash": "abc", "remedy_name": "Honey Lemon Tea", "steps": ["Warm water"],
+          "symptom": "Cough", "ingredients": ["Honey", "Lemon"]}
+
+
+def test_entries_are_visible_to_other_workers(tmp_path):
+    """Test that a value written by one worker's cache is read by another's."""
+    path = str(tmp_path / "remedies.db")
+    first = RemedyCache(shared=SharedCache(path))
+    second = RemedyCache(shared=SharedCache(path))
+
+    first.put("Cough|key", REMEDY)
+
+    assert second.get("Cough|key") == REMEDY
+    assert second.get("Fever|key") is None
+    assert second.shared.stats()["hits"] == 1
+
+
+def test_shared_tier_is_size_bounded(tmp_path):
+    """Test that eviction keeps only the most recently written entries."""
+    shared = SharedCache(str(tmp_path / "remedies.db"), max_entries=3, evict_every=1)
+
+    for i in range(10):
+        shared.put(f"key{i}", {"i": i})
+
+    assert len(shared) == 3
+    assert shared.get("key0") is None
+    assert shared.get("key9") == {"i": 9}
+
+
+def test_local_tier_is_an_lru():
+    """Test the per-process tier without a shared tier."""
+    cache = RemedyCache(max_local_entries=2)
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["shared"] is None
@@ -0,0 +1,27 @@
+from utils.shopping import is_provider_error, parse_shopping_list
+
+
+def test_parse_comma_separated_list():
+    """Test the plain comma separated format the prompts ask for."""
+    assert parse_shopping_list('"Honey, Lemon, and Ginger."') == ["honey", "lemon", "ginger"]
+
+
+def test_parse_bulleted_list_and_duplicates():
+    """Test bulleted / numbered output and case-insensitive de-duplication."""
+    text = "- Honey\n* Warm water\n1. honey\n2) Salt"
+
+    assert parse_shopping_list(text) == ["honey", "warm water", "salt"]
+
+
+def test_parse_error_message_yields_no_items():
+    """Test that provider error strings are not turned into items."""
+    assert parse_shopping_list("Error: Could not generate shopping list.") == []
+    assert parse_shopping_list("") == []
+
+
+def test_is_provider_error():
+    """Test that failures are told apart from shopping lists."""
+    assert is_provider_error("Error: OpenAI API call failed.")
+    assert is_provider_error('"error: Could not generate shopping list."')
+    assert is_provider_error(None)
+    assert not is_provider_error("Honey, Lemon")
@@ -0,0 +1,93 @@
+import json
+import os
+import signal
+import threading
+
+import pytest
+
+from utils import tracing
+from utils.tracing import Span, SpanExporter, server_timing, span, traced
+
+
+@pytest.fixture(autouse=True)
+def fresh_exporter(monkeypatch):
+    """Gives every test its own exporter."""
+    monkeypatch.setattr(tracing, "exporter", SpanExporter(max_spans=10))
+
+
+def test_spans_nest_and_feed_server_timing():
+    """Test that phases are children of the request span and summed by name."""
+    with span("http") as root:
+        with span("db"):
+            pass
+        with span("db"):
+            pass
+        with span("llm.openai") as llm:
+            pass
+
+    assert llm.parent_id == root.span_id and llm.trace_id == root.trace_id
+    header = server_timing(root)
+    assert header.startswith("db;dur=")
+    assert "llm.openai;dur=" in header and header.count("db;") == 1
+    assert header.split(", ")[-1].startswith("total;dur=")
+
+
+def test_errors_are_recorded_and_reraised():
+    """Test that a failing phase is exported with an error status."""
+    @traced("parse")
+    def parse():
+        raise ValueError("bad json")
+
+    with pytest.raises(ValueError):
+        parse()
+
+    exported = tracing.exporter.recent(1)[0]
+    assert exported["name"] == "parse"
+    assert exported["status"] == {"code": 2, "message": "ValueError: bad json"}
+
+
+def test_file_export_uses_otlp_json(tmp_path, monkeypatch):
+    """Test the JSON Lines export."""
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(tracing, "exporter", SpanExporter(max_spans=10, path=str(path)))
+
+    with span("http", path="/remedies"):
+        pass
+    tracing.exporter.flush()
+
+    exported = json.loads(path.read_text().splitlines()[0])
+    assert exported["name"] == "http" and exported["parentSpanId"] == ""
+    assert exported["attributes"] == [{"key": "path", "value": {"stringValue": "/remedies"}}]
+    assert int(exported["endTimeUnixNano"]) >= int(exported["startTimeUnixNano"])
+
+
+def test_file_export_drops_spans_when_the_writer_falls_behind(tmp_path):
+    """Test that export never blocks on a full queue of spans to write."""
+    exporter = SpanExporter(max_spans=10, path=str(tmp_path / "spans.jsonl"), max_pending=2)
+    exporter._thread = threading.current_thread()  # a writer that never drains
+
+    for _ in range(3):
+        exporter.export(Span("db", "0" * 32, None, {}))
+
+    assert exporter.exported == 3 and exporter.dropped == 1
+    assert len(exporter.recent()) == 3
+
+
+def test_forked_child_writes_its_spans_with_its_own_thread(tmp_path):
+    """Test that a worker forked after the master exported spans still writes them."""
+    path = tmp_path / "spans.jsonl"
+    exporter = SpanExporter(max_spans=10, path=str(path))
+    exporter.export(Span("init_db", "0" * 32, None, {}))
+    exporter.flush()
+
+    pid = os.fork()
+    if pid == 0:
+        signal.alarm(5)  # never hang the test run
+        exporter.reset_after_fork()
+        exporter.export(Span("worker", "1" * 32, None, {}))
+        exporter.flush()
+        os._exit(0)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["init_db", "worker"]
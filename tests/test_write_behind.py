@@ -0,0 +1,99 @@
+from utils.write_behind import WriteBehindQueue
+
+
+class FakeConnection:
+    """Stands in for a database connection and records committed batches."""
+
+    def __init__(self, log):
+        self.log = log
+        self.pending = []
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.log.append(self.pending)
+
+    def rollback(self):
+        self.pending = []
+
+    def close(self):
+        pass
+
+
+def make_queue(log, **kwargs):
+    writer = WriteBehindQueue(lambda: FakeConnection(log), **kwargs)
+    writer.register("remedies", lambda cursor, rows: cursor.pending.extend(rows))
+    return writer
+
+
+def test_rows_are_written_synchronously_when_not_started():
+    """Test that submitting without a running writer still persists the row."""
+    log = []
+    writer = make_queue(log)
+
+    assert writer.submit("remedies", 1) is False
+    assert log == [[1]]
+
+
+def test_stop_drains_queued_rows_in_batches():
+    """Test that queued rows are flushed in batches and drained on shutdown."""
+    log = []
+    writer = make_queue(log, flush_size=2, flush_interval=30)
+    writer.start()
+
+    for row in range(5):
+        assert writer.submit("remedies", row) is True
+    writer.stop()
+
+    assert sorted(row for batch in log for row in batch) == [0, 1, 2, 3, 4]
+    assert all(len(batch) <= 2 for batch in log[:-1])
+    assert writer.stats()["written"] == 5
+
+
+def test_failed_flush_is_counted():
+    """Test that a failing flush function is reported instead of raising."""
+    log = []
+    writer = WriteBehindQueue(lambda: FakeConnection(log))
+
+    def broken(cursor, rows):
+        raise RuntimeError("boom")
+
+    writer.register("remedies", broken)
+    writer.submit("remedies", 1)
+
+    assert log == []
+    assert writer.stats()["failed"] == 1
+
+
+def test_failed_batch_is_retried_row_by_row():
+    """Test that the good rows of a batch with one bad row are still written."""
+    log = []
+    writer = WriteBehindQueue(lambda: FakeConnection(log), flush_size=10, flush_interval=30)
+
+    def flush(cursor, rows):
+        if 2 in rows:
+            raise RuntimeError("bad row")
+        cursor.pending.extend(rows)
+
+    writer.register("remedies", flush)
+    writer.start()
+    for row in range(4):
+        writer.submit("remedies", row)
+    writer.stop()
+
+    assert sorted(row for batch in log for row in batch) == [0, 1, 3]
+    assert writer.stats()["written"] == 3
+    assert writer.stats()["failed"] == 1
+
+
+def test_full_queue_writes_rows_synchronously():
+    """Test that a row submitted to a full queue is written, not lost."""
+    log = []
+    writer = make_queue(log, max_pending=1, flush_interval=30, put_timeout=0.01)
+    writer._thread = type("Alive", (), {"is_alive": lambda self: True})()
+
+    assert writer.submit("remedies", 1) is True
+    assert writer.submit("remedies", 2) is False
+    assert writer.stats()["sync_writes"] == 1
+    assert log == [[2]]
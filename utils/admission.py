@@ -0,0 +1,177 @@
+"""
+Admission control for the AI provider calls.
+
+A global limiter bounds the total number of concurrent LLM calls of this
+worker and one limiter per provider bounds the calls to each provider.
+Each limiter has a bounded wait queue and a wait timeout; a request that
+finds the queue full, or waits too long, fails fast with OverloadedError
+so it can be answered with a 503 and a Retry-After header.
+"""
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable
+
+
+class OverloadedError(Exception):
+    """Raised when a limiter cannot admit a request."""
+
+    def __init__(self, limiter: str, retry_after: int, reason: str):
+        super().__init__(f"{limiter} is overloaded ({reason}), retry in {retry_after}s")
+        self.limiter = limiter
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """
+        Bounds the number of concurrent holders of a slot.
+
+        Args:
+            name (str): Name used in errors and metrics.
+            max_concurrency (int): Number of requests allowed to run at once.
+            max_queue (int): Number of requests allowed to wait for a slot;
+            further requests are rejected immediately.
+            timeout (float): Maximum time to wait for a slot, in seconds.
+            retry_after (int): Seconds suggested to rejected clients.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int,
+                 timeout: float, retry_after: int = 5):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def acquire(self):
+        """
+            Waits for a slot.
+
+            Raises:
+                OverloadedError: If the wait queue is full or the wait times out.
+        """
+        if not self._semaphore.locked():
+            # A slot is free: take it without queueing
+            await self._semaphore.acquire()
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise OverloadedError(self.name, self.retry_after, "queue full")
+
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError as exc:
+            self.timed_out += 1
+            raise OverloadedError(self.name, self.retry_after, "wait timed out") from exc
+        finally:
+            self.waiting -= 1
+            waited = time.perf_counter() - start
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        self.in_flight += 1
+        self.admitted += 1
+
+    def release(self):
+        """Gives a slot back."""
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds a slot for the duration of the ``async with`` block."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        """Returns queue depth, concurrency and wait time metrics."""
+        attempts = self.admitted + self.timed_out
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self._wait_total / attempts * 1000, 3) if attempts else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 3),
+        }
+
+
+class AdmissionController:
+    """
+        A global limiter plus one limiter per provider. A request takes a
+        slot of its provider first and then a global slot, so requests
+        queued for a saturated provider do not hold global slots.
+    """
+
+    def __init__(self, global_limiter: ConcurrencyLimiter,
+                 provider_limiters: Dict[str, ConcurrencyLimiter]):
+        self.global_limiter = global_limiter
+        self.provider_limiters = provider_limiters
+
+    @classmethod
+    def from_env(cls, providers: Iterable[str]) -> "AdmissionController":
+        """
+            Builds the limiters from environment variables:
+            REMEDY_MAX_CONCURRENCY / REMEDY_MAX_QUEUE for the global limiter,
+            <PROVIDER>_MAX_CONCURRENCY / <PROVIDER>_MAX_QUEUE per provider,
+            REMEDY_QUEUE_TIMEOUT and REMEDY_RETRY_AFTER for all of them.
+        """
+        timeout = float(os.getenv("REMEDY_QUEUE_TIMEOUT", "10"))
+        retry_after = int(os.getenv("REMEDY_RETRY_AFTER", "5"))
+        global_limiter = ConcurrencyLimiter(
+            "global",
+            int(os.getenv("REMEDY_MAX_CONCURRENCY", "32")),
+            int(os.getenv("REMEDY_MAX_QUEUE", "64")),
+            timeout, retry_after)
+        provider_limiters = {
+            provider: ConcurrencyLimiter(
+                provider,
+                int(os.getenv(f"{provider.upper()}_MAX_CONCURRENCY", "8")),
+                int(os.getenv(f"{provider.upper()}_MAX_QUEUE", "16")),
+                timeout, retry_after)
+            for provider in providers
+        }
+        return cls(global_limiter, provider_limiters)
+
+    @asynccontextmanager
+    async def slot(self, provider: str):
+        """
+            Holds a slot of ``provider`` and a global slot. The provider slot
+            is taken first, so requests queued behind a slow or saturated
+            provider do not hold global capacity the other providers need.
+
+            Raises:
+                OverloadedError: If either limiter cannot admit the request.
+        """
+        async with self.provider_limiters[provider].slot():
+            async with self.global_limiter.slot():
+                yield
+
+    def stats(self) -> dict:
+        """Returns the metrics of every limiter."""
+        return {
+            "global": self.global_limiter.stats(),
+            **{name: limiter.stats() for name, limiter in self.provider_limiters.items()},
+        }
+
+
+admission = AdmissionController.from_env(["openai", "gemini", "groq"])
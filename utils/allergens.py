@@ -0,0 +1,148 @@
+"""
+Normalized allergy handling shared by the kids router, the remedy context
+loader and every AI client.
+
+Allergies are normalized once (case-folded, punctuation and whitespace
+collapsed, plurals folded: "Peanuts", "Tomatoes", "Strawberries") and a kid's allergies are compiled into
+an AllergenMatcher: an exact set lookup for whole ingredient names plus a
+single precompiled alternation that finds any allergen as a whole word
+inside longer names, so " Peanuts" filters "peanut butter" but "egg" does
+not filter "eggplant". Matchers are cached per allergy set, so filtering a
+pantry costs one set lookup or regex scan per ingredient.
+"""
+import re
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SEPARATORS = re.compile(r"[,;\n]+")
+# Singulars taking "es" in the plural: "tomatoes", "peaches", "boxes"
+_ES_PLURAL = re.compile(r"(?:o|x|z|ch|sh|ss)es$")
+_ES_SINGULAR = re.compile(r"(?:o|x|z|ch|sh|ss)$")
+
+
+def _words(term: str) -> List[str]:
+    return _NON_WORD.sub(" ", term.casefold()).split()
+
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or not word.endswith("s") or word.endswith("ss"):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if _ES_PLURAL.search(word):
+        return word[:-2]
+    return word[:-1]
+
+
+def _forms(term: str) -> List[str]:
+    """The singular and plural spellings of a normalized term to search for."""
+    forms = {term, term + "s", term + "es"}
+    if term.endswith("y"):
+        forms.add(term[:-1] + "ies")
+    elif term.endswith("ie"):
+        forms.add(term[:-2] + "y")
+    if _ES_SINGULAR.search(term):
+        # "quiche" and "quiches" were folded to "quich"
+        forms.add(term + "e")
+    elif term.endswith("e") and _ES_SINGULAR.search(term[:-1]):
+        # Terms folded before "es" plurals were: "tomatoe"
+        forms.add(term[:-1])
+    return sorted(forms)
+
+
+def normalize_allergen(term: str) -> str:
+    """
+        Normalizes an allergen or ingredient name: case-folds it, collapses
+        punctuation and whitespace, and folds the plural of the last word
+        ("Peanuts" -> "peanut", "Tomatoes" -> "tomato", "Berries" -> "berry").
+    """
+    words = _words(term)
+    if words:
+        words[-1] = _singular(words[-1])
+    return " ".join(words)
+
+
+def parse_allergies(allergies: Optional[str]) -> Tuple[str, ...]:
+    """
+        Parses the free-text allergies of a kid ("Peanuts, milk ;egg") into
+        distinct normalized terms, in their original order.
+    """
+    if not allergies:
+        return ()
+    terms = []
+    for raw in _SEPARATORS.split(allergies):
+        term = normalize_allergen(raw)
+        if term and term not in terms:
+            terms.append(term)
+    return tuple(terms)
+
+
+class AllergenMatcher:
+    """
+        Tells whether an ingredient contains any of a fixed set of allergens.
+    """
+    __slots__ = ("terms", "_pattern")
+
+    def __init__(self, allergens: Iterable[str]):
+        self.terms: FrozenSet[str] = frozenset(
+            term for term in (normalize_allergen(a) for a in allergens) if term)
+        if self.terms:
+            # Longest first so "peanut butter" wins over "peanut" in the alternation
+            forms = {form for term in self.terms for form in _forms(term)}
+            alternatives = "|".join(re.escape(form) for form in
+                                    sorted(forms, key=len, reverse=True))
+            self._pattern = re.compile(rf"\b(?:{alternatives})\b")
+        else:
+            self._pattern = None
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def matches(self, ingredient: str) -> bool:
+        """Returns True if the ingredient is, or contains, one of the allergens."""
+        if self._pattern is None:
+            return False
+        words = _words(ingredient)
+        if not words:
+            return False
+        # The pattern has every plural form, so it searches the unfolded name
+        if self._pattern.search(" ".join(words)) is not None:
+            return True
+        words[-1] = _singular(words[-1])
+        return " ".join(words) in self.terms
+
+    def filter(self, ingredients: Iterable[str]) -> List[str]:
+        """Returns the ingredients that are safe, in their original order."""
+        if self._pattern is None:
+            return list(ingredients)
+        return [ingredient for ingredient in ingredients if not self.matches(ingredient)]
+
+
+@lru_cache(maxsize=4096)
+def _compile(terms: FrozenSet[str]) -> AllergenMatcher:
+    return AllergenMatcher(terms)
+
+
+def compile_matcher(allergies: Iterable[str]) -> AllergenMatcher:
+    """
+        Returns the (cached) matcher for a set of allergies.
+
+        Args:
+            allergies (iterable): Allergy terms, in any case or plural form.
+    """
+    return _compile(frozenset(normalize_allergen(a) for a in allergies or () if a))
+
+
+def filter_ingredients(ingredients: Iterable[str], allergies: Optional[Iterable[str]]) -> List[str]:
+    """
+        Removes every ingredient matching one of the allergies.
+
+        Args:
+            ingredients (iterable): The available ingredients.
+            allergies (iterable): The kid's allergies, or None.
+
+        Returns:
+            list: The ingredients that are safe for the kid.
+    """
+    return compile_matcher(allergies or ()).filter(ingredients)
@@ -1,15 +1,15 @@
 # Get current user from session
 from http.client import HTTPException
 from fastapi import APIRouter, Depends, HTTPException, status
-from starlette.requests import Request
+from starlette.requests import HTTPConnection
 
 
-async def get_current_user(request: Request):
+async def get_current_user(request: HTTPConnection):
     """
         Helper function to retrieve the currently authenticated user from the session.
 
         Args:
-            request (Request): The request object containing session data.
+            request (HTTPConnection): The request or WebSocket containing session data.
 
         Returns:
             dict: The user data (id and username) if authenticated,
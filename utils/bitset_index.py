@@ -0,0 +1,284 @@
+"""
+A compact in-memory index of the remedy catalog for pantry matching.
+
+Every ingredient used by a catalog remedy gets a bit, the most frequent
+ingredients the lowest bits, and every remedy is stored as the bitset of
+the ingredients it was generated for plus its catalog id. A pantry is
+turned into a bitset the same way, so "can this remedy be made now" is
+``mask & ~pantry == 0`` and "was it generated for exactly this pantry" is
+``mask == pantry``.
+
+Remedies are grouped by symptom, and within a symptom bucketed by their
+highest bit, i.e. their rarest ingredient. A remedy whose rarest
+ingredient is not in the pantry cannot be made, so a lookup only scans
+the buckets of the pantry's own bits. Buckets keep masks and ids in flat
+``array`` columns, 8 bytes per id and per 64-bit word of mask, with no
+Python object per remedy, and symptom and ingredient keys are interned.
+"""
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.remedy_keys import vocab_key
+
+_WORD_BITS = 64
+_WORD_MASK = (1 << _WORD_BITS) - 1
+
+
+class _Bucket:
+    """
+        The remedies of a symptom sharing their highest bit. Masks are
+        stored as ``words`` 64-bit words per remedy, lowest word first.
+    """
+    __slots__ = ("words", "masks", "ids")
+
+    def __init__(self, high_bit: int):
+        self.words = high_bit // _WORD_BITS + 1 if high_bit >= 0 else 1
+        self.masks = array("Q")
+        self.ids = array("q")
+
+    def append(self, catalog_id: int, mask: int):
+        # Words first: concurrent scans iterate ids and index into masks
+        self.masks.extend(_split(mask, self.words))
+        self.ids.append(catalog_id)
+
+    def find(self, mask: int) -> Optional[int]:
+        """Returns the id of the first remedy with exactly this mask, or None."""
+        masks, words = self.masks, self.words
+        if words == 1:
+            for remedy_mask, catalog_id in zip(masks, self.ids):
+                if remedy_mask == mask:
+                    return catalog_id
+            return None
+        wanted = _split(mask, words)
+        for index, catalog_id in enumerate(self.ids):
+            base = index * words
+            if masks[base:base + words].tolist() == wanted:
+                return catalog_id
+        return None
+
+    def scan(self, missing: int):
+        """Yields the (mask, id) of the remedies sharing no bit with ``missing``."""
+        masks, words = self.masks, self.words
+        if words == 1:
+            missing &= _WORD_MASK
+            for remedy_mask, catalog_id in zip(masks, self.ids):
+                if not remedy_mask & missing:
+                    yield remedy_mask, catalog_id
+            return
+        missing_words = _split(missing, words)
+        for index, catalog_id in enumerate(self.ids):
+            base = index * words
+            for word in range(words):
+                if masks[base + word] & missing_words[word]:
+                    break
+            else:
+                remedy_mask = 0
+                for word in range(base + words - 1, base - 1, -1):
+                    remedy_mask = remedy_mask << _WORD_BITS | masks[word]
+                yield remedy_mask, catalog_id
+
+    def nbytes(self) -> int:
+        return self.masks.itemsize * len(self.masks) + self.ids.itemsize * len(self.ids)
+
+
+def _split(mask: int, words: int) -> List[int]:
+    return [mask >> (word * _WORD_BITS) & _WORD_MASK for word in range(words)]
+
+
+class _Group:
+    """The remedies of a symptom, by highest bit (-1 for remedies without ingredients)."""
+    __slots__ = ("symptom", "buckets", "size")
+
+    def __init__(self, symptom: str):
+        self.symptom = symptom
+        self.buckets: Dict[int, _Bucket] = {}
+        self.size = 0
+
+
+class RemedyIndex:
+    """
+        Bitset index of catalog remedies by symptom key.
+
+        Args:
+            max_age (float): Seconds after which the index is stale and
+            should be refreshed with the remedies added since.
+            overlap (int): Catalog ids below the last loaded one that a
+            refresh reads again, for rows whose insert committed late.
+    """
+
+    def __init__(self, max_age: float = 30.0, overlap: int = 1000):
+        self.max_age = max_age
+        self.overlap = overlap
+        self._bits: Dict[str, int] = {}
+        self._ingredient_bits: Dict[int, int] = {}
+        self._groups: Dict[str, _Group] = {}
+        self._recent: Set[int] = set()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.last_id = 0
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.refreshes = 0
+        self.lookups = 0
+        self.exact_hits = 0
+        self.subset_hits = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def stale(self) -> bool:
+        return not self.loaded or time.monotonic() - self.loaded_at > self.max_age
+
+    @property
+    def refresh_from(self) -> int:
+        """The catalog id after which a refresh reads remedies."""
+        return max(0, self.last_id - self.overlap) if self.loaded else 0
+
+    def add_ingredient(self, ingredient_id: int, key: Optional[str] = None) -> int:
+        """Gives an ingredient vocabulary id the next free bit, unless it has one."""
+        bit = self._ingredient_bits.get(ingredient_id)
+        if bit is None:
+            bit = self._ingredient_bits[ingredient_id] = len(self._ingredient_bits)
+        if key:
+            self._bits.setdefault(sys.intern(key), bit)
+        return bit
+
+    def add(self, catalog_id: int, symptom_key: str, ingredient_ids: Iterable[int]):
+        """Adds a catalog remedy; ingredient ids without a bit get the next free ones."""
+        mask = 0
+        for ingredient_id in ingredient_ids:
+            mask |= 1 << self.add_ingredient(ingredient_id)
+        group = self._groups.get(symptom_key)
+        if group is None:
+            symptom_key = sys.intern(symptom_key)
+            group = self._groups[symptom_key] = _Group(symptom_key)
+        high_bit = mask.bit_length() - 1
+        bucket = group.buckets.get(high_bit)
+        if bucket is None:
+            bucket = group.buckets[high_bit] = _Bucket(high_bit)
+        bucket.append(catalog_id, mask)
+        group.size += 1
+        self.size += 1
+
+    def update(self, ingredients: Iterable[Tuple[int, str]],
+               remedies: Iterable[Tuple[int, str, Iterable[int]]], upper_id: int):
+        """
+            Adds the ingredients and remedies read from the catalog up to
+            ``upper_id``, skipping the remedies a previous update already
+            added, and marks the index fresh.
+
+            Args:
+                ingredients (iterable): (ingredient id, vocabulary key) pairs,
+                most frequent first.
+                remedies (iterable): (catalog id, symptom key, ingredient ids)
+                rows, by catalog id.
+                upper_id (int): The highest catalog id the rows were read up to.
+        """
+        floor = upper_id - self.overlap
+        with self._lock:
+            for ingredient_id, key in ingredients:
+                self.add_ingredient(ingredient_id, key)
+            for catalog_id, symptom_key, ingredient_ids in remedies:
+                if catalog_id in self._recent:
+                    continue
+                self.add(catalog_id, symptom_key, ingredient_ids)
+                if catalog_id > floor:
+                    self._recent.add(catalog_id)
+            self._recent = {catalog_id for catalog_id in self._recent if catalog_id > floor}
+            self.last_id = max(self.last_id, upper_id)
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+            self.refreshes += 1
+
+    def pantry_mask(self, pantry: Iterable[str]) -> Tuple[int, bool]:
+        """
+            Returns the bitset of a pantry, and whether every ingredient of
+            it has a bit; an ingredient without one is in no remedy.
+        """
+        mask, complete = 0, True
+        for name in pantry:
+            bit = self._bits.get(vocab_key(name))
+            if bit is None:
+                complete = False
+            else:
+                mask |= 1 << bit
+        return mask, complete
+
+    def exact(self, symptom: str, pantry: Iterable[str]) -> Optional[int]:
+        """Returns the catalog id of the first remedy generated for exactly this pantry, or None."""
+        self.lookups += 1
+        group = self._groups.get(vocab_key(symptom or ""))
+        if group is None:
+            return None
+        mask, complete = self.pantry_mask(pantry)
+        if not complete:
+            return None
+        bucket = group.buckets.get(mask.bit_length() - 1)
+        catalog_id = bucket.find(mask) if bucket is not None else None
+        if catalog_id is not None:
+            self.exact_hits += 1
+        return catalog_id
+
+    def _makeable(self, group: _Group, mask: int):
+        missing = ~mask
+        buckets = group.buckets
+        bits = [-1]
+        while mask:
+            low = mask & -mask
+            bits.append(low.bit_length() - 1)
+            mask ^= low
+        for bit in bits:
+            bucket = buckets.get(bit)
+            if bucket is not None:
+                yield from bucket.scan(missing)
+
+    def can_make(self, symptom: str, pantry: Iterable[str]) -> List[int]:
+        """Returns the catalog ids of the remedies of a symptom that only need pantry ingredients."""
+        self.lookups += 1
+        group = self._groups.get(vocab_key(symptom or ""))
+        if group is None:
+            return []
+        mask, _ = self.pantry_mask(pantry)
+        return sorted(catalog_id for _, catalog_id in self._makeable(group, mask))
+
+    def best(self, symptom: str, pantry: Iterable[str]) -> Optional[int]:
+        """
+            Returns the catalog id of the makeable remedy using the most
+            pantry ingredients (the oldest on ties), or None.
+        """
+        self.lookups += 1
+        group = self._groups.get(vocab_key(symptom or ""))
+        if group is None:
+            return None
+        mask, _ = self.pantry_mask(pantry)
+        best, best_rank = None, None
+        for remedy_mask, catalog_id in self._makeable(group, mask):
+            rank = (bin(remedy_mask).count("1"), -catalog_id)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = catalog_id, rank
+        if best is not None:
+            self.subset_hits += 1
+        return best
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the mask and id columns."""
+        return sum(bucket.nbytes() for group in self._groups.values()
+                   for bucket in group.buckets.values())
+
+    def stats(self) -> dict:
+        return {
+            "remedies": self.size,
+            "symptoms": len(self._groups),
+            "ingredients": len(self._ingredient_bits),
+            "memory_bytes": self.memory_bytes(),
+            "last_id": self.last_id,
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1) if self.loaded else None,
+            "refreshes": self.refreshes,
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "subset_hits": self.subset_hits,
+        }
@@ -0,0 +1,106 @@
+"""
+In-process fan-out of events to the open WebSocket connections of a worker.
+
+Connections subscribe per parent. An event is serialized once and the same
+string is appended to the queue of every connection of that parent, so an
+idle connection costs one small Subscription object and its empty deque.
+Queues are bounded: a client that does not keep up loses its oldest
+events (counted in ``dropped``) instead of growing the worker's memory.
+
+publish() may be called from any thread; delivery happens on the event
+loop the hub was bound to.
+"""
+import asyncio
+import os
+import threading
+from collections import deque
+from typing import Dict, Optional, Set
+
+
+class Subscription:
+    """The pending events of one connection."""
+    __slots__ = ("parent_id", "_events", "_ready", "dropped")
+
+    def __init__(self, parent_id: int, max_pending: int):
+        self.parent_id = parent_id
+        self._events = deque(maxlen=max_pending)
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, text: str):
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+        self._events.append(text)
+        self._ready.set()
+
+    async def get(self) -> str:
+        """Waits for the next event and returns it as JSON text."""
+        while not self._events:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._events.popleft()
+
+
+class EventHub:
+    """
+        Routes events to the subscriptions of a parent.
+
+        Args:
+            max_pending (int): Events queued per connection before the oldest
+            are dropped.
+    """
+
+    def __init__(self, max_pending: int = 16):
+        self.max_pending = max_pending
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Sets the event loop the subscriptions live on."""
+        self._loop = loop
+
+    def subscribe(self, parent_id: int) -> Subscription:
+        """Registers a connection of a parent; call from the event loop."""
+        subscription = Subscription(parent_id, self.max_pending)
+        self._subscriptions.setdefault(parent_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.parent_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.parent_id]
+
+    def publish(self, parent_id: int, text: str):
+        """
+            Delivers an event, already serialized to JSON text, to every
+            connection of the parent in this worker. Safe to call from any thread.
+        """
+        with self._lock:
+            self.published += 1
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._dispatch, parent_id, text)
+
+    def _dispatch(self, parent_id: int, text: str):
+        for subscription in self._subscriptions.get(parent_id, ()):
+            subscription.push(text)
+            self.delivered += 1
+
+    def stats(self) -> dict:
+        subscriptions = [sub for subs in self._subscriptions.values() for sub in subs]
+        return {
+            "connections": len(subscriptions),
+            "parents": len(self._subscriptions),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": sum(sub.dropped for sub in subscriptions),
+        }
+
+
+event_hub = EventHub(int(os.getenv("EVENT_QUEUE_SIZE", "16")))
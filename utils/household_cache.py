@@ -0,0 +1,126 @@
+"""
+In-memory cache of the per-household context the remedy routes need:
+each kid's symptom, age and allergies and the parent's available pantry.
+
+Entries are grouped by parent_id, filled on first read and dropped
+write-through by the kids, symptoms and ingredients routers whenever
+the parent edits any of these values. The routers also send the
+invalidation to every other process (database.events.publish_invalidation),
+and entries expire after HOUSEHOLD_CACHE_TTL seconds (default 30) in case
+a notification is lost.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class HouseholdContextCache:
+    """
+        Thread-safe LRU cache of remedy contexts, one bucket per parent_id
+        holding the contexts of that parent's kids.
+
+        A load that races with an invalidation for the same parent is
+        returned to its caller but not stored, so a stale read can never
+        outlive the write that invalidated it.
+
+        Args:
+            max_households (int): Parents cached before the least recently
+            used one is dropped.
+            ttl (float): Seconds after which a cached context is loaded again.
+    """
+
+    def __init__(self, max_households: int = 10000, ttl: float = 30.0):
+        self.max_households = max_households
+        self.ttl = ttl
+        # parent_id -> {kid_id: (context, loaded_at)}
+        self._households: "OrderedDict[int, Dict[int, Tuple[Any, float]]]" = OrderedDict()
+        # Parents with loads in flight: their load count and invalidation count
+        self._loading: Dict[int, int] = {}
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, parent_id: int, kid_id: int,
+            loader: Callable[[int, int], Optional[Any]]) -> Optional[Any]:
+        """
+            Returns the cached context of a kid, loading it on a miss.
+
+            Args:
+                parent_id (int): The parent the kid belongs to.
+                kid_id (int): The kid whose context is needed.
+                loader (callable): Called with (kid_id, parent_id) on a miss to
+                read the context from the database; None means "not found"
+                and is not cached.
+
+            Returns:
+                The kid's context, or None if the loader found nothing.
+        """
+        now = time.monotonic()
+        with self._lock:
+            household = self._households.get(parent_id)
+            entry = household.get(kid_id) if household is not None else None
+            if entry is not None and now - entry[1] < self.ttl:
+                self._households.move_to_end(parent_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            self._loading[parent_id] = self._loading.get(parent_id, 0) + 1
+            version = self._versions.get(parent_id, 0)
+
+        context = None
+        try:
+            context = loader(kid_id, parent_id)
+        finally:
+            with self._lock:
+                if context is not None and self._versions.get(parent_id, 0) == version:
+                    self._households.setdefault(parent_id, {})[kid_id] = (context, now)
+                    self._households.move_to_end(parent_id)
+                    while len(self._households) > self.max_households:
+                        self._households.popitem(last=False)
+                # Versions are only kept while a load of the parent is in flight
+                remaining = self._loading.pop(parent_id) - 1
+                if remaining:
+                    self._loading[parent_id] = remaining
+                else:
+                    self._versions.pop(parent_id, None)
+        return context
+
+    def invalidate(self, parent_id: int):
+        """
+            Drops the cached contexts of every kid of a parent. Called after
+            every write to the parent's kids or pantry.
+        """
+        with self._lock:
+            self._households.pop(parent_id, None)
+            if parent_id in self._loading:
+                self._versions[parent_id] = self._versions.get(parent_id, 0) + 1
+            self.invalidations += 1
+
+    def clear(self):
+        """Drops every cached household."""
+        with self._lock:
+            for parent_id in self._loading:
+                self._versions[parent_id] = self._versions.get(parent_id, 0) + 1
+            self._households.clear()
+
+    def stats(self) -> dict:
+        """
+            Returns the cache counters, including the hit ratio over all
+            lookups since startup.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "households": len(self._households),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+household_cache = HouseholdContextCache(ttl=float(os.getenv("HOUSEHOLD_CACHE_TTL", "30")))
@@ -0,0 +1,114 @@
+"""
+A pool of async workers draining a job queue.
+
+Each worker is an asyncio task that claims one job at a time and processes
+it in a thread, so the number of workers bounds how many jobs run at once
+and a burst of submissions waits in the queue instead of opening that many
+provider calls. Idle workers sleep until notify() is called (a job was
+submitted in this process) or the poll interval elapses (a job was
+submitted by another process).
+"""
+import asyncio
+import time
+from typing import Any, Callable, List, Optional
+
+
+class JobWorkerPool:
+    """
+        Claims and processes jobs with a fixed number of async workers.
+
+        Args:
+            claim (callable): Returns the next job, or None if the queue is
+            empty; blocking.
+            process (callable): Processes one job; blocking. Exceptions are
+            counted and logged, the worker keeps going.
+            concurrency (int): Number of workers.
+            poll_interval (float): How long an idle worker sleeps between
+            claims, in seconds.
+            on_idle (callable): Housekeeping run by an idle worker at most
+            every ``idle_every`` seconds, e.g. requeueing abandoned jobs.
+            idle_every (float): Minimum time between two on_idle calls.
+    """
+
+    def __init__(self, claim: Callable[[], Optional[Any]], process: Callable[[Any], None],
+                 concurrency: int = 2, poll_interval: float = 1.0,
+                 on_idle: Optional[Callable[[], Any]] = None, idle_every: float = 30.0):
+        self.claim = claim
+        self.process = process
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.on_idle = on_idle
+        self.idle_every = idle_every
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_idle = 0.0
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        """Starts the workers on the running event loop."""
+        if self.running or self.concurrency <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._work(), name=f"job-worker-{i}")
+                       for i in range(self.concurrency)]
+
+    async def stop(self):
+        """Cancels the workers; a job being processed finishes in its thread."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self):
+        """Wakes the idle workers; call from the event loop after submitting a job."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.claim)
+            except Exception as e:
+                print(f"Claiming a job failed: {e}")
+                job = None
+            if job is None:
+                await self._idle()
+                continue
+            self.in_flight += 1
+            try:
+                await asyncio.to_thread(self.process, job)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Processing job {job} failed: {e}")
+            finally:
+                self.in_flight -= 1
+
+    async def _idle(self):
+        if self.on_idle is not None and time.monotonic() - self._last_idle >= self.idle_every:
+            self._last_idle = time.monotonic()
+            try:
+                await asyncio.to_thread(self.on_idle)
+            except Exception as e:
+                print(f"Job housekeeping failed: {e}")
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
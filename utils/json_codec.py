@@ -0,0 +1,27 @@
+"""
+JSON encoding used for API responses, JSON database columns and AI output.
+
+orjson is used when it is installed; it serializes several times faster
+than the standard library and handles datetimes natively. Without it,
+everything falls back to the json module with the same behaviour.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library is a slower fallback
+    orjson = None
+
+
+def dumps(obj) -> str:
+    """Serializes obj to a compact JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def loads(data):
+    """Parses a JSON document from str or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
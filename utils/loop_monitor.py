@@ -0,0 +1,153 @@
+"""
+Event-loop lag monitor.
+
+A heartbeat task sleeps for a fixed interval and measures how late it
+wakes up: that scheduling delay is the time the loop spent running
+something else without yielding, e.g. a blocking psycopg2, bcrypt or LLM
+SDK call inside an ``async def`` handler. Delays are kept in a histogram.
+
+A watchdog thread notices when the heartbeat is overdue by more than a
+threshold while the loop is still blocked and captures the stack of the
+event-loop thread at that moment, so the offending call can be found.
+
+Settings: LOOP_MONITOR_ENABLED (default 1), LOOP_LAG_INTERVAL_MS (default
+100) and LOOP_LAG_THRESHOLD_MS (default 100).
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from collections import deque
+from typing import List, Optional, Sequence
+
+# Upper bounds of the histogram buckets, in milliseconds
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LoopLagMonitor:
+    """
+        Measures event-loop scheduling delay and captures the stacks of stalls.
+
+        Args:
+            interval (float): Heartbeat interval, in seconds.
+            threshold (float): Lag above which a stall is captured, in seconds.
+            max_stalls (int): Number of captured stalls kept.
+            buckets (sequence): Histogram bucket upper bounds, in milliseconds.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1, max_stalls: int = 50,
+                 buckets: Sequence[float] = LAG_BUCKETS_MS):
+        self.interval = interval
+        self.threshold = threshold
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._stalls = deque(maxlen=max_stalls)
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._captured_beat = 0.0
+        self.samples = 0
+        self.stall_count = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    @classmethod
+    def from_env(cls) -> "LoopLagMonitor":
+        """Builds the monitor from LOOP_LAG_INTERVAL_MS and LOOP_LAG_THRESHOLD_MS."""
+        return cls(interval=float(os.getenv("LOOP_LAG_INTERVAL_MS", "100")) / 1000,
+                   threshold=float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100")) / 1000)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Starts the heartbeat on the running loop and the watchdog thread."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """Stops the heartbeat and the watchdog."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self.record(max(0.0, now - expected))
+            self._last_beat = now
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval / 2):
+            beat = self._last_beat
+            overdue = time.perf_counter() - beat - self.interval
+            if overdue > self.threshold and beat != self._captured_beat:
+                self._captured_beat = beat  # one capture per stall
+                self._capture(overdue)
+
+    def _capture(self, overdue: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = traceback.format_stack(frame)
+        self.stall_count += 1
+        self._stalls.append({
+            "at": time.time(),
+            "blocked_ms": round(overdue * 1000, 1),
+            "stack": [line.rstrip() for line in stack],
+        })
+        print(f"Event loop blocked for more than {overdue * 1000:.0f} ms at:\n{''.join(stack[-3:])}")
+
+    def record(self, lag: float):
+        """Adds one scheduling delay, in seconds, to the histogram."""
+        self.samples += 1
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        self._counts[bisect_left(self.buckets, lag * 1000)] += 1
+
+    def histogram(self) -> dict:
+        """Returns the cumulative lag histogram, keyed by bucket upper bound in ms."""
+        histogram, total = {}, 0
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self._counts):
+            total += count
+            histogram[str(bound)] = total
+        return histogram
+
+    def stalls(self) -> List[dict]:
+        """Returns the captured stalls, newest first."""
+        return list(reversed(self._stalls))
+
+    def stats(self) -> dict:
+        """Returns lag statistics and the histogram."""
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "samples": self.samples,
+            "avg_lag_ms": round(self.lag_total / self.samples * 1000, 3) if self.samples else 0.0,
+            "max_lag_ms": round(self.lag_max * 1000, 3),
+            "stalls": self.stall_count,
+            "histogram_ms": self.histogram(),
+        }
+
+
+loop_monitor = LoopLagMonitor.from_env()
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "1") != "0"
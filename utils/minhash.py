@@ -0,0 +1,213 @@
+"""
+Near-duplicate matching of short free-text terms with MinHash and LSH.
+
+A term is casefolded and stripped of everything but letters and digits,
+so "Ear ache", "earache " and "EARACHE" are the same key and are matched by
+a dictionary read. Other variants ("sore throat" / "sore throats" /
+"sore throt") are matched approximately: the term is cut into character
+shingles, its MinHash signature is split into LSH bands, and the terms
+sharing a band with it are the candidates. Candidates are verified with
+the exact Jaccard similarity of their shingles, so the threshold is exact
+and LSH only decides which few terms are compared.
+
+Shingles alone would merge terms differing in one short word ("nose
+infection" / "eye infection") or by an extra word ("cut finger nail" /
+"cut finger"), so a candidate must also have as many words as the term,
+each equal to the word at the same place or, for words of four letters or
+more, one edit away from it.
+
+This catches spelling, spacing, casing and inflection variants, not
+synonyms: "ear pain" and "earache" share too few characters to match.
+"""
+import random
+import re
+import threading
+import zlib
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+
+def compact_term(term: str) -> str:
+    """Casefolds a term and drops spaces and punctuation."""
+    return _NON_ALNUM.sub("", term.casefold())
+
+
+def words(term: str) -> Tuple[str, ...]:
+    """Casefolds a term and splits it into words of letters and digits."""
+    return tuple(word for word in _NON_ALNUM.split(term.casefold()) if word)
+
+
+def _one_edit_apart(first: str, second: str) -> bool:
+    """Whether two different words differ by one insertion, deletion or substitution."""
+    if len(first) > len(second):
+        first, second = second, first
+    if len(second) - len(first) > 1:
+        return False
+    for i, (a, b) in enumerate(zip(first, second)):
+        if a != b:
+            rest = i + 1 if len(first) == len(second) else i
+            return first[rest:] == second[i + 1:]
+    return True
+
+
+def same_words(first: Tuple[str, ...], second: Tuple[str, ...]) -> bool:
+    """
+        Whether two terms have the same words in the same order, up to one
+        edit in each word of four letters or more.
+    """
+    if len(first) != len(second):
+        return False
+    return all(a == b or (min(len(a), len(b)) >= 4 and _one_edit_apart(a, b))
+               for a, b in zip(first, second))
+
+
+def shingles(term: str, size: int = 3) -> FrozenSet[str]:
+    """Returns the character shingles of a compacted term; short terms are one shingle."""
+    if len(term) <= size:
+        return frozenset((term,)) if term else frozenset()
+    return frozenset(term[i:i + size] for i in range(len(term) - size + 1))
+
+
+def jaccard(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class MinHasher:
+    """
+        Computes MinHash signatures with ``num_perm`` universal hash functions
+        over the CRC32 of each shingle. The seed is fixed, so signatures are
+        the same in every process.
+    """
+    __slots__ = ("num_perm", "_params")
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                        for _ in range(num_perm)]
+
+    def signature(self, term_shingles: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in term_shingles]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+                     for a, b in self._params)
+
+
+class _Entry:
+    __slots__ = ("canonical", "shingles", "words")
+
+    def __init__(self, canonical: str, term_shingles: FrozenSet[str]):
+        self.canonical = canonical
+        self.shingles = term_shingles
+        self.words = words(canonical)
+
+
+class SymptomIndex:
+    """
+        Maps free-text symptoms to the canonical spelling of a similar symptom
+        already known.
+
+        Args:
+            threshold (float): Minimum Jaccard similarity of the shingles.
+            bands (int): Number of LSH bands.
+            rows (int): Signature rows per band; bands * rows hash functions
+            are used. More bands and fewer rows find more candidates.
+            shingle_size (int): Characters per shingle.
+    """
+
+    def __init__(self, threshold: float = 0.6, bands: int = 16, rows: int = 2,
+                 shingle_size: int = 3):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self.shingle_size = shingle_size
+        self._hasher = MinHasher(bands * rows)
+        self._exact: Dict[str, _Entry] = {}
+        self._buckets: List[Dict[Tuple[int, ...], List[_Entry]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.lookups = 0
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+
+    def __len__(self):
+        return len(self._exact)
+
+    def _band_keys(self, term_shingles: FrozenSet[str]):
+        signature = self._hasher.signature(term_shingles)
+        rows = self.rows
+        return [signature[band * rows:(band + 1) * rows] for band in range(self.bands)]
+
+    def add(self, symptom: str) -> str:
+        """
+            Adds a symptom unless an equal one (after compacting) is known.
+
+            Returns:
+                str: The canonical spelling, i.e. the first one added.
+        """
+        key = compact_term(symptom)
+        if not key:
+            return symptom
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is not None:
+                return entry.canonical
+            entry = _Entry(symptom.strip(), shingles(key, self.shingle_size))
+            self._exact[key] = entry
+            for buckets, band_key in zip(self._buckets, self._band_keys(entry.shingles)):
+                buckets.setdefault(band_key, []).append(entry)
+        return entry.canonical
+
+    def load(self, symptoms: Iterable[str]):
+        """Adds known symptoms, most authoritative spelling first."""
+        for symptom in symptoms:
+            if symptom:
+                self.add(symptom)
+        self.loaded = True
+
+    def match(self, symptom: str) -> Optional[str]:
+        """
+            Returns the canonical spelling of the most similar known symptom
+            above the threshold with the same words (see same_words), or None.
+        """
+        self.lookups += 1
+        key = compact_term(symptom or "")
+        if not key:
+            return None
+        entry = self._exact.get(key)
+        if entry is not None:
+            self.exact_hits += 1
+            return entry.canonical
+
+        term_shingles = shingles(key, self.shingle_size)
+        term_words = words(symptom)
+        candidates: Set[_Entry] = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(term_shingles)):
+            candidates.update(buckets.get(band_key, ()))
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            if not same_words(term_words, candidate.words):
+                continue
+            score = jaccard(term_shingles, candidate.shingles)
+            if score > best_score or (score == best_score and best is None):
+                best, best_score = candidate, score
+        if best is None:
+            return None
+        self.fuzzy_hits += 1
+        return best.canonical
+
+    def canonicalize(self, symptom: str) -> str:
+        """Returns the canonical spelling of a similar known symptom, adding the symptom if none."""
+        return self.match(symptom) or self.add(symptom)
+
+    def stats(self) -> dict:
+        return {
+            "symptoms": len(self._exact),
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "fuzzy_hits": self.fuzzy_hits,
+        }
@@ -0,0 +1,113 @@
+"""
+Keyset (cursor-based) pagination and field projection helpers shared by
+the list endpoints.
+
+A cursor is the opaque, url-safe encoding of the sort key of the last row
+on a page; the next page is read with ``WHERE key > %s ORDER BY key``, so
+every page costs the same no matter how deep the client has scrolled.
+"""
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(value: Any) -> str:
+    """
+        Encodes the sort key of the last returned row as an opaque cursor.
+
+        Args:
+            value: A JSON serialisable sort key (an id, a name, ...).
+
+        Returns:
+            str: The url-safe cursor string.
+    """
+    raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], key_type: Optional[type] = None) -> Any:
+    """
+        Decodes a cursor produced by encode_cursor.
+
+        Args:
+            cursor (str): The cursor sent by the client, or None for the first page.
+            key_type (type): The type the sort key must have (int for id
+            cursors, str for name cursors), or None to accept any JSON value.
+
+        Returns:
+            The sort key stored in the cursor, or None for the first page.
+
+        Raises:
+            ValueError: If the cursor is malformed or holds a key of another type.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    # bool is an int subclass, but never a valid sort key
+    if key_type is not None and (not isinstance(value, key_type) or isinstance(value, bool)):
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def parse_fields(fields: Optional[str], allowed: Dict[str, str]) -> List[str]:
+    """
+        Parses a comma separated ``fields`` query parameter.
+
+        Args:
+            fields (str): The requested output fields, or None for all of them.
+            allowed (dict): Mapping of output field name to database column.
+
+        Returns:
+            list: The requested output field names, in the order of ``allowed``.
+
+        Raises:
+            ValueError: If an unknown field is requested.
+    """
+    if not fields:
+        return list(allowed)
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - allowed.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in allowed if field in requested]
+
+
+def select_columns(output_fields: Sequence[str], allowed: Dict[str, str], key_column: str) -> str:
+    """
+        Builds the SELECT list for the requested fields. The keyset column
+        is always selected so the next cursor can be computed.
+
+        Column names only ever come from ``allowed``, never from the client.
+    """
+    columns = [key_column]
+    for field in output_fields:
+        column = allowed[field]
+        if column not in columns:
+            columns.append(column)
+    return ", ".join(columns)
+
+
+def split_page(rows: Sequence[Any], limit: int, key_column: str) -> Tuple[List[Any], Optional[str]]:
+    """
+        Splits the ``limit + 1`` rows read from the database into the page
+        to return and the cursor of the next page.
+
+        Args:
+            rows (list): Rows ordered by ``key_column``, at most ``limit + 1`` of them.
+            limit (int): The page size requested by the client.
+            key_column (str): The column the rows are ordered by.
+
+        Returns:
+            tuple: The rows of this page and the next cursor (None on the last page).
+    """
+    page = list(rows[:limit])
+    if len(rows) > limit and page:
+        return page, encode_cursor(page[-1][key_column])
+    return page, None
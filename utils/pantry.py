@@ -0,0 +1,56 @@
+"""
+Helpers for reconciling a parent's stored pantry with the full pantry
+state sent by a client.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+
+class PantryDiff(NamedTuple):
+    """
+        The changes needed to turn the stored pantry into the incoming one.
+
+        inserts and updates hold (ingredient_name, is_available) pairs,
+        deletes holds the ingredient names that are no longer in the pantry.
+    """
+    inserts: List[Tuple[str, bool]]
+    updates: List[Tuple[str, bool]]
+    deletes: List[str]
+
+    @property
+    def upserts(self) -> List[Tuple[str, bool]]:
+        """Rows to send through a single INSERT ... ON CONFLICT statement."""
+        return self.inserts + self.updates
+
+
+def normalize_ingredient_name(name: str) -> str:
+    """
+        Trims surrounding whitespace and collapses inner runs of whitespace
+        so "  ginger  root" and "ginger root" are stored as the same row.
+    """
+    return " ".join(name.split())
+
+
+def diff_pantry(stored: Dict[str, bool], incoming: Iterable[Tuple[str, bool]]) -> PantryDiff:
+    """
+        Computes the inserts, availability flips and deletes between the
+        stored pantry and the client's full pantry state.
+
+        Args:
+            stored (dict): Mapping of stored ingredient name to is_available.
+            incoming (iterable): (ingredient_name, is_available) pairs sent by the
+            client. Duplicate names are collapsed, the last one wins.
+
+        Returns:
+            PantryDiff: The rows to insert, update and delete.
+    """
+    wanted: Dict[str, bool] = {}
+    for name, is_available in incoming:
+        name = normalize_ingredient_name(name)
+        if name:
+            wanted[name] = bool(is_available)
+
+    inserts = [(name, available) for name, available in wanted.items() if name not in stored]
+    updates = [(name, available) for name, available in wanted.items()
+               if name in stored and stored[name] != available]
+    deletes = [name for name in stored if name not in wanted]
+    return PantryDiff(inserts, updates, deletes)
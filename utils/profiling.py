@@ -0,0 +1,137 @@
+"""
+On-demand CPU and memory profiling of a live worker.
+
+sample_cpu() is a sampling profiler: a background thread reads the stacks
+of every other thread at a fixed interval and counts them, which costs
+the profiled code nothing between samples. The result is returned in the
+collapsed-stack format ("frame;frame;frame count" per line) read by
+flamegraph.pl, speedscope and similar tools.
+
+MemoryProfiler wraps tracemalloc: it takes named snapshots and diffs two
+of them to show which source lines allocated the memory in between.
+"""
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import List, Optional
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def sample_cpu(duration: float, interval: float = 0.005) -> str:
+    """
+        Samples the stacks of all other threads for ``duration`` seconds.
+
+        Args:
+            duration (float): How long to sample, in seconds.
+            interval (float): Time between samples, in seconds.
+
+        Returns:
+            str: Collapsed stacks, root first, one "stack count" per line,
+            most frequent first.
+    """
+    own_id = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks = Counter()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, f"thread-{thread_id}"))
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+class MemoryProfiler:
+    """
+        Named tracemalloc snapshots and diffs between them.
+
+        Args:
+            max_snapshots (int): Number of snapshots kept; the oldest are dropped.
+    """
+
+    def __init__(self, max_snapshots: int = 10):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 10):
+        """Starts tracing allocations, keeping ``frames`` frames per allocation."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self):
+        """Stops tracing and drops every snapshot."""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def snapshot(self, name: str, limit: int = 20) -> List[str]:
+        """
+            Takes a snapshot under ``name``.
+
+            Returns:
+                list: The top ``limit`` allocating source lines of the snapshot.
+
+            Raises:
+                RuntimeError: If tracing has not been started.
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("Memory tracing is not started.")
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),))
+        with self._lock:
+            self._snapshots[name] = snapshot
+            self._snapshots.move_to_end(name)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return [str(stat) for stat in snapshot.statistics("lineno")[:limit]]
+
+    def diff(self, first: str, second: str, limit: int = 20) -> List[str]:
+        """
+            Compares two snapshots.
+
+            Returns:
+                list: The ``limit`` source lines whose allocations grew or
+                shrank the most between the two snapshots.
+
+            Raises:
+                KeyError: If either snapshot does not exist.
+        """
+        with self._lock:
+            before, after = self._snapshots[first], self._snapshots[second]
+        return [str(stat) for stat in after.compare_to(before, "lineno")[:limit]]
+
+    def snapshot_names(self) -> List[str]:
+        with self._lock:
+            return list(self._snapshots)
+
+
+memory_profiler = MemoryProfiler()
+# Only one CPU profile runs at a time per worker
+cpu_profile_lock = threading.Lock()
+
+
+def profile_cpu_once(duration: float, interval: float) -> Optional[str]:
+    """Runs sample_cpu unless another profile is running; returns None if so."""
+    if not cpu_profile_lock.acquire(blocking=False):
+        return None
+    try:
+        return sample_cpu(duration, interval)
+    finally:
+        cpu_profile_lock.release()
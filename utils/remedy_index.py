@@ -0,0 +1,54 @@
+"""
+The remedy index of this worker (utils.bitset_index), loaded from the
+remedy catalog at startup and refreshed with the remedies added since
+whenever it is older than REMEDY_INDEX_MAX_AGE seconds (default 5).
+
+get_existing_remedy answers from it instead of searching the catalog by
+symptom and ingredient key: a pantry without a matching remedy costs no
+query at all, and a match costs one primary-key read. Remedies stored
+since, by any process, are found once the index has been refreshed. Set
+REMEDY_INDEX=0 to search the catalog in SQL instead, and
+REMEDY_INDEX_SUBSET=1 to also serve the best remedy makeable from the
+pantry when none was generated for it exactly (off by default).
+"""
+import os
+import threading
+
+from database import repository
+from database.database import get_db_connection
+from utils.bitset_index import RemedyIndex
+
+REMEDY_INDEX_ENABLED = os.getenv("REMEDY_INDEX", "1") != "0"
+REMEDY_INDEX_SUBSET = os.getenv("REMEDY_INDEX_SUBSET", "0") == "1"
+
+remedy_index = RemedyIndex(max_age=float(os.getenv("REMEDY_INDEX_MAX_AGE", "5")))
+_refreshing = threading.Lock()
+
+
+def refresh_remedy_index(conn):
+    """
+        Adds the catalog remedies stored since the last refresh, or all of
+        them on the first call. Returns at once if another thread is
+        already refreshing; lookups meanwhile use the index as it is.
+    """
+    if not _refreshing.acquire(blocking=False):
+        return
+    try:
+        after_id = remedy_index.refresh_from
+        upper_id = repository.max_catalog_id(conn)
+        remedy_index.update(repository.catalog_ingredients(conn, after_id, upper_id),
+                            repository.iter_catalog_index_rows(conn, after_id, upper_id),
+                            upper_id)
+    finally:
+        _refreshing.release()
+
+
+def load_remedy_index():
+    """Loads or refreshes the index with a connection of its own."""
+    if not REMEDY_INDEX_ENABLED:
+        return
+    conn = get_db_connection()
+    try:
+        refresh_remedy_index(conn)
+    finally:
+        conn.close()
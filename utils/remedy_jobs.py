@@ -0,0 +1,115 @@
+"""
+Asynchronous remedy generation.
+
+POST /remedies/jobs stores a row in the remedy_jobs table and returns its id
+immediately; workers claim queued rows with FOR UPDATE SKIP LOCKED, run the
+shared remedy pipeline (utils.remedy_pipeline) and store the result for
+GET /remedies/jobs/{id}; progress and the outcome are also pushed to the
+parent's WebSocket connections (database.events). Because the queue lives
+in Postgres, workers can run inside the API processes (REMEDY_JOB_WORKERS
+per process, default 2), in a separate process (remedy_worker.py), or both.
+
+A job left running by a worker that died is requeued after
+REMEDY_JOB_STALE_SECONDS and failed after REMEDY_JOB_MAX_ATTEMPTS attempts.
+"""
+import os
+from typing import Optional
+
+from database import events, repository
+from database.database import FastJson, get_db_connection
+from database.remedy_context import load_remedy_context
+from utils.household_cache import household_cache
+from utils.job_workers import JobWorkerPool
+from utils.remedy_pipeline import PROVIDERS, generate_remedy
+from utils.tracing import span
+
+STALE_AFTER = float(os.getenv("REMEDY_JOB_STALE_SECONDS", "600"))
+MAX_ATTEMPTS = int(os.getenv("REMEDY_JOB_MAX_ATTEMPTS", "3"))
+
+
+def enqueue_job(parent_id: int, kid_id: int, provider: str) -> int:
+    """
+        Queues a remedy generation.
+
+        Returns:
+            int: The job id.
+
+        Raises:
+            ValueError: If the provider is unknown.
+    """
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown provider {provider!r}; expected one of {', '.join(PROVIDERS)}")
+    conn = get_db_connection()
+    try:
+        job_id = repository.enqueue_remedy_job(conn, parent_id, kid_id, provider)
+        conn.commit()
+        return job_id
+    finally:
+        conn.close()
+
+
+def claim_job() -> Optional[repository.RemedyJobRow]:
+    conn = get_db_connection()
+    try:
+        job = repository.claim_remedy_job(conn)
+        if job is not None:
+            events.publish(conn, job.parent_id, {"type": "progress", "job_id": job.id,
+                                                 "kid_id": job.kid_id, "status": "running"})
+        conn.commit()
+        return job
+    finally:
+        conn.close()
+
+
+def process_job(job: repository.RemedyJobRow):
+    """Generates the remedy of a claimed job and stores the result or the error."""
+    result, error = None, None
+    with span("remedy_job", job_id=job.id, provider=job.provider):
+        try:
+            context = household_cache.get(job.parent_id, job.kid_id, load_remedy_context)
+            if context is None:
+                error = "Kid not found for this user"
+            else:
+                result = generate_remedy(context, job.provider)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+    conn = get_db_connection()
+    try:
+        repository.finish_remedy_job(conn, job.id, "failed" if error else "done",
+                                     None if error else FastJson(result), error)
+        events.publish(conn, job.parent_id, job_event(job, result, error))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def job_event(job: repository.RemedyJobRow, result: Optional[dict], error: Optional[str]) -> dict:
+    """Returns the push event announcing the outcome of a job."""
+    if error:
+        event_type = "remedy_failed"
+    elif "Ingreidents_to_Buy" in result:
+        event_type = "shopping_list_ready"
+    else:
+        event_type = "remedy_ready"
+    return {"type": event_type, "job_id": job.id, "kid_id": job.kid_id,
+            "status": "failed" if error else "done", "result": result, "error": error}
+
+
+def requeue_stale_jobs():
+    conn = get_db_connection()
+    try:
+        count = repository.requeue_stale_remedy_jobs(conn, STALE_AFTER, MAX_ATTEMPTS)
+        conn.commit()
+    finally:
+        conn.close()
+    if count:
+        print(f"Requeued or failed {count} abandoned remedy jobs")
+
+
+def make_pool(concurrency: int) -> JobWorkerPool:
+    return JobWorkerPool(claim_job, process_job, concurrency=concurrency,
+                         poll_interval=float(os.getenv("REMEDY_JOB_POLL_INTERVAL", "1")),
+                         on_idle=requeue_stale_jobs)
+
+
+remedy_workers = make_pool(int(os.getenv("REMEDY_JOB_WORKERS", "2")))
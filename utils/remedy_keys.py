@@ -0,0 +1,60 @@
+"""
+Canonical keys for remedies.
+
+The ingredient key identifies the pantry a remedy was generated for,
+independent of ingredient order; the content hash identifies a remedy
+(symptom, pantry, name and steps) so identical remedies are stored once
+in the remedy catalog. The vocabulary key identifies a symptom or an
+ingredient name in the symptom_vocab and ingredient_vocab tables.
+"""
+import hashlib
+import json
+from typing import Iterable, Optional, Sequence
+
+
+def ingredient_key(ingredients: Iterable[str]) -> str:
+    """
+        Returns the order independent key of an ingredient list,
+        e.g. '["Ginger", "Honey"]'.
+    """
+    return json.dumps(sorted(ingredients))
+
+
+def content_hash(symptom: str, ingredients: Iterable[str], remedy_name: str,
+                 steps: Optional[Sequence[str]]) -> str:
+    """
+        Returns the hex digest addressing a remedy in the catalog.
+
+        Args:
+            symptom (str): The symptom the remedy is for.
+            ingredients (iterable): The pantry the remedy was generated for.
+            remedy_name (str): The name of the remedy.
+            steps (list): The preparation steps, or None.
+
+        Returns:
+            str: A 32 character hex digest.
+    """
+    canonical = json.dumps([symptom, sorted(ingredients), remedy_name, list(steps or [])],
+                           separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def remedy_key(symptom: str, ingredients: Iterable[str]) -> str:
+    """
+        Returns the key of a remedy lookup: the symptom and the order
+        independent ingredient key, joined by an ASCII unit separator.
+    """
+    return f"{symptom}\x1f{ingredient_key(ingredients)}"
+
+
+# SQL twin of vocab_key(), for set-based backfills; format with a column expression
+VOCAB_KEY_SQL = "lower(btrim(regexp_replace({}, '\\s+', ' ', 'g')))"
+
+
+def vocab_key(name: str) -> str:
+    """
+        Returns the vocabulary key of a symptom or ingredient name: lower
+        case, with runs of whitespace collapsed and the ends trimmed, so
+        "  Sore   Throat" and "sore throat" share a vocabulary entry.
+    """
+    return " ".join(name.split()).lower()
@@ -0,0 +1,186 @@
+"""
+The remedy generation pipeline shared by the remedy routes and the remedy
+job workers: curated local rules first, then the remedy catalog, then an
+AI provider. Everything here blocks, so async callers run it in a thread.
+"""
+from fastapi import HTTPException
+
+from ai_clients import gemini_client, groq_client, openai_client
+from database import repository
+from database.database import get_db_connection
+from database.history import record_remedy, record_shopping_list
+from database.remedy_context import RemedyContext
+from utils.allergens import filter_ingredients
+from utils.remedy_index import (REMEDY_INDEX_ENABLED, REMEDY_INDEX_SUBSET, refresh_remedy_index,
+                                remedy_index)
+from utils.remedy_keys import ingredient_key, remedy_key
+from utils.remedy_rules import local_remedies, normalize_term
+from utils.shared_cache import remedy_cache
+from utils.shopping import is_provider_error
+from utils.symptom_index import canonical_symptom
+from utils.tracing import span
+
+# Provider name -> blocking generate_remedy_instructions(symptom, ingredients, allergies)
+PROVIDERS = {
+    "openai": openai_client.generate_remedy_instructions,
+    "gemini": gemini_client.generate_remedy_instructions,
+    "groq": groq_client.generate_remedy_instructions,
+}
+
+
+def get_local_remedy(context: RemedyContext):
+    """
+        Answers a remedy request from the local rules engine, without any
+        provider call, and records it in the remedy history.
+
+        Returns:
+            dict: The remedy response, or None if no curated rule matches.
+    """
+    with span("rules"):
+        rule = local_remedies.match(context.symptom, context.pantry, context.allergies, context.age)
+    if rule is None:
+        return None
+    # The pantry items the rule needs, catalogued like provider remedies
+    ingredients_list = [item for item in context.safe_pantry
+                        if normalize_term(item) in rule.requires]
+    steps = list(rule.steps)
+    record_remedy(context.kid_id, context.parent_id, canonical_symptom(context.symptom),
+                  rule.remedy_name, steps, ingredients_list)
+    return {
+        "kid_id": context.kid_id,
+        "symptom": context.symptom,
+        "ingredients": ingredients_list,
+        "remedy_name": rule.remedy_name,
+        "steps": steps,
+    }
+
+
+def get_existing_remedy(symptom_name, ingredients, allergies=()):
+    """
+        Looks up a catalog remedy generated for the same symptom and the same
+        set of ingredients (in any order): in this worker's cache, then in the
+        node-wide shared cache, then in the remedy index (utils.remedy_index),
+        or in the database if the index is disabled. The symptom is first
+        mapped to the spelling of a similar known symptom, so near-duplicates
+        ("sore throats", "Sore throat") share catalog entries.
+
+        The pantry is looked up without the ingredients the kid is allergic
+        to, so a remedy generated for a pantry with an allergen is never
+        served to the kid. With REMEDY_INDEX_SUBSET=1, a pantry without an
+        exact match also gets the remedy that can be made with the most of
+        its safe ingredients; such matches are not cached.
+
+        Returns:
+            dict: The catalog row (content_hash, remedy_name, steps, symptom,
+            ingredients, the latter being the ingredients the remedy was
+            generated for), or None if no remedy matches.
+    """
+    symptom_name = canonical_symptom(symptom_name)
+    ingredients = filter_ingredients(ingredients, allergies)
+    key = remedy_key(symptom_name, ingredients)
+    with span("cache"):
+        cached = remedy_cache.get(key)
+    if cached is not None:
+        return cached
+
+    conn = get_db_connection()
+    try:
+        if REMEDY_INDEX_ENABLED and remedy_index.stale:
+            refresh_remedy_index(conn)
+        exact = True
+        if REMEDY_INDEX_ENABLED and remedy_index.loaded:
+            with span("remedy_index"):
+                catalog_id = remedy_index.exact(symptom_name, ingredients)
+                if catalog_id is None and REMEDY_INDEX_SUBSET:
+                    exact = False
+                    catalog_id = remedy_index.best(symptom_name, ingredients)
+            result = repository.catalog_remedy_by_id(conn, catalog_id) \
+                if catalog_id is not None else None
+        else:
+            result = repository.find_catalog_remedy(conn, symptom_name, ingredient_key(ingredients))
+        if result and exact:
+            remedy_cache.put(key, result)
+        return result
+    except Exception as e:
+        print(f"Database error: {e}")
+        raise HTTPException(status_code=500,
+                            detail="Database error occurred") from e
+    finally:
+        conn.close()
+
+
+class ProviderError(RuntimeError):
+    """The provider answered with an error message or with nothing usable."""
+
+
+def get_known_remedy(context: RemedyContext):
+    """
+        Answers a remedy request from a local rule or the remedy catalog,
+        without any provider call, and records it in the history.
+
+        Returns:
+            dict: The remedy response, or None if the provider is needed.
+    """
+    local_remedy = get_local_remedy(context)
+    if local_remedy:
+        return local_remedy
+
+    existing = get_existing_remedy(context.symptom, list(context.pantry), context.allergies)
+    if not existing:
+        return None
+    # The ingredients the remedy uses, which may be fewer than the pantry
+    ingredients_list = list(existing["ingredients"] or ())
+    record_remedy(context.kid_id, context.parent_id, context.symptom, existing["remedy_name"],
+                  existing["steps"], ingredients_list, catalog_hash=existing["content_hash"])
+    return {"kid_id": context.kid_id, "symptom": context.symptom, "ingredients": ingredients_list,
+            "remedy_name": existing["remedy_name"], "steps": existing["steps"]}
+
+
+def record_provider_answer(context: RemedyContext, provider: str, answer) -> dict:
+    """
+        Records what a provider answered for a kid, a remedy or a shopping
+        list, and returns the response.
+
+        Raises:
+            ProviderError: If the answer is an error message ("Error: ...")
+            or neither a remedy nor a shopping list.
+    """
+    if is_provider_error(answer):
+        detail = answer.strip().strip('"') if isinstance(answer, str) else "no usable answer"
+        raise ProviderError(f"{provider} failed: {detail}")
+    # Generated for, and catalogued under, the pantry without allergens
+    ingredients_list = context.safe_pantry
+    response = {"kid_id": context.kid_id, "symptom": context.symptom,
+                "ingredients": ingredients_list}
+    if hasattr(answer, "remedy_name") and hasattr(answer, "steps"):
+        # Catalogued under the canonical spelling get_existing_remedy looks up
+        record_remedy(context.kid_id, context.parent_id, canonical_symptom(context.symptom),
+                      answer.remedy_name, answer.steps, ingredients_list)
+        return {**response, "remedy_name": answer.remedy_name, "steps": list(answer.steps or [])}
+    if isinstance(answer, str):
+        record_shopping_list(context.kid_id, context.parent_id, context.symptom, answer)
+        return {**response, "Ingreidents_to_Buy": answer}
+    raise ProviderError(f"{provider} returned no remedy")
+
+
+def generate_remedy(context: RemedyContext, provider: str) -> dict:
+    """
+        Produces a remedy for a kid and records it in the history.
+
+        Args:
+            context (RemedyContext): The kid's symptom, age, allergies and pantry.
+            provider (str): The AI provider used when neither a local rule
+            nor the catalog has a remedy, one of PROVIDERS.
+
+        Returns:
+            dict: kid_id, symptom and ingredients, plus either remedy_name and
+            steps or, when the pantry is not enough, Ingreidents_to_Buy.
+
+        Raises:
+            ProviderError: If the provider failed; nothing is recorded.
+    """
+    known = get_known_remedy(context)
+    if known:
+        return known
+    answer = PROVIDERS[provider](context.symptom, context.safe_pantry, list(context.allergies))
+    return record_provider_answer(context, provider, answer)
@@ -0,0 +1,122 @@
+"""
+A deterministic, local remedy engine for the most common symptom and
+pantry combinations.
+
+Curated rules (data/remedy_rules.json) are loaded into memory once and
+indexed by normalized symptom. A lookup is a dictionary read plus a few
+set inclusion tests, so matching requests are answered without calling
+an AI provider.
+"""
+import json
+import os
+import re
+import threading
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from utils.allergens import compile_matcher
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "data", "remedy_rules.json")
+
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+def normalize_term(term: str) -> str:
+    """Case-folds a symptom or ingredient and collapses punctuation and whitespace."""
+    return " ".join(_NON_WORD.sub(" ", term.casefold()).split())
+
+
+class RemedyRule(NamedTuple):
+    """One curated remedy and the conditions under which it applies."""
+    remedy_name: str
+    steps: Tuple[str, ...]
+    requires: FrozenSet[str]
+    min_age_years: int
+
+
+class LocalRemedyEngine:
+    """
+        In-memory index of curated remedy rules with coverage counters.
+    """
+
+    def __init__(self):
+        self._index: Dict[str, List[RemedyRule]] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.lookups = 0
+        self.matches = 0
+
+    def load(self, path: str = DEFAULT_RULES_PATH):
+        """
+            Loads and indexes the rules file. Rules of each symptom are kept
+            most specific (most required ingredients) first.
+        """
+        with open(path, encoding="utf-8") as rules_file:
+            raw_rules = json.load(rules_file)
+
+        index: Dict[str, List[RemedyRule]] = {}
+        for raw in raw_rules:
+            rule = RemedyRule(
+                remedy_name=raw["remedy_name"],
+                steps=tuple(raw["steps"]),
+                requires=frozenset(normalize_term(item) for item in raw["requires"]),
+                min_age_years=int(raw.get("min_age_years", 0)),
+            )
+            for symptom in raw["symptoms"]:
+                index.setdefault(normalize_term(symptom), []).append(rule)
+        for rules in index.values():
+            rules.sort(key=lambda r: len(r.requires), reverse=True)
+
+        with self._lock:
+            self._index = index
+            self.loaded = True
+
+    def match(self, symptom: Optional[str], pantry: Iterable[str],
+              allergies: Iterable[str] = (), age: Optional[int] = None) -> Optional[RemedyRule]:
+        """
+            Finds the most specific rule that can be made from the pantry.
+
+            Args:
+                symptom (str): The kid's symptom.
+                pantry (iterable): The available ingredients.
+                allergies (iterable): The kid's allergies; rules needing any of
+                them are skipped.
+                age (int): The kid's age in years; rules for older kids are skipped.
+
+            Returns:
+                RemedyRule: The matching rule, or None if no rule applies.
+        """
+        if not self.loaded:
+            self.load()
+        self.lookups += 1
+        if not symptom:
+            return None
+        rules = self._index.get(normalize_term(symptom))
+        if not rules:
+            return None
+
+        available = {normalize_term(item) for item in pantry}
+        allergens = compile_matcher(allergies)
+        for rule in rules:
+            if age is not None and age < rule.min_age_years:
+                continue
+            if not rule.requires <= available:
+                continue
+            if allergens and any(allergens.matches(item) for item in rule.requires):
+                continue
+            self.matches += 1
+            return rule
+        return None
+
+    def stats(self) -> dict:
+        """Returns the share of lookups answered locally."""
+        return {
+            "rules_loaded": self.loaded,
+            "symptoms_indexed": len(self._index),
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "coverage_rate": round(self.matches / self.lookups, 4) if self.lookups else 0.0,
+        }
+
+
+local_remedies = LocalRemedyEngine()
@@ -0,0 +1,182 @@
+"""
+Two-tier cache of catalog remedies, keyed by the canonical remedy key.
+
+The first tier is a small LRU in each worker process. The second, optional
+tier is a SQLite database in WAL mode on the local disk, shared by every
+worker of the node: readers never block the writer, pages are read through
+a memory map, and no IPC round trip to another process is needed. It is
+enabled by setting REMEDY_SHARED_CACHE_PATH and bounded to
+REMEDY_SHARED_CACHE_MAX_ENTRIES entries, evicting the least recently
+written ones.
+
+Catalog remedies never change once stored, so entries are not invalidated.
+A failure of the shared tier is treated as a miss and never fails a request.
+"""
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from utils import json_codec
+
+
+class SharedCache:
+    """
+        Size-bounded key/value store in a SQLite WAL file, safe to use from
+        several threads and processes at once.
+
+        Args:
+            path (str): The database file; created if missing.
+            max_entries (int): Number of entries kept; older ones are evicted.
+            evict_every (int): Number of writes between evictions.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50000, evict_every: int = 100):
+        self.path = path
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread and process: SQLite handles must not cross a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA mmap_size=67108864")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL
+                )
+            """)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the value stored under key, or None."""
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Shared cache read failed: {e}")
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json_codec.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        """Stores a JSON serializable value, evicting old entries now and then."""
+        try:
+            conn = self._connection()
+            # REPLACE gives the entry a new rowid, so rowid order is write order
+            conn.execute("INSERT OR REPLACE INTO entries (key, value) VALUES (?, ?)",
+                         (key, json_codec.dumps(value)))
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self.evict()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Shared cache write failed: {e}")
+
+    def evict(self):
+        """Deletes the oldest entries beyond max_entries."""
+        self._connection().execute("""
+            DELETE FROM entries WHERE rowid <= (SELECT MAX(rowid) FROM entries) - ?
+        """, (self.max_entries,))
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Returns the hit ratio of the shared tier, as seen by this worker."""
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class RemedyCache:
+    """
+        Per-process LRU in front of an optional SharedCache.
+
+        Args:
+            max_local_entries (int): Size of the per-process LRU.
+            shared (SharedCache): The node-wide tier, or None to disable it.
+    """
+
+    def __init__(self, max_local_entries: int = 2048, shared: Optional[SharedCache] = None):
+        self.max_local_entries = max_local_entries
+        self.shared = shared
+        self._local: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "RemedyCache":
+        """
+            Builds the cache from REMEDY_LOCAL_CACHE_SIZE, and the shared tier
+            from REMEDY_SHARED_CACHE_PATH / REMEDY_SHARED_CACHE_MAX_ENTRIES.
+        """
+        path = os.getenv("REMEDY_SHARED_CACHE_PATH")
+        shared = SharedCache(path, int(os.getenv("REMEDY_SHARED_CACHE_MAX_ENTRIES", "50000"))) \
+            if path else None
+        return cls(int(os.getenv("REMEDY_LOCAL_CACHE_SIZE", "2048")), shared)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value from the fastest tier holding it, or None."""
+        with self._lock:
+            if key in self._local:
+                self._local.move_to_end(key)
+                self.hits += 1
+                return self._local[key]
+            self.misses += 1
+        if self.shared is None:
+            return None
+        value = self.shared.get(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Any):
+        """Stores a value in both tiers."""
+        self._remember(key, value)
+        if self.shared is not None:
+            self.shared.put(key, value)
+
+    def _remember(self, key: str, value: Any):
+        with self._lock:
+            self._local[key] = value
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Returns the hit ratios of both tiers."""
+        lookups = self.hits + self.misses
+        return {
+            "local_entries": len(self._local),
+            "local_hits": self.hits,
+            "local_misses": self.misses,
+            "local_hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "shared": self.shared.stats() if self.shared is not None else None,
+        }
+
+
+remedy_cache = RemedyCache.from_env()
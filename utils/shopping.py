@@ -0,0 +1,60 @@
+"""
+Parsing of the free-text shopping lists returned by the AI clients into
+normalized item names, so they can be stored as one row per item.
+"""
+import re
+from typing import List
+
+# Separators the models use between items: commas, semicolons, new lines
+_SEPARATORS = re.compile(r"[,;\n]+")
+# Leading list markers: "-", "*", "•", "1.", "2)"
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]+|\d+[.)])\s*")
+_CONJUNCTION = re.compile(r"^(?:and|or)\s+", re.IGNORECASE)
+
+
+def normalize_item(item: str) -> str:
+    """
+        Normalizes a single shopping list item: strips list markers, quotes,
+        trailing punctuation and surrounding whitespace, and lower-cases it.
+    """
+    item = _LIST_MARKER.sub("", item)
+    item = item.strip().strip("\"'`*").strip()
+    item = _CONJUNCTION.sub("", item)
+    item = item.rstrip(".!").strip()
+    return " ".join(item.split()).lower()
+
+
+def is_provider_error(answer) -> bool:
+    """
+        Tells whether a provider answer is a failure rather than a remedy or
+        a shopping list: None (unparseable output) or an "Error: ..." string.
+    """
+    if answer is None:
+        return True
+    return isinstance(answer, str) and answer.strip().strip('"').lower().startswith("error:")
+
+
+def parse_shopping_list(text: str) -> List[str]:
+    """
+        Splits a comma separated (or bulleted) shopping list into item names.
+
+        Args:
+            text (str): The shopping list as returned by an AI client,
+            e.g. '"Honey, Lemon, and Ginger."'.
+
+        Returns:
+            list: The distinct, normalized item names in their original order.
+            Provider error messages ("Error: ...") yield an empty list.
+    """
+    if not text or is_provider_error(text):
+        return []
+    text = text.strip().strip('"')
+
+    items = []
+    seen = set()
+    for raw_item in _SEPARATORS.split(text):
+        item = normalize_item(raw_item)
+        if item and item not in seen:
+            seen.add(item)
+            items.append(item)
+    return items
@@ -0,0 +1,55 @@
+"""
+The symptom index of this worker (utils.minhash), loaded from the symptoms
+already in the remedy catalog and on kids' profiles.
+
+Kids keep their symptom as the parent wrote it. The canonical spelling is
+only a key: the symptoms router resolves its vocabulary id, and remedies
+are stored in and looked up from the catalog under it, so "Sore throat",
+"sore throats" and "sore throt" share remedies. Spellings of the catalog
+win, since those are the ones with cached remedies. A new symptom is added
+to the index of the worker that stored it once committed; other workers
+see it after their next load.
+
+SYMPTOM_MATCH_THRESHOLD (default 0.6) is the minimum Jaccard similarity
+of the character shingles of two spellings, which must also have the same
+words up to small typos (utils.minhash.same_words).
+"""
+import os
+from typing import Optional
+
+from database import repository
+from database.database import get_db_connection
+from utils.minhash import SymptomIndex
+
+symptom_index = SymptomIndex(threshold=float(os.getenv("SYMPTOM_MATCH_THRESHOLD", "0.6")))
+
+
+def load_symptom_index():
+    """(Re)loads the stored symptoms; symptoms already indexed are kept."""
+    conn = get_db_connection()
+    try:
+        symptoms = repository.known_symptoms(conn)
+    finally:
+        conn.close()
+    symptom_index.load(symptoms)
+
+
+def canonical_symptom(symptom: Optional[str]) -> Optional[str]:
+    """Returns the canonical spelling of a similar known symptom, or the symptom itself."""
+    if not symptom:
+        return symptom
+    return symptom_index.match(symptom) or symptom
+
+
+def canonicalize_new_symptom(symptom: str) -> str:
+    """
+        Returns the canonical spelling of a symptom being written: a similar
+        known symptom, or the symptom itself. A new symptom is not added
+        here; call remember_symptom once it is committed.
+    """
+    return symptom_index.match(symptom) or symptom
+
+
+def remember_symptom(symptom: str):
+    """Adds a committed symptom to the index, unless an equal one is known."""
+    symptom_index.add(symptom)
@@ -0,0 +1,228 @@
+"""
+Lightweight per-request tracing.
+
+Code marks the phases of a request with ``with span("db"):`` (or the
+``@traced`` decorator). Spans nest through a context variable, so they
+follow the request into run_in_threadpool calls. The HTTP middleware opens
+a root span per request, sums the durations of its phases into a
+Server-Timing response header, and every finished span is exported to an
+in-process ring buffer (served by /metrics/traces) and, when
+TRACE_EXPORT_PATH is set, appended to a JSON Lines file in the
+OpenTelemetry (OTLP/JSON) span format. No collector is needed. Spans are
+finished on the event loop too, so the file is written in batches by a
+background thread; spans finished while its queue is full are dropped
+from the file (not from the ring buffer) and counted.
+
+Set TRACING_ENABLED=0 to turn spans into no-ops.
+"""
+import atexit
+import functools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from utils import json_codec
+
+
+class Span:
+    """One timed phase of a request."""
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "error", "children")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error = None
+        # Finished descendants, collected on the root span for Server-Timing
+        self.children: List["Span"] = []
+
+    @property
+    def duration_ms(self) -> float:
+        """Duration so far if the span is still open."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict:
+        """Returns the span in the OTLP/JSON span format."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": 2 if self.parent_id is None else 1,  # SERVER for roots, INTERNAL otherwise
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)}
+                           for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class SpanExporter:
+    """
+        Keeps the most recent finished spans in memory and optionally appends
+        them to a JSON Lines file from a background thread.
+
+        Args:
+            max_spans (int): Size of the ring buffer.
+            path (str): File to append spans to, or None.
+            max_pending (int): Spans waiting to be written before new ones
+            are dropped from the file.
+    """
+
+    def __init__(self, max_spans: int = 2000, path: Optional[str] = None,
+                 max_pending: int = 10000):
+        self._spans = deque(maxlen=max_spans)
+        self.path = path
+        self._pending: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.exported = 0
+        self.written = 0
+        self.dropped = 0
+
+    def export(self, span: Span):
+        self._spans.append(span)
+        self.exported += 1
+        if self.path:
+            if self._thread is None:
+                self._start()
+            try:
+                self._pending.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-export", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            spans = [self._pending.get()]
+            while len(spans) < 500:
+                try:
+                    spans.append(self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                lines = "".join(json_codec.dumps(span.to_otlp()) + "\n" for span in spans)
+                with open(self.path, "a", encoding="utf-8") as export_file:
+                    export_file.write(lines)
+                self.written += len(spans)
+            except Exception as e:
+                print(f"Span export failed: {e}")
+            finally:
+                for _ in spans:
+                    self._pending.task_done()
+
+    def flush(self):
+        """Waits until every exported span has been written to the file."""
+        if self._thread is not None and self._thread.is_alive():
+            self._pending.join()
+
+    def reset_after_fork(self):
+        """
+            Forgets the writer thread and the spans queued in the parent
+            process, which the parent writes; the child starts its own
+            thread on its first span.
+        """
+        self._pending = queue.Queue(maxsize=self._pending.maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def recent(self, limit: int = 100) -> List[dict]:
+        """Returns the most recent spans, newest first, in OTLP/JSON format."""
+        spans = list(self._spans)[-limit:]
+        return [span.to_otlp() for span in reversed(spans)]
+
+
+ENABLED = os.getenv("TRACING_ENABLED", "1") != "0"
+exporter = SpanExporter(int(os.getenv("TRACE_BUFFER_SIZE", "2000")), os.getenv("TRACE_EXPORT_PATH"))
+atexit.register(lambda: exporter.flush())
+# Forked workers (gunicorn) inherit the master's exporter but not its thread
+os.register_at_fork(after_in_child=lambda: exporter.reset_after_fork())
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_root_span: ContextVar[Optional[Span]] = ContextVar("root_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+        Times the enclosed block as a child of the current span, or as a new
+        trace if there is none.
+
+        Yields:
+            Span: The span, to add attributes to; None when tracing is disabled.
+    """
+    if not ENABLED:
+        yield None
+        return
+    parent = _current_span.get()
+    current = Span(name, parent.trace_id if parent else os.urandom(16).hex(),
+                   parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    root_token = _root_span.set(current) if parent is None else None
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if root_token is not None:
+            _root_span.reset(root_token)
+        else:
+            root = _root_span.get()
+            if root is not None:
+                root.children.append(current)
+        exporter.export(current)
+
+
+def traced(name: str):
+    """Decorator running the function inside ``span(name)``."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def server_timing(root: Span) -> str:
+    """
+        Returns the Server-Timing header value of a request: the total
+        duration of each phase name plus the whole request so far.
+    """
+    totals: Dict[str, float] = {}
+    for child in root.children:
+        totals[child.name] = totals.get(child.name, 0.0) + child.duration_ms
+    metrics = [f"{name};dur={duration:.1f}" for name, duration in totals.items()]
+    metrics.append(f"total;dur={root.duration_ms:.1f}")
+    return ", ".join(metrics)
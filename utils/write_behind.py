@@ -0,0 +1,196 @@
+"""
+A bounded write-behind queue that takes history inserts off the response
+path: rows are queued by the request handlers and written in batches by a
+background thread, one transaction per batch.
+
+Memory is bounded by ``max_pending``. When the queue is full, submitting
+waits up to ``put_timeout`` for room and then writes the row itself, so
+rows are never lost: a full queue slows the callers down instead.
+A batch that fails is retried row by row, so one bad row does not lose
+the rest of its batch.
+"""
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+        Batches rows per kind and hands each batch to the flush function
+        registered for that kind, e.g. a multi-row execute_values INSERT.
+
+        Args:
+            connection_factory (callable): Returns a new DB-API connection.
+            flush_size (int): Flush as soon as this many rows are pending.
+            flush_interval (float): Flush at least this often, in seconds.
+            max_pending (int): Maximum number of queued rows.
+            put_timeout (float): Seconds to wait for room in a full queue
+            before writing the row synchronously.
+    """
+
+    def __init__(self, connection_factory: Callable[[], Any], flush_size: int = 200,
+                 flush_interval: float = 0.5, max_pending: int = 10000,
+                 put_timeout: float = 0.05):
+        self.connection_factory = connection_factory
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._flushers: Dict[str, Callable[[Any, List[Any]], None]] = {}
+        self._thread = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.written = 0
+        self.batches = 0
+        self.sync_writes = 0
+        self.failed = 0
+
+    def register(self, kind: str, flush_fn: Callable[[Any, List[Any]], None]):
+        """
+            Registers the function writing a batch of rows of one kind.
+            It is called with an open cursor and the list of rows; the
+            queue commits after it returns.
+        """
+        self._flushers[kind] = flush_fn
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Starts the background writer thread."""
+        with self._lock:
+            if self.running:
+                return
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+            Drains every queued row and stops the writer thread.
+            Called from the application's shutdown hook.
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+            thread.join(timeout)
+            self._thread = None
+
+    def submit(self, kind: str, row: Any) -> bool:
+        """
+            Queues a row for writing.
+
+            Args:
+                kind (str): The registered kind of the row.
+                row: The row, in whatever shape the kind's flush function expects.
+
+            Returns:
+                bool: True if the row was queued, False if it was written
+                synchronously (writer not running, e.g. in scripts, or
+                queue still full after ``put_timeout``).
+        """
+        if kind not in self._flushers:
+            raise KeyError(f"No flush function registered for {kind!r}")
+        if self.running:
+            try:
+                self._queue.put((kind, row), timeout=self.put_timeout)
+                self.queued += 1
+                return True
+            except queue.Full:
+                pass
+        self.sync_writes += 1
+        self._write({kind: [row]})
+        return False
+
+    def stats(self) -> dict:
+        """Returns the queue counters."""
+        return {
+            "running": self.running,
+            "pending": self._queue.qsize(),
+            "queued": self.queued,
+            "written": self.written,
+            "batches": self.batches,
+            "sync_writes": self.sync_writes,
+            "failed": self.failed,
+        }
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: Dict[str, List[Any]] = defaultdict(list)
+            size = 0
+            deadline = time.monotonic() + self.flush_interval
+            while size < self.flush_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(remaining, 0)) if remaining > 0 \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                kind, row = item
+                batch[kind].append(row)
+                size += 1
+            if stopping:
+                # Drain whatever was queued before the stop marker
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch[item[0]].append(item[1])
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: Dict[str, List[Any]]):
+        rows = sum(len(kind_rows) for kind_rows in batch.values())
+        error = self._write_batch(batch)
+        if error is None:
+            self.written += rows
+            self.batches += 1
+            return
+        print(f"Write-behind flush of {rows} rows failed: {error}")
+        if rows == 1:
+            self.failed += 1
+            return
+        # Find the bad rows: write the others one transaction each
+        for kind in self._flushers:
+            for row in batch.get(kind, ()):
+                error = self._write_batch({kind: [row]})
+                if error is None:
+                    self.written += 1
+                else:
+                    self.failed += 1
+                    print(f"Write-behind dropped a {kind} row: {error}")
+
+    def _write_batch(self, batch: Dict[str, List[Any]]):
+        """Writes a batch in one transaction; returns the error, or None on success."""
+        conn = None
+        try:
+            conn = self.connection_factory()
+            cursor = conn.cursor()
+            # Kinds are flushed in registration order, whatever order rows arrived in
+            for kind, flush_fn in self._flushers.items():
+                if batch.get(kind):
+                    flush_fn(cursor, batch[kind])
+            conn.commit()
+            return None
+        except Exception as e:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            return e
+        finally:
+            if conn is not None:
+                conn.close()
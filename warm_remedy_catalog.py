@@ -0,0 +1,254 @@
+"""
+Offline warm-up job for the remedy catalog.
+
+It enumerates the (symptom, ingredient set) combinations most likely to be
+requested next -- the current symptom of every kid against their
+household's pantry, the most requested symptoms against the most common
+pantries in the catalog, and a seed list of common children's complaints --
+skips the ones already in remedy_catalog, and generates the rest through
+one of the AI clients with bounded concurrency and a rate limit.
+
+Combinations taken from kids' profiles are generated with the kids'
+allergies: their allergens are removed from the pantry before the remedy
+is generated and catalogued, so the catalog row only lists ingredients
+that are safe for them.
+
+Combinations that produced a catalog remedy or a shopping list are
+checkpointed to a JSON file so an interrupted run resumes where it
+stopped; failed generations are retried on the next run.
+
+Usage:
+    python warm_remedy_catalog.py --provider openai --limit 200 --concurrency 4 --rate 2
+"""
+import argparse
+import importlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Set, Tuple
+
+from database.database import FastJson, get_db_connection, init_db, insert_catalog_rows
+from utils.allergens import filter_ingredients
+from utils.remedy_keys import content_hash, ingredient_key, remedy_key
+from utils.shopping import is_provider_error, parse_shopping_list
+from utils.symptom_index import canonical_symptom, load_symptom_index
+
+PROVIDERS = {
+    "openai": "ai_clients.openai_client",
+    "gemini": "ai_clients.gemini_client",
+    "groq": "ai_clients.groq_client",
+}
+
+# Common complaints paired with pantries most households have
+SEED_COMBINATIONS = [
+    ("Sore Throat", ["Honey", "Lemon"]),
+    ("Sore Throat", ["Salt", "Water"]),
+    ("Cough", ["Honey", "Ginger"]),
+    ("Cough", ["Honey", "Lemon", "Ginger"]),
+    ("Ear Pain", ["Garlic", "Olive Oil"]),
+    ("Ear Pain", ["Coconut Oil"]),
+    ("Fever", ["Water", "Lemon"]),
+    ("Nausea", ["Ginger", "Water"]),
+    ("Upset Stomach", ["Ginger", "Honey"]),
+    ("Cold", ["Turmeric", "Milk"]),
+    ("Stuffy Nose", ["Salt", "Water"]),
+    ("Constipation", ["Prunes", "Water"]),
+]
+
+# (symptom, pantry, allergies); the pantry excludes the allergens
+Combination = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+
+
+class RateLimiter:
+    """
+        Spaces calls at least 1 / rate seconds apart across all threads.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def combination_key(symptom: str, ingredients) -> str:
+    """Returns the checkpoint / catalog key of a combination."""
+    return remedy_key(symptom, ingredients)
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """Returns the keys of combinations finished by previous runs."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as checkpoint:
+        return set(json.load(checkpoint))
+
+
+def save_checkpoint(path: str, done: Set[str]):
+    """Atomically writes the finished keys."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as checkpoint:
+        json.dump(sorted(done), checkpoint)
+    os.replace(tmp_path, path)
+
+
+def frequent_combinations(cursor, limit: int) -> List[Combination]:
+    """
+        Enumerates candidate combinations, most frequent first: every kid's
+        current symptom against their household's available pantry without
+        the kid's allergens, then the most requested symptoms against the
+        most common catalog pantries, then the seed list.
+    """
+    cursor.execute("""
+        SELECT k.symptom_name AS symptom, p.ingredients, k.allergy_terms, COUNT(*) AS frequency
+        FROM kids_profile k
+        JOIN LATERAL (
+            SELECT array_agg(ingredient_name ORDER BY ingredient_name) AS ingredients
+            FROM ingredients
+            WHERE parent_id = k.parent_id AND is_available = true
+        ) p ON p.ingredients IS NOT NULL
+        WHERE k.symptom_name IS NOT NULL
+        GROUP BY k.symptom_name, p.ingredients, k.allergy_terms
+        ORDER BY frequency DESC
+        LIMIT %s
+    """, (limit,))
+    combinations = [(row["symptom"],
+                     tuple(filter_ingredients(row["ingredients"], row["allergy_terms"])),
+                     tuple(row["allergy_terms"]))
+                    for row in cursor.fetchall()]
+
+    cursor.execute("""
+        WITH symptoms AS (
+            SELECT c.symptom, COUNT(*) AS frequency
+            FROM remedy_history h JOIN remedy_catalog c ON c.id = h.catalog_id
+            GROUP BY c.symptom ORDER BY frequency DESC LIMIT 20
+        ), pantries AS (
+            SELECT c.ingredients, COUNT(*) AS frequency
+            FROM remedy_history h JOIN remedy_catalog c ON c.id = h.catalog_id
+            GROUP BY c.ingredient_key, c.ingredients ORDER BY frequency DESC LIMIT 20
+        )
+        SELECT s.symptom, p.ingredients
+        FROM symptoms s CROSS JOIN pantries p
+        ORDER BY s.frequency * p.frequency DESC
+        LIMIT %s
+    """, (limit,))
+    combinations += [(row["symptom"], tuple(row["ingredients"]), ())
+                     for row in cursor.fetchall()]
+
+    combinations += [(symptom, tuple(ingredients), ())
+                     for symptom, ingredients in SEED_COMBINATIONS]
+
+    unique = {}
+    for symptom, ingredients, allergies in combinations:
+        # Kids' symptoms and the seeds are as written; the routes look up
+        # and catalog remedies under canonical spellings
+        symptom = canonical_symptom(symptom)
+        if symptom and ingredients:
+            unique.setdefault(combination_key(symptom, ingredients),
+                              (symptom, ingredients, allergies))
+    return list(unique.values())
+
+
+def catalogued_keys(cursor, combinations: List[Combination]) -> Set[str]:
+    """Returns the keys of the combinations that already have a catalog remedy."""
+    cursor.execute(
+        "SELECT symptom, ingredient_key FROM remedy_catalog WHERE symptom = ANY(%s)",
+        (list({symptom for symptom, _, _ in combinations}),),
+    )
+    return {f"{row['symptom']}\x1f{row['ingredient_key']}" for row in cursor.fetchall()}
+
+
+def generate_and_store(provider, rate_limiter: RateLimiter, combination: Combination) -> str:
+    """
+        Generates a remedy for one combination and stores it in the catalog.
+
+        Returns:
+            str: "stored" if a remedy was stored, "shopping_list" if the
+            provider only suggested items to buy, "failed" if it returned an
+            error or unusable output.
+    """
+    symptom, ingredients, allergies = combination
+    rate_limiter.wait()
+    remedy = provider.generate_remedy_instructions(symptom, list(ingredients), list(allergies))
+    if is_provider_error(remedy):
+        return "failed"
+    if not (hasattr(remedy, "remedy_name") and hasattr(remedy, "steps")):
+        return "shopping_list" if isinstance(remedy, str) and parse_shopping_list(remedy) \
+            else "failed"
+
+    conn = get_db_connection()
+    try:
+        insert_catalog_rows(conn.cursor(), [(
+            content_hash(symptom, ingredients, remedy.remedy_name, remedy.steps),
+            symptom,
+            ingredient_key(ingredients),
+            remedy.remedy_name,
+            FastJson(remedy.steps or []),
+            FastJson(list(ingredients)),
+        )])
+        conn.commit()
+    finally:
+        conn.close()
+    return "stored"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate remedies for common combinations.")
+    parser.add_argument("--provider", choices=sorted(PROVIDERS), default="openai")
+    parser.add_argument("--limit", type=int, default=200,
+                        help="Maximum number of combinations read from each source.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="Maximum provider calls per second.")
+    parser.add_argument("--checkpoint", default="warmup_checkpoint.json")
+    args = parser.parse_args()
+
+    init_db()
+    load_symptom_index()
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        combinations = frequent_combinations(cursor, args.limit)
+        done = load_checkpoint(args.checkpoint) | catalogued_keys(cursor, combinations)
+    finally:
+        conn.close()
+
+    pending = [c for c in combinations if combination_key(c[0], c[1]) not in done]
+    print(f"{len(combinations)} candidate combinations, {len(pending)} to generate.")
+
+    provider = importlib.import_module(PROVIDERS[args.provider])
+    rate_limiter = RateLimiter(args.rate)
+    lock = threading.Lock()
+    outcomes = {"stored": 0, "shopping_list": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {executor.submit(generate_and_store, provider, rate_limiter, c): c for c in pending}
+        for future in as_completed(futures):
+            symptom, ingredients, _ = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                print(f"Failed to warm {(symptom, ingredients)}: {e}")
+                outcome = "failed"
+            outcomes[outcome] += 1
+            if outcome == "failed":
+                continue  # Not checkpointed, so it is retried on the next run
+            with lock:
+                done.add(combination_key(symptom, ingredients))
+                save_checkpoint(args.checkpoint, done)
+
+    print(f"Stored {outcomes['stored']} remedies in the catalog, "
+          f"{outcomes['shopping_list']} combinations only got a shopping list, "
+          f"{outcomes['failed']} failed and will be retried.")
+
+
+if __name__ == "__main__":
+    main()